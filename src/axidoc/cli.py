@@ -0,0 +1,132 @@
+import argparse
+import sys
+from typing import List, Optional
+
+from src.axidoc.doctypes import WindowProp
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="axidoc", description="Axidoc command-line tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score = subparsers.add_parser("score-corpus", help="Score every document of a corpus against a reference text.")
+    score.add_argument("--input-dir", default="data/psychometrika/txt", help="Directory of .txt documents.")
+    score.add_argument("--output", default="data/corpus_scores.jsonl", help="JSON-lines file to write scores to.")
+    score.add_argument("--reference", default="values",
+                       help="'values', 'objectivity', or the path of a reference text file.")
+    score.add_argument("--workers", type=int, default=None, help="Worker processes (default: number of CPUs).")
+    score.add_argument("--chunk-size", type=int, default=4, help="Documents handed to a worker at a time.")
+    score.add_argument("--window-size", type=int, default=20)
+    score.add_argument("--window-shift", type=int, default=10)
+    score.add_argument("--top-k", type=int, default=5, help="Best windows kept per representation.")
+    score.add_argument("--limit", type=int, default=None, help="Only score the first N documents.")
+
+    export = subparsers.add_parser("export-vectors",
+                                   help="Export a model's vectors to memory-mappable .npy files.")
+    export.add_argument("--model", choices=["glove", "word2vec"], required=True)
+    export.add_argument("--output", required=True, help="Directory to write the vector table to.")
+    export.add_argument("--dtype", choices=["float32", "float16", "int8"], default="float32")
+
+    report = subparsers.add_parser("quantization-report",
+                                   help="Compare window scores of float16/int8 vectors with float32 vectors.")
+    report.add_argument("files", nargs="*", help="Text files to score (default: the test texts).")
+    report.add_argument("--reference", default="values",
+                        help="'values', 'objectivity', or the path of a reference text file.")
+    report.add_argument("--dtypes", nargs="+", choices=["float16", "int8"], default=["float16", "int8"])
+
+    passages = subparsers.add_parser("build-passage-index",
+                                     help="Index the windows of a corpus that mention value terms.")
+    passages.add_argument("--input-dir", default="data/psychometrika/txt", help="Directory of .txt documents.")
+    passages.add_argument("--output", default="data/passage_index", help="Directory to write the index to.")
+    passages.add_argument("--references", nargs="+", default=["values", "objectivity"],
+                          help="Texts whose tokens are indexed: 'values', 'objectivity' or file paths.")
+    passages.add_argument("--window-size", type=int, default=20)
+    passages.add_argument("--window-shift", type=int, default=10)
+    passages.add_argument("--limit", type=int, default=None, help="Only index the first N documents.")
+
+    query = subparsers.add_parser("query-passages", help="Find the corpus windows that best match some terms.")
+    query.add_argument("terms", nargs="+")
+    query.add_argument("--index", default="data/passage_index", help="Directory of the passage index.")
+    query.add_argument("--top-k", type=int, default=100)
+    query.add_argument("--similar", type=int, default=0,
+                       help="Also query the N indexed terms closest to each term in GloVe space.")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "score-corpus":
+        from src.axidoc.corpus_scoring import score_corpus
+
+        failures = score_corpus(
+            input_dir=args.input_dir,
+            output_file=args.output,
+            reference=args.reference,
+            window_prop=WindowProp(window_size=args.window_size, window_shift=args.window_shift),
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            top_k=args.top_k,
+            limit=args.limit,
+        )
+        return 1 if failures else 0
+
+    if args.command == "export-vectors":
+        from src.axidoc.models import get_model
+        from src.axidoc.vector_store import export_vector_table
+
+        export_vector_table(get_model(args.model), args.output, dtype=args.dtype)
+        return 0
+
+    if args.command == "quantization-report":
+        from rich.console import Console
+        from rich.table import Table
+        from src.axidoc.corpus_scoring import reference_text
+        from src.axidoc.quantization import TEST_TEXT_FILES, quantization_report
+
+        rows = quantization_report(
+            text_files=args.files or TEST_TEXT_FILES,
+            reference_text=reference_text(args.reference),
+            dtypes=args.dtypes,
+        )
+        table = Table(title="Window scores with quantized vectors vs float32")
+        for column in ["model", "file", "dtype", "windows", "max |diff|", "mean |diff|",
+                       "spearman", "same top", "memory", "seconds"]:
+            table.add_column(column)
+        for row in rows:
+            table.add_row(
+                row["model"], row["file"], row["dtype"], str(row["windows"]),
+                f"{row['max_abs_diff']:.2e}", f"{row['mean_abs_diff']:.2e}", f"{row['spearman']:.4f}",
+                str(row["same_top_window"]), f"{row['memory_ratio']:.2f}x", f"{row['seconds']:.4f}",
+            )
+        Console().print(table)
+        return 0
+
+    if args.command == "build-passage-index":
+        from src.axidoc.passage_index import build_passage_index
+
+        build_passage_index(
+            input_dir=args.input_dir,
+            index_dir=args.output,
+            references=args.references,
+            window_prop=WindowProp(window_size=args.window_size, window_shift=args.window_shift),
+            limit=args.limit,
+        )
+        return 0
+
+    if args.command == "query-passages":
+        from src.axidoc.passage_index import PassageIndex
+
+        index = PassageIndex.load(args.index)
+        terms = list(args.terms)
+        if args.similar:
+            terms += [similar for term in args.terms for similar in index.similar_terms(term, args.similar)]
+        for passage in index.query(terms, k=args.top_k):
+            print(f"{passage.file}\t{passage.start_pos}\t{passage.end_pos}\t{passage.score}\t{' '.join(passage.terms)}")
+        return 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
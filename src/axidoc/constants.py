@@ -1,27 +1,20 @@
 import os
 import re
-import spacy
-import pandas as pd
 import numpy as np
 import pickle
-from dotenv import load_dotenv
+from functools import lru_cache
 
 from typing import NamedTuple, Generator, List, Dict, Tuple
 from typing import Optional, Any
 
-from load_utils import tokenize_from_file, tokenize_string
+from src.axidoc.load_utils import tokenize_from_file, tokenize_string
+from src.axidoc.models import get_model
 
 # requires
 from src.logconf import get_logger
 logger = get_logger(__name__)
 logger.info("Logging from the axidoc.constants module.")
 
-# Load environment variables from .env file
-load_dotenv()
-glove_model = os.getenv("MODEL_GLOVE_PRUNED_500K")
-
-nlp = spacy.load(glove_model)
-
 def clean_text(text: str) -> str:
     """Removes newlines and extra spaces from the text."""
     cleaned_text = re.sub(' +', ' ', text.replace('\n', ' '))
@@ -35,11 +28,27 @@ def read_text_from_file(file_path: str) -> str:
 
 # objectivity values
 objectivity_file = "data/objectivity.txt"
-objectivity_text = clean_text(read_text_from_file(objectivity_file))
-objectivity_tokenized = tokenize_string(nlp, objectivity_text)
 
 # values in general
 values_file = "data/values.txt"
-values_text = clean_text(read_text_from_file(values_file))
-values_tokenized = tokenize_string(nlp, values_text)
 
+# Reference texts and their tokens are loaded on first access (see `__getattr__`), so that importing
+# this module neither reads the data files nor loads the GloVe model
+_lazy_attributes = {
+    "nlp": lambda: get_model("glove"),
+    "objectivity_text": lambda: clean_text(read_text_from_file(objectivity_file)),
+    "objectivity_tokenized": lambda: tokenize_string(get_model("glove"), __getattr__("objectivity_text")),
+    "values_text": lambda: clean_text(read_text_from_file(values_file)),
+    "values_tokenized": lambda: tokenize_string(get_model("glove"), __getattr__("values_text")),
+}
+
+
+@lru_cache(maxsize=None)
+def _load_attribute(name: str) -> Any:
+    return _lazy_attributes[name]()
+
+
+def __getattr__(name: str) -> Any:
+    if name in _lazy_attributes:
+        return _load_attribute(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
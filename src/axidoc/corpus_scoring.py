@@ -0,0 +1,158 @@
+import os
+import json
+import multiprocessing
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from rich.progress import Progress
+
+from src.logconf import get_logger
+from src.axidoc import constants
+from src.axidoc.doctypes import DocumentWrapper, WindowProp, top_window_indices, window_scores
+from src.axidoc.models import get_vector_table
+from src.axidoc.repr import get_reference_profile, text_to_document_wrapper
+
+# logging
+logger = get_logger(__name__)
+logger.info("Logging from src/axidoc/corpus_scoring.py module.")
+
+CORPUS_DIR: str = "data/psychometrika/txt"
+CORPUS_SCORES_FILE: str = "data/corpus_scores.jsonl"
+
+# Per-process state, set up once by `init_worker`
+_worker_state: Dict[str, Any] = {}
+
+
+def corpus_files(directory: str = CORPUS_DIR, limit: Optional[int] = None) -> List[str]:
+    """Lists the .txt files of the corpus directory, in a stable order."""
+    paths = sorted(
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.endswith(".txt")
+    )
+    return paths[:limit] if limit is not None else paths
+
+
+def reference_text(reference: str) -> str:
+    """Resolves a reference name ('values', 'objectivity') or a file path to the reference text."""
+    if reference == "values":
+        return constants.values_text
+    if reference == "objectivity":
+        return constants.objectivity_text
+    return constants.clean_text(constants.read_text_from_file(reference))
+
+
+def init_worker(reference: str, window_prop: WindowProp, top_k: int) -> None:
+    """
+    Prepares a worker process: opens the GloVe and word2vec vectors and the reference profile once.
+
+    The parent process never loads the vectors; each worker does so here, through the model registry.
+    With exported vector tables the workers memory-map the same files and share one page-cache copy.
+    """
+    get_vector_table("glove")
+    get_vector_table("word2vec")
+    _worker_state["profile"] = get_reference_profile(reference_text(reference))
+    _worker_state["window_prop"] = window_prop
+    _worker_state["top_k"] = top_k
+    logger.info(f"Worker {os.getpid()} loaded the vector models.")
+
+
+def summarize_document(file_path: str, document_wrapper: DocumentWrapper, top_k: int) -> Dict[str, Any]:
+    """Reduces a DocumentWrapper to a JSON-serializable record of window score statistics."""
+    record: Dict[str, Any] = {
+        "file": os.path.basename(file_path),
+        "n_windows": len(document_wrapper.bow.window_repr),
+        "scores": {},
+        "top_windows": {},
+    }
+    for rep_type in ["bow", "glove", "word2vec"]:
+        window_repr = getattr(document_wrapper, rep_type).window_repr
+        scores = window_scores(window_repr)
+        scored = scores[~np.isnan(scores)]
+        if not len(scored):
+            record["scores"][rep_type] = None
+            record["top_windows"][rep_type] = []
+            continue
+        record["scores"][rep_type] = {"max": float(scored.max()), "mean": float(scored.mean())}
+        record["top_windows"][rep_type] = [
+            [int(window_repr[i].pos[0]), int(window_repr[i].pos[1]), float(scores[i])]
+            for i in top_window_indices(scores, top_k)
+        ]
+    return record
+
+
+def score_file(file_path: str) -> Dict[str, Any]:
+    """Scores one corpus file against the worker's reference profile."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            text = file.read()
+        document_wrapper = text_to_document_wrapper(
+            text, comparison_text=_worker_state["profile"], window_prop=_worker_state["window_prop"]
+        )
+        return summarize_document(file_path, document_wrapper, _worker_state["top_k"])
+    except Exception as e:
+        logger.error(f"Failed to score {file_path}: {e}")
+        return {"file": os.path.basename(file_path), "error": str(e)}
+
+
+def score_files(
+    file_paths: List[str],
+    reference: str = "values",
+    window_prop: WindowProp = WindowProp(window_size=20, window_shift=10),
+    workers: Optional[int] = None,
+    chunk_size: int = 4,
+    top_k: int = 5,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Scores files in a pool of worker processes, yielding records as they complete (in any order).
+
+    Args:
+        file_paths (List[str]): Text files to score.
+        reference (str): 'values', 'objectivity', or the path of a reference text file.
+        window_prop (WindowProp): Window properties passed to `text_to_document_wrapper`.
+        workers (Optional[int]): Number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int): Number of files sent to a worker at a time.
+        top_k (int): Number of best-scoring windows kept per representation.
+
+    Yields:
+        Dict[str, Any]: One record per file, see `summarize_document`.
+    """
+    with multiprocessing.Pool(
+        processes=workers, initializer=init_worker, initargs=(reference, window_prop, top_k)
+    ) as pool:
+        yield from pool.imap_unordered(score_file, file_paths, chunksize=chunk_size)
+
+
+def score_corpus(
+    input_dir: str = CORPUS_DIR,
+    output_file: str = CORPUS_SCORES_FILE,
+    reference: str = "values",
+    window_prop: WindowProp = WindowProp(window_size=20, window_shift=10),
+    workers: Optional[int] = None,
+    chunk_size: int = 4,
+    top_k: int = 5,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Scores every text file of a corpus directory and streams the records to a JSON-lines file.
+
+    Records are written (and flushed) as workers finish, so partial results survive interruptions.
+
+    Returns:
+        int: Number of files that failed to score.
+    """
+    file_paths = corpus_files(input_dir, limit)
+    failures = 0
+    logger.info(f"Scoring {len(file_paths)} files from {input_dir} with {workers or os.cpu_count()} workers.")
+
+    with open(output_file, "w", encoding="utf-8") as output, Progress() as progress:
+        task = progress.add_task("Scoring documents", total=len(file_paths))
+        for record in score_files(file_paths, reference, window_prop, workers, chunk_size, top_k):
+            if "error" in record:
+                failures += 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            progress.advance(task)
+
+    logger.info(f"Wrote {len(file_paths) - failures} document scores to {output_file} ({failures} failures).")
+    return failures
@@ -1,6 +1,7 @@
 import numpy as np
+from collections.abc import Sequence
 from typing import Callable, NamedTuple, Tuple, Union
-from typing import NamedTuple, List, Optional, Any
+from typing import NamedTuple, Dict, List, Optional, Any
 from spacy.tokens import Doc
 from spacy.tokens import Token
 
@@ -35,21 +36,132 @@ class WindowRepresentation(NamedTuple):
     Contains a numerical representation about a specific window in a document.
 
     Attributes:
-        arr: Numerical representation of the window.
+        arr: Numerical representation of the window (a sparse row for BoW, see `densify`).
         pos: Start and end positions of window onto the document.
     """
 
-    arr: np.ndarray
+    arr: Any
     pos: Optional[Tuple]
     similarity_score: float = None
 
 
+def densify(arr: Any) -> np.ndarray:
+    """Returns a representation as a dense array; BoW representations are kept as sparse rows until then."""
+    if hasattr(arr, "toarray"):
+        return np.asarray(arr.toarray()).ravel()
+    return np.asarray(arr)
+
+
+class WindowTable:
+    """
+    Columnar store of the windows of a document.
+
+    Instead of one WindowRepresentation per window and representation type, the table keeps
+    parallel NumPy arrays of window offsets and of the scores of every representation type.
+    Window arrays are not stored: `array_sources` maps each representation type to a function
+    computing the array of a window on demand (e.g. a slice of the document's token-vector matrix).
+    Sources are module-level functions or `functools.partial`s of them, never lambdas, so that a
+    table (and the DocumentWrapper holding it) can be pickled, e.g. to return it from a worker process.
+
+    `view(rep_type)` gives a read-only sequence of WindowRepresentation, built window by window
+    when accessed, so code indexing `window_repr[i].similarity_score` keeps working.
+
+    Attributes:
+        starts: Start character offset of every window.
+        ends: End character offset of every window.
+        scores: Similarity scores of every window by representation type (NaN for no score).
+        array_sources: Functions computing a window's array from its row, by representation type.
+        rows: The row of every window in `array_sources` (windows may be reordered or subset).
+    """
+
+    __slots__ = ("starts", "ends", "scores", "array_sources", "rows")
+
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        scores: Dict[str, np.ndarray],
+        array_sources: Optional[Dict[str, Callable[[int], Any]]] = None,
+        rows: Optional[np.ndarray] = None,
+    ):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.scores = {rep_type: np.asarray(score, dtype=np.float64) for rep_type, score in scores.items()}
+        self.array_sources = array_sources or {}
+        self.rows = np.arange(len(self.starts)) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def take(self, indices: np.ndarray) -> "WindowTable":
+        """A table of the windows at `indices`, in that order (arrays are still computed lazily)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        return WindowTable(
+            self.starts[indices],
+            self.ends[indices],
+            {rep_type: score[indices] for rep_type, score in self.scores.items()},
+            self.array_sources,
+            self.rows[indices],
+        )
+
+    def array(self, rep_type: str, i: int) -> Any:
+        """The array of window `i` for a representation type, or None if it has no source."""
+        source = self.array_sources.get(rep_type)
+        return source(int(self.rows[i])) if source is not None else None
+
+    def view(self, rep_type: str) -> "WindowView":
+        return WindowView(self, rep_type)
+
+
+class WindowView(Sequence):
+    """A sequence of the WindowRepresentations of one representation type, backed by a WindowTable."""
+
+    __slots__ = ("table", "rep_type")
+
+    def __init__(self, table: WindowTable, rep_type: str):
+        self.table = table
+        self.rep_type = rep_type
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(np.arange(len(self.table))[i])
+        if i < 0:
+            i += len(self.table)
+        if not 0 <= i < len(self.table):
+            raise IndexError("window index out of range")
+        score = self.table.scores[self.rep_type][i]
+        return WindowRepresentation(
+            arr=self.table.array(self.rep_type, i),
+            pos=(int(self.table.starts[i]), int(self.table.ends[i])),
+            similarity_score=None if np.isnan(score) else float(score),
+        )
+
+    @property
+    def scores(self) -> np.ndarray:
+        """The similarity score of every window (NaN for no score)."""
+        return self.table.scores[self.rep_type]
+
+    @property
+    def positions(self) -> np.ndarray:
+        """The (windows x 2) start and end character offsets."""
+        return np.stack([self.table.starts, self.table.ends], axis=1)
+
+    def take(self, indices: np.ndarray) -> "WindowView":
+        return WindowView(self.table.take(indices), self.rep_type)
+
+    def __repr__(self) -> str:
+        return f"WindowView({self.rep_type!r}, {len(self)} windows)"
+
+
 class SimRepresentation(NamedTuple):
     """
     Contains numerical representation and similarity scores for a document.
 
     Attributes:
-        doc_representation: Numerical representation of the entire document.
+        doc_representation: Numerical representation of the entire document (a sparse row for BoW).
         #features: Optional list of features (tokens) in the document.
         #comparison_features: Optional list of features (tokens) used for comparison.
         comparison_array: Numerical array used for comparison.
@@ -57,14 +169,54 @@ class SimRepresentation(NamedTuple):
         name: Optional string descripting the type of the representation used to compare the documents
     """
 
-    doc_representation: np.ndarray
+    doc_representation: Any
     #features: Optional[list] = None
     #comparison_features: Optional[list] = None
     comparison_array: Optional[np.ndarray] = None
-    window_repr: Optional[List[WindowRepresentation]] = None
+    window_repr: Optional[Sequence] = None  # list of WindowRepresentation, or a WindowView
     name: Optional[str] = None
 
 
+class ReferenceProfile(NamedTuple):
+    """
+    Precomputed representations of a comparison (reference) text, reused across target documents.
+
+    Attributes:
+        key: SHA-256 hash of the reference text content, used as its cache key.
+        doc: The parsed reference text.
+        terms: BoW vocabulary terms found in the raw reference text.
+        term_counts: BoW term counts of the parsed reference tokens.
+        glove: GloVe token-vector matrix of the reference text.
+        word2vec: Word2Vec token-vector matrix of the reference text.
+    """
+
+    key: str
+    doc: Doc
+    terms: frozenset
+    term_counts: Dict[str, int]
+    glove: np.ndarray
+    word2vec: np.ndarray
+
+
+class Passage(NamedTuple):
+    """
+    A window of a corpus document found through the passage index.
+
+    Attributes:
+        file: Filename of the document.
+        start_pos: Start character offset of the window.
+        end_pos: End character offset of the window.
+        score: Number of occurrences of the query terms in the window.
+        terms: The query terms the window mentions.
+    """
+
+    file: str
+    start_pos: int
+    end_pos: int
+    score: int
+    terms: List[str]
+
+
 class WindowProp(NamedTuple):
     window_size: Optional[int] = None
     window_overlap: Optional[int] = None
@@ -89,20 +241,54 @@ class DocumentWrapper(NamedTuple):
     window_prop: Optional[WindowProp] = None
 
 
+def window_scores(window_repr: Sequence) -> np.ndarray:
+    """The similarity scores of a sequence of windows as a float array, NaN for windows without a score."""
+    scores = getattr(window_repr, "scores", None)
+    if scores is not None:
+        # columnar windows (WindowView) keep their scores in an array already
+        return np.asarray(scores, dtype=np.float64)
+    return np.array(
+        [np.nan if window.similarity_score is None else window.similarity_score for window in window_repr],
+        dtype=np.float64,
+    )
+
+
+def top_window_indices(scores: np.ndarray, top_k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices of windows in descending order of score; ties keep their document order.
+
+    Windows without a score (None or NaN) come after all scored windows, or are left out when
+    `top_k` is given. With `top_k`, only the k best are selected (with `np.argpartition`) and sorted.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    scored = np.flatnonzero(~np.isnan(scores))
+    if top_k is None:
+        order = scored[np.argsort(-scores[scored], kind="stable")]
+        return np.concatenate([order, np.flatnonzero(np.isnan(scores))])
+    top_k = min(top_k, len(scored))
+    if top_k <= 0:
+        return np.array([], dtype=np.int64)
+    if top_k < len(scored):
+        scored = scored[np.argpartition(-scores[scored], top_k - 1)[:top_k]]
+    return scored[np.lexsort((scored, -scores[scored]))]
+
+
 def sorted_windows_scores(
-    document_wrapper: DocumentWrapper, representation_type: Optional[str] = None
+    document_wrapper: DocumentWrapper, representation_type: Optional[str] = None, top_k: Optional[int] = None
 ) -> DocumentWrapper:
     """Sorts windows in decending order based on their similarity scores.
         document_wrapper: DocumentWrapper instance
         representation_type: Optional[str]: if None (default), all representations are sorted.
             If 'bow', 'word2vec', or 'glove', only the specified representation is sorted.
+        top_k: Optional[int]: if given, only the top_k best-scoring windows are kept (windows
+            without a score are dropped); otherwise all windows are kept, unscored ones last.
     """
     def sort_windows(sim_rep: SimRepresentation) -> SimRepresentation:
-        sorted_window_repr = sorted(
-            sim_rep.window_repr, key=lambda x: x.similarity_score, reverse=True
-        )
-        return sim_rep._replace(window_repr=sorted_window_repr)
-
+        window_repr = sim_rep.window_repr
+        order = top_window_indices(window_scores(window_repr), top_k)
+        if hasattr(window_repr, "take"):
+            return sim_rep._replace(window_repr=window_repr.take(order))
+        return sim_rep._replace(window_repr=[window_repr[i] for i in order])
     if representation_type:
         if representation_type not in ["bow", "word2vec", "glove"]:
             raise ValueError(
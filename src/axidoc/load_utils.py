@@ -1,5 +1,4 @@
 import subprocess
-import gensim.downloader as api
 import logging
 from typing import List, Optional
 import spacy
@@ -15,6 +14,8 @@ logger.info("Logging from src/axidoc/load_utils.py module.")
 
 
 def download_gensim_model(model_name):
+    import gensim.downloader as api  # imported here, as importing gensim is slow
+
     # Download the model using Gensim
     model = api.load(model_name)
     # Save the model to a text file
@@ -0,0 +1,102 @@
+import os
+import threading
+import spacy
+from typing import Dict
+from dotenv import load_dotenv
+
+from src.logconf import get_logger
+from src.axidoc.vector_store import VectorTable, open_vector_table, load_tokenizer
+
+# logging
+logger = get_logger(__name__)
+logger.info("Logging from src/axidoc/models.py module.")
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Environment variables holding the paths of the SpaCy vector models (from .env file)
+MODEL_ENV_VARS: Dict[str, str] = {
+    "glove": "MODEL_GLOVE_PRUNED_500K",
+    "word2vec": "MODEL_W2V_PRUNED_500K",
+}
+
+# Environment variables holding the directories of exported, memory-mapped vector tables (optional)
+VECTOR_TABLE_ENV_VARS: Dict[str, str] = {
+    "glove": "VECTOR_TABLE_GLOVE",
+    "word2vec": "VECTOR_TABLE_W2V",
+}
+
+# Models and vector tables loaded so far, shared by every module of the process
+_models: Dict[str, spacy.language.Language] = {}
+_vector_tables: Dict[str, VectorTable] = {}
+_tokenizer: Dict[str, spacy.language.Language] = {}
+_models_lock = threading.Lock()
+
+
+def model_path(name: str) -> str:
+    """Returns the path of a registered model, as configured in the environment."""
+    if name not in MODEL_ENV_VARS:
+        raise ValueError(f"Unknown model '{name}'. Choose from {', '.join(MODEL_ENV_VARS)}.")
+    path = os.getenv(MODEL_ENV_VARS[name])
+    if not path:
+        raise ValueError(f"Environment variable {MODEL_ENV_VARS[name]} is not set (see the .env file).")
+    return path
+
+
+def get_model(name: str) -> spacy.language.Language:
+    """
+    Returns a registered SpaCy model ('glove' or 'word2vec'), loading it on first use.
+
+    Models are loaded at most once per process and shared across modules, so importing a module
+    does not load any vectors; only the first call that needs them does.
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _models_lock:
+        if name not in _models:
+            _models[name] = spacy.load(model_path(name))
+            logger.info(f"Loaded {name} model.")
+        return _models[name]
+
+
+def get_vector_table(name: str) -> VectorTable:
+    """
+    Returns the vector table of a registered model ('glove' or 'word2vec'), opening it on first use.
+
+    If the table was exported (see `vector_store.export_vector_table`) and its directory is set in
+    `VECTOR_TABLE_ENV_VARS`, it is memory-mapped and the SpaCy model is never loaded; otherwise the
+    vectors of the loaded SpaCy model are used.
+    """
+    table = _vector_tables.get(name)
+    if table is not None:
+        return table
+    table_dir = os.getenv(VECTOR_TABLE_ENV_VARS[name], "") if name in VECTOR_TABLE_ENV_VARS else ""
+    if table_dir:
+        table = open_vector_table(table_dir)
+        logger.info(f"Memory-mapped {name} vector table from {table_dir}.")
+    else:
+        table = VectorTable.from_spacy(get_model(name))
+    with _models_lock:
+        return _vector_tables.setdefault(name, table)
+
+
+def get_tokenizer() -> spacy.language.Language:
+    """
+    Returns the pipeline used to tokenize texts (the GloVe model's tokenizer).
+
+    With an exported GloVe vector table this is a blank pipeline with the saved tokenizer, so
+    tokenizing does not load any vectors.
+    """
+    tokenizer = _tokenizer.get("glove")
+    if tokenizer is not None:
+        return tokenizer
+    table_dir = os.getenv(VECTOR_TABLE_ENV_VARS["glove"], "")
+    tokenizer = load_tokenizer(table_dir) if table_dir else get_model("glove")
+    with _models_lock:
+        return _tokenizer.setdefault("glove", tokenizer)
+
+
+def loaded_models() -> Dict[str, spacy.language.Language]:
+    """Returns the models loaded so far, keyed by name."""
+    return dict(_models)
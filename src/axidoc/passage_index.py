@@ -0,0 +1,232 @@
+"""
+Corpus-wide inverted index of value-term passages.
+
+For every value term (the tokens of data/values.txt and data/objectivity.txt) the index keeps a
+posting list of the fixed-size windows that mention it: (document, window start/end character
+offsets, occurrences). Finding the best windows for a set of terms across the corpus is then a
+merge of their posting lists, instead of rescoring every document with `text_to_document_wrapper`.
+
+Postings are stored term by term in flat .npy arrays (CSR-style: `term_offsets[t]:term_offsets[t + 1]`
+are the postings of term `t`), opened memory-mapped.
+"""
+
+import os
+import json
+import numpy as np
+import spacy
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from spacy.tokens import Doc
+
+from src.logconf import get_logger
+from src.axidoc.corpus_scoring import CORPUS_DIR, corpus_files, reference_text
+from src.axidoc.doctypes import Passage, WindowProp
+from src.axidoc.load_utils import tokenize_string
+from src.axidoc.models import get_tokenizer, get_vector_table
+from src.axidoc.repr import fixed_window_bounds
+from src.axidoc.similarity import cosine_scores
+
+# logging
+logger = get_logger(__name__)
+logger.info("Logging from src/axidoc/passage_index.py module.")
+
+PASSAGE_INDEX_DIR: str = "data/passage_index"
+PASSAGE_INDEX_META_FILE: str = "meta.json"
+POSTING_ARRAYS: Tuple[str, ...] = ("term_offsets", "doc_ids", "window_starts", "window_ends", "counts")
+
+
+def value_terms(references: Sequence[str] = ("values", "objectivity")) -> List[str]:
+    """The sorted, distinct tokens of the reference texts ('values', 'objectivity' or file paths)."""
+    tokenizer = get_tokenizer()
+    return sorted({token for reference in references for token in tokenize_string(tokenizer, reference_text(reference))})
+
+
+def document_postings(
+    doc: Doc, term_ids: Dict[str, int], window_prop: WindowProp
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds the windows of a document that mention the indexed terms.
+
+    Windows are the fixed-size token windows of `segment` / `fixed_window_bounds`; an occurrence at
+    token `p` belongs to every window with `start <= p < end`.
+
+    Returns:
+        Tuple of arrays, one entry per (term, window) pair: term ids, window start and end character
+        offsets, and the number of occurrences of the term in the window.
+    """
+    empty = np.array([], dtype=np.int64)
+    positions, terms = [], []
+    for token in doc:
+        term_id = term_ids.get(token.lower_)
+        if term_id is not None:
+            positions.append(token.i)
+            terms.append(term_id)
+    if not positions:
+        return empty, empty, empty, empty
+    positions, terms = np.array(positions, dtype=np.int64), np.array(terms, dtype=np.int64)
+
+    starts, ends = fixed_window_bounds(len(doc), window_prop)
+    # windows containing each occurrence: the first whose end is after it, up to the last starting before it
+    first = np.searchsorted(ends, positions, side="right")
+    last = np.searchsorted(starts, positions, side="right") - 1
+    n_windows = np.maximum(last - first + 1, 0)
+    occurrence = np.repeat(np.arange(len(positions)), n_windows)
+    windows = np.repeat(first, n_windows) + (np.arange(n_windows.sum()) - np.repeat(np.cumsum(n_windows) - n_windows, n_windows))
+
+    pairs, counts = np.unique(np.stack([terms[occurrence], windows], axis=1), axis=0, return_counts=True)
+    token_starts = np.fromiter((token.idx for token in doc), dtype=np.int64, count=len(doc))
+    token_ends = token_starts + np.fromiter((len(token) for token in doc), dtype=np.int64, count=len(doc))
+    window_ids = pairs[:, 1]
+    return pairs[:, 0], token_starts[starts[window_ids]], token_ends[ends[window_ids] - 1], counts
+
+
+class PassageIndex:
+    """
+    Posting lists of value-term windows across a corpus.
+
+    Attributes:
+        terms: The indexed terms; term `t` is `terms[t]`.
+        documents: Filenames of the indexed documents; document `d` is `documents[d]`.
+        window_prop: Size and shift of the indexed windows.
+        term_offsets, doc_ids, window_starts, window_ends, counts: The postings, grouped by term.
+    """
+
+    def __init__(self, terms: Sequence[str], documents: Sequence[str], window_prop: WindowProp, **postings: np.ndarray):
+        self.terms = list(terms)
+        self.documents = list(documents)
+        self.window_prop = window_prop
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        for name in POSTING_ARRAYS:
+            setattr(self, name, postings[name])
+
+    @classmethod
+    def build(
+        cls,
+        file_paths: Iterable[str],
+        terms: Sequence[str],
+        window_prop: WindowProp = WindowProp(window_size=20, window_shift=10),
+        nlp: Optional[spacy.language.Language] = None,
+        batch_size: int = 16,
+    ) -> "PassageIndex":
+        """Tokenizes the files (tokenizer only, in batches) and collects the postings of `terms`."""
+        nlp = nlp or get_tokenizer()
+        terms = sorted(set(terms))
+        term_ids = {term: i for i, term in enumerate(terms)}
+        file_paths = list(file_paths)
+        columns: List[List[np.ndarray]] = [[] for _ in range(5)]
+
+        def read(file_path: str) -> str:
+            with open(file_path, "r", encoding="utf-8") as file:
+                return file.read()
+
+        with nlp.select_pipes(disable=nlp.pipe_names):
+            docs = nlp.pipe((read(file_path) for file_path in file_paths), batch_size=batch_size)
+            for doc_id, doc in enumerate(docs):
+                doc_terms, window_starts, window_ends, counts = document_postings(doc, term_ids, window_prop)
+                for column, values in zip(columns, (doc_terms, np.full(len(doc_terms), doc_id), window_starts, window_ends, counts)):
+                    column.append(values)
+
+        term_column, doc_ids, window_starts, window_ends, counts = (
+            np.concatenate(column) if column else np.array([], dtype=np.int64) for column in columns
+        )
+        # group the postings by term, keeping (document, window) order within a term
+        order = np.lexsort((window_starts, doc_ids, term_column))
+        term_offsets = np.concatenate(([0], np.cumsum(np.bincount(term_column, minlength=len(terms)))))
+        logger.info(f"Indexed {len(order)} postings of {len(terms)} terms in {len(file_paths)} documents.")
+        return cls(
+            terms,
+            [os.path.basename(file_path) for file_path in file_paths],
+            window_prop,
+            term_offsets=term_offsets,
+            doc_ids=doc_ids[order].astype(np.int32),
+            window_starts=window_starts[order],
+            window_ends=window_ends[order],
+            counts=counts[order].astype(np.int32),
+        )
+
+    def save(self, index_dir: Union[str, Path] = PASSAGE_INDEX_DIR) -> None:
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        for name in POSTING_ARRAYS:
+            np.save(index_dir / f"{name}.npy", getattr(self, name))
+        meta = {"terms": self.terms, "documents": self.documents, "window_prop": self.window_prop._asdict()}
+        with open(index_dir / PASSAGE_INDEX_META_FILE, "w") as file:
+            json.dump(meta, file)
+
+    @classmethod
+    def load(cls, index_dir: Union[str, Path] = PASSAGE_INDEX_DIR) -> "PassageIndex":
+        index_dir = Path(index_dir)
+        with open(index_dir / PASSAGE_INDEX_META_FILE, "r") as file:
+            meta = json.load(file)
+        postings = {name: np.load(index_dir / f"{name}.npy", mmap_mode="r") for name in POSTING_ARRAYS}
+        return cls(meta["terms"], meta["documents"], WindowProp(**meta["window_prop"]), **postings)
+
+    def postings(self, term: str) -> slice:
+        """The range of a term's postings (empty for terms that are not indexed)."""
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return slice(0, 0)
+        return slice(int(self.term_offsets[term_id]), int(self.term_offsets[term_id + 1]))
+
+    def query(self, terms: Iterable[str], k: int = 100) -> List[Passage]:
+        """
+        The k windows with the most occurrences of the given terms, across the corpus.
+
+        The terms' posting lists are merged on (document, window); a window's score is the total
+        number of occurrences of the terms in it (ties go to the window mentioning more distinct terms).
+        """
+        terms = [term for term in dict.fromkeys(terms) if term in self.term_ids]
+        ranges = [self.postings(term) for term in terms]
+        if not terms or not any(r.stop > r.start for r in ranges):
+            return []
+        doc_ids = np.concatenate([self.doc_ids[r] for r in ranges]).astype(np.int64)
+        window_starts = np.concatenate([self.window_starts[r] for r in ranges])
+        window_ends = np.concatenate([self.window_ends[r] for r in ranges])
+        counts = np.concatenate([self.counts[r] for r in ranges])
+        query_terms = np.repeat(np.arange(len(terms)), [r.stop - r.start for r in ranges])
+
+        keys = (doc_ids << 32) | window_starts
+        windows, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        scores = np.bincount(inverse, weights=counts).astype(np.int64)
+        # distinct (window, term) pairs, sorted by window
+        window_terms = np.unique(inverse.astype(np.int64) * len(terms) + query_terms)
+        pair_windows, pair_terms = window_terms // len(terms), window_terms % len(terms)
+        n_terms = np.bincount(pair_windows, minlength=len(windows))
+
+        k = min(k, len(windows))
+        candidates = np.argpartition(-scores, k - 1)[:k] if k < len(windows) else np.arange(len(windows))
+        best = candidates[np.lexsort((candidates, -n_terms[candidates], -scores[candidates]))]
+
+        passages = []
+        for window in best:
+            pairs = slice(np.searchsorted(pair_windows, window), np.searchsorted(pair_windows, window, side="right"))
+            mentioned = sorted(terms[t] for t in pair_terms[pairs])
+            posting = first[window]
+            passages.append(Passage(
+                file=self.documents[doc_ids[posting]],
+                start_pos=int(window_starts[posting]),
+                end_pos=int(window_ends[posting]),
+                score=int(scores[window]),
+                terms=mentioned,
+            ))
+        return passages
+
+    def similar_terms(self, term: str, n: int = 10, model: str = "glove") -> List[str]:
+        """The n indexed terms closest to `term` in the model's vector space (for "fairness-like" queries)."""
+        vectors = get_vector_table(model)
+        term_matrix = vectors.lookup([spacy.strings.hash_string(t) for t in self.terms])
+        scores = cosine_scores(term_matrix, vectors.get_vector(term))
+        return [self.terms[i] for i in np.argsort(-scores, kind="stable")[:n] if scores[i] > 0]
+
+
+def build_passage_index(
+    input_dir: str = CORPUS_DIR,
+    index_dir: str = PASSAGE_INDEX_DIR,
+    references: Sequence[str] = ("values", "objectivity"),
+    window_prop: WindowProp = WindowProp(window_size=20, window_shift=10),
+    limit: Optional[int] = None,
+) -> PassageIndex:
+    """Builds the passage index of a corpus directory for the value terms and saves it."""
+    index = PassageIndex.build(corpus_files(input_dir, limit), value_terms(references), window_prop)
+    index.save(index_dir)
+    return index
@@ -0,0 +1,89 @@
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from scipy.stats import spearmanr
+from spacy.tokens import Doc
+
+from src.logconf import get_logger
+from src.axidoc import constants
+from src.axidoc.doctypes import WindowProp
+from src.axidoc.models import get_vector_table
+from src.axidoc.repr import (
+    parse_text, token_vector_matrix, fixed_window_bounds, prefix_sum_window_means, cosine_scores
+)
+from src.axidoc.vector_store import VectorTable, quantize_table
+
+# logging
+logger = get_logger(__name__)
+logger.info("Logging from src/axidoc/quantization.py module.")
+
+TEST_TEXT_FILES: List[str] = [
+    "tests/test_data/text_with_values.txt",
+    "tests/test_data/text_wo_values.txt",
+]
+
+
+def table_window_scores(doc: Doc, reference_doc: Doc, table: VectorTable, window_prop: WindowProp) -> np.ndarray:
+    """Scores the fixed-size windows of `doc` against the mean vector of `reference_doc`, using `table`."""
+    starts, ends = fixed_window_bounds(len(doc), window_prop)
+    window_means = prefix_sum_window_means(token_vector_matrix(doc, table), starts, ends)
+    reference_vector = token_vector_matrix(reference_doc, table).mean(axis=0)
+    return cosine_scores(window_means, reference_vector)
+
+
+def quantization_report(
+    text_files: Sequence[str] = tuple(TEST_TEXT_FILES),
+    reference_text: Optional[str] = None,
+    dtypes: Sequence[str] = ("float16", "int8"),
+    window_prop: WindowProp = WindowProp(window_size=20, window_shift=10),
+) -> List[Dict[str, Any]]:
+    """
+    Compares window similarity scores computed with quantized vectors against float32 vectors.
+
+    For each vector model, text file and storage type, reports the largest and mean absolute score
+    difference, the Spearman rank correlation of the window scores, whether the best window is the
+    same, the vector memory relative to float32, and the lookup-and-score time.
+
+    Args:
+        text_files (Sequence[str]): Texts whose windows are scored. Defaults to the test texts.
+        reference_text (Optional[str]): Text the windows are compared with. Defaults to `values_text`.
+        dtypes (Sequence[str]): Storage types to compare with float32 ('float16', 'int8').
+        window_prop (WindowProp): Fixed window size and shift.
+
+    Returns:
+        List[Dict[str, Any]]: One row per (model, file, dtype).
+    """
+    reference_doc = parse_text(reference_text if reference_text is not None else constants.values_text)
+    docs = {}
+    for file_path in text_files:
+        with open(file_path, "r", encoding="utf-8") as file:
+            docs[file_path] = parse_text(file.read())
+
+    report = []
+    for name in ["glove", "word2vec"]:
+        source_table = get_vector_table(name)
+        if source_table.meta.get("dtype", "float32") != "float32":
+            logger.warning(f"The {name} table is stored as {source_table.meta['dtype']}; the float32 baseline "
+                           f"holds its dequantized vectors, so the errors are relative to those.")
+        baseline_table = quantize_table(source_table, "float32")
+        tables = {dtype: quantize_table(baseline_table, dtype) for dtype in dtypes}
+        for file_path, doc in docs.items():
+            baseline_scores = table_window_scores(doc, reference_doc, baseline_table, window_prop)
+            for dtype, table in tables.items():
+                start_time = time.perf_counter()
+                scores = table_window_scores(doc, reference_doc, table, window_prop)
+                seconds = time.perf_counter() - start_time
+                differences = np.abs(scores - baseline_scores)
+                report.append({
+                    "model": name,
+                    "file": file_path,
+                    "dtype": dtype,
+                    "windows": len(scores),
+                    "max_abs_diff": float(differences.max()) if len(scores) else 0.0,
+                    "mean_abs_diff": float(differences.mean()) if len(scores) else 0.0,
+                    "spearman": float(spearmanr(scores, baseline_scores)[0]) if len(scores) > 1 else 1.0,
+                    "same_top_window": bool(len(scores) == 0 or scores.argmax() == baseline_scores.argmax()),
+                    "memory_ratio": table.nbytes / baseline_table.nbytes,
+                    "seconds": seconds,
+                })
+    return report
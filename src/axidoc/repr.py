@@ -1,87 +1,114 @@
-import os
+import hashlib
 import spacy
 from spacy.tokens import Doc
-import gensim.downloader as api
 import numpy as np
-from typing import List, Optional, Tuple, Union
+from collections import Counter, OrderedDict
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from scipy import sparse
 from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from dotenv import load_dotenv
 
 
 from src.logconf import get_logger
 from src.axidoc.doctypes import (
     DocumentWrapper, SimRepresentation, WindowProp, ArrRepresentations,
-    SimilarityScores, Window, WindowRepresentation
+    SimilarityScores, Window, ReferenceProfile, WindowTable, WindowView
 )
-from src.axidoc.load_utils import tokenize_string
-from src.axidoc.constants import values_text, objectivity_text
+from src.axidoc.models import get_model, get_tokenizer, get_vector_table
+from src.axidoc.similarity import cosine, cosine_scores, vector_norm
+from src.axidoc.vector_store import VectorTable
+from src.axidoc.vocabulary import CorpusVocabulary, default_corpus_vocabulary
 
 
-# Load environment variables from .env file
-load_dotenv()
-glove_model = os.getenv("MODEL_GLOVE_PRUNED_500K")  # from .env file
-w2v_model = os.getenv("MODEL_W2V_PRUNED_500K")  # from .env file
-
 # logging
 logger = get_logger(__name__)
 logger.info("Logging from src/axidoc/repr.py module.")
 
-# Load SpaCy model (including pretrained GloVe vectors)
-nlp_glove = spacy.load(glove_model)
-logger.info("Loaded glove model.")
-nlp_w2v = spacy.load(w2v_model)
-logger.info("Loaded word2vec model.")
+# Reference profiles of comparison texts, keyed by content hash (least recently used first)
+REFERENCE_PROFILE_CACHE_SIZE: int = 32
+_reference_profiles: "OrderedDict[str, ReferenceProfile]" = OrderedDict()
+
+# Analyzer of a default CountVectorizer, used to find BoW terms without fitting a vectorizer
+bow_analyzer = CountVectorizer().build_analyzer()
+
+
+def __getattr__(name: str):
+    # The SpaCy models used to be module attributes; they are now loaded lazily by the model registry
+    if name == "nlp_glove":
+        return get_model("glove")
+    if name == "nlp_w2v":
+        return get_model("word2vec")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def compute_bow_representation(
-    doc: spacy.tokens.Doc, vectorizer: Optional[CountVectorizer] = None
-) -> Tuple[np.ndarray, CountVectorizer]:
+    doc: spacy.tokens.Doc, vectorizer: Optional[CountVectorizer] = None, dense: bool = False
+) -> Tuple[Union[sparse.csr_matrix, np.ndarray], CountVectorizer]:
+    """
+    Counts the vectorizer's terms in a doc.
+
+    The BoW vector is returned as a sparse (1 x vocabulary) row, since a corpus vocabulary has tens
+    of thousands of terms and a text only a few of them; pass `dense=True` for a flat dense array.
+    """
     text = " ".join([token.text for token in doc])
     if vectorizer is None:
-        vectorizer = CountVectorizer()
-        vectorizer.fit([text])
-    bow_matrix = vectorizer.transform([text])
-    return np.array(bow_matrix.toarray()).flatten(), vectorizer
+        corpus_vocabulary = default_corpus_vocabulary()
+        if corpus_vocabulary is not None:
+            vectorizer = corpus_vocabulary.vectorizer
+        else:
+            vectorizer = CountVectorizer()
+            vectorizer.fit([text])
+    bow_matrix = vectorizer.transform([text]).tocsr()
+    if dense:
+        return np.array(bow_matrix.toarray()).flatten(), vectorizer
+    return bow_matrix, vectorizer
+
+
+def parse_text(text: str, window_prop: Optional[WindowProp] = None) -> Doc:
+    """
+    Parses text once into the Doc that all representations and the segmentation share.
+
+    Only the tokenizer is run, unless sentence windows are requested (sentence boundaries need
+    the full pipeline). Vectors are looked up per token from both vector tables, so the text
+    does not need to be parsed again with the word2vec model.
+    """
+    if window_prop is not None and window_prop.window_type == 'sentence':
+        return get_model("glove")(text)
+    return get_tokenizer().make_doc(text)
+
+
+def token_vector_matrix(doc: Union[Doc, spacy.tokens.Span], vectors: VectorTable) -> np.ndarray:
+    """
+    Looks up the vectors of a doc's tokens in a vector table by token ID (orth hash).
+
+    Token IDs are hashes of the token strings, so they are the same in every vocab and a doc
+    parsed with one model can be looked up in another model's vectors. Tokens without a vector
+    get a zero vector, as `token.vector` does.
+    """
+    return vectors.lookup(np.fromiter((token.orth for token in doc), dtype=np.uint64, count=len(doc)))
 
 
 def compute_glove_representation(doc: spacy.tokens.Doc) -> np.ndarray:
-    return np.array([token.vector for token in doc])
+    return token_vector_matrix(doc, get_vector_table("glove"))
 
 
 def compute_word2vec_representation(doc: spacy.tokens.Doc) -> np.ndarray:
-    return np.array([token.vector for token in doc])
+    return token_vector_matrix(doc, get_vector_table("word2vec"))
 
 
-def compute_similarity(rep1: np.ndarray, rep2: np.ndarray) -> float:
-    try:
-        # Ensure the inputs are numpy arrays
-        assert isinstance(rep1, np.ndarray) and isinstance(rep2, np.ndarray), "Inputs must be numpy arrays"
-        
-        # Compute and return the cosine similarity
-        similarity_score = cosine_similarity([rep1], [rep2])[0][0]
-        return similarity_score
-    
-    except AssertionError as e:
-        logger.error(f"Assertion error: {e}")
-        raise
-    
-    except Exception as e:
-        logger.error(f"An error occurred while computing similarity: {e}")
-        raise
+def compute_similarity(
+    rep1: Union[np.ndarray, sparse.spmatrix], rep2: Union[np.ndarray, sparse.spmatrix]
+) -> float:
+    """Cosine similarity of two representations (dense vectors or sparse BoW rows); 0 if either has no direction."""
+    return cosine(rep1, rep2)
 
 def representation_func(text_or_doc: Union[str, spacy.tokens.Doc], vectorizer: CountVectorizer) -> ArrRepresentations:
     """Vectorizes text according to three different text representation types (BoW, GloVe, Word2Vec)."""
-    if isinstance(text_or_doc, str):
-        doc_glove = nlp_glove(text_or_doc)
-        doc_w2v = nlp_w2v(text_or_doc)
-    else:
-        doc_glove = text_or_doc
-        doc_w2v = text_or_doc
-    
-    bow_representation, _ = compute_bow_representation(doc_glove, vectorizer)
-    glove_representation = compute_glove_representation(doc_glove)
-    word2vec_representation = compute_word2vec_representation(doc_w2v)
+    doc = parse_text(text_or_doc) if isinstance(text_or_doc, str) else text_or_doc
+
+    bow_representation, _ = compute_bow_representation(doc, vectorizer)
+    glove_representation = compute_glove_representation(doc)
+    word2vec_representation = compute_word2vec_representation(doc)
     
     return bow_representation, glove_representation, word2vec_representation
 
@@ -149,30 +176,404 @@ def segment(doc: Doc, window_prop: WindowProp) -> List[Window]:
     logger.info(f"Successfully segmented document into {len(windows)} windows.")
     return windows
 
-def compute_window_representation(
-    window: Window, vectorizer: CountVectorizer, comparison_representations: ArrRepresentations
-) -> WindowRepresentation:
-    window_target_reprs = representation_func(window.content, vectorizer)
-    window_similarity_scores = similarity_func(window_target_reprs, comparison_representations)
-    return WindowRepresentation(
-        arr=window_target_reprs[0],  # Assuming BoW representation here
-        pos=(window.start_pos, window.end_pos),
-        similarity_score=window_similarity_scores[0]  # Assuming BoW similarity score here
+def sparse_row_values(vector: Union[np.ndarray, sparse.spmatrix], ids: np.ndarray) -> np.ndarray:
+    """Reads the entries `ids` of a dense vector or a sparse (1 x n) row, without densifying the row."""
+    if not sparse.issparse(vector):
+        return np.asarray(vector, dtype=np.float64).ravel()[ids]
+    row = sparse.csr_matrix(vector)
+    row.sum_duplicates()  # also sorts the indices
+    if not len(row.indices):
+        return np.zeros(len(ids))
+    positions = np.minimum(np.searchsorted(row.indices, ids), len(row.indices) - 1)
+    return np.where(row.indices[positions] == ids, row.data[positions], 0).astype(np.float64)
+
+
+def window_token_bounds(window: Window) -> Tuple[int, int]:
+    """Returns the (start, end) token indices of a window's content in its parent document."""
+    content = window.content
+    if isinstance(content, Doc):
+        return 0, len(content)
+    return content.start, content.end
+
+
+def window_mean_matrix(token_matrix: np.ndarray, bounds: List[Tuple[int, int]]) -> np.ndarray:
+    """Stacks the mean token vector of every window into a (windows x dimensions) matrix.
+
+    Empty windows get a zero vector (and hence a similarity score of 0).
+    """
+    means = np.zeros((len(bounds), token_matrix.shape[1]), dtype=np.float64)
+    for i, (start, end) in enumerate(bounds):
+        if end > start:
+            means[i] = token_matrix[start:end].mean(axis=0)
+    return means
+
+
+def batch_window_representations(
+    doc: Doc,
+    windows: List[Window],
+    vectorizer: CountVectorizer,
+    comparison_representations: ArrRepresentations
+) -> Dict[str, WindowView]:
+    """
+    Computes representations and similarity scores for all windows of a document at once.
+
+    Instead of vectorizing and scoring window by window, this builds one (windows x tokens) BoW
+    matrix and one (windows x dimensions) mean-embedding matrix per representation type, and scores
+    all windows against the comparison vector with a single matrix-vector product.
+
+    Args:
+        doc (Doc): The document the windows were segmented from.
+        windows (List[Window]): Windows whose contents are spans of `doc`.
+        vectorizer (CountVectorizer): Fitted vectorizer used for the BoW representation.
+        comparison_representations (ArrRepresentations): BoW, GloVe and Word2Vec representations
+            of the comparison text.
+
+    Returns:
+        Dict[str, WindowView]: Window representations keyed by representation type ('bow', 'glove',
+            'word2vec'), in the same order as `windows`, backed by one WindowTable.
+    """
+    char_starts = np.array([window.start_pos for window in windows], dtype=np.int64)
+    char_ends = np.array([window.end_pos for window in windows], dtype=np.int64)
+    bounds = [window_token_bounds(window) for window in windows]
+
+    # One vectorizer call for all windows; rows are the windows' BoW vectors
+    window_texts = [" ".join(token.text for token in window.content) for window in windows]
+    bow_matrix = vectorizer.transform(window_texts)
+
+    # Token vectors are built once for the whole document; windows are views onto them
+    token_matrices = {
+        "glove": compute_glove_representation(doc),
+        "word2vec": compute_word2vec_representation(doc),
+    }
+
+    window_matrices = {
+        "bow": bow_matrix,
+        "glove": window_mean_matrix(token_matrices["glove"], bounds),
+        "word2vec": window_mean_matrix(token_matrices["word2vec"], bounds),
+    }
+
+    window_scores = score_window_matrices(window_matrices, comparison_representations)
+    array_sources = {
+        "bow": partial(matrix_row, bow_matrix),
+        **token_slice_sources(
+            token_matrices,
+            np.array([start for start, _ in bounds], dtype=np.int64),
+            np.array([end for _, end in bounds], dtype=np.int64),
+        ),
+    }
+    return assemble_window_table(char_starts, char_ends, array_sources, window_scores)
+
+
+def score_window_matrices(
+    window_matrices: Dict[str, Union[np.ndarray, sparse.spmatrix]],
+    comparison_representations: ArrRepresentations
+) -> Dict[str, List[Optional[float]]]:
+    """Scores the rows of each representation's window matrix against the comparison vector."""
+    window_scores = {}
+    for i, rep_type in enumerate(["bow", "glove", "word2vec"]):
+        comparison_vector = comparison_window_vector(comparison_representations, i)
+        if comparison_vector is None:
+            window_scores[rep_type] = [None] * window_matrices[rep_type].shape[0]
+        else:
+            window_scores[rep_type] = cosine_scores(window_matrices[rep_type], comparison_vector).tolist()
+    return window_scores
+
+
+def comparison_window_vector(comparison_representations: ArrRepresentations, i: int) -> Optional[np.ndarray]:
+    """Returns the vector windows are compared with: the BoW vector, or the mean of the token vectors."""
+    rep_type = ["bow", "glove", "word2vec"][i]
+    comparison_array = comparison_representations[i]
+    if comparison_array is None:
+        logger.warning(f"Comparison {rep_type} representation is None, similarity cannot be computed.")
+        return None
+    return comparison_array if rep_type == "bow" else comparison_array.mean(axis=0)
+
+
+def matrix_row(matrix: sparse.csr_matrix, row: int) -> sparse.csr_matrix:
+    """Window array source reading a window's row of a (windows x features) matrix."""
+    return matrix[row]
+
+
+def token_matrix_slice(token_matrix: np.ndarray, starts: np.ndarray, ends: np.ndarray, row: int) -> np.ndarray:
+    """Window array source returning the rows of a token-vector matrix that a window covers (a view)."""
+    return token_matrix[starts[row]:ends[row]]
+
+
+def token_slice_sources(
+    token_matrices: Dict[str, np.ndarray], starts: np.ndarray, ends: np.ndarray
+) -> Dict[str, Callable[[int], np.ndarray]]:
+    """Window array sources returning the rows of each token-vector matrix that a window covers (views)."""
+    return {
+        rep_type: partial(token_matrix_slice, token_matrix, starts, ends)
+        for rep_type, token_matrix in token_matrices.items()
+    }
+
+
+def assemble_window_table(
+    char_starts: np.ndarray,
+    char_ends: np.ndarray,
+    array_sources: Dict[str, Callable[[int], np.ndarray]],
+    window_scores: Dict[str, List[Optional[float]]]
+) -> Dict[str, WindowView]:
+    """Stores window offsets and scores in one WindowTable and returns its per-representation views."""
+    table = WindowTable(
+        char_starts,
+        char_ends,
+        {rep_type: np.array(scores, dtype=np.float64) for rep_type, scores in window_scores.items()},
+        array_sources,
     )
+    return {rep_type: table.view(rep_type) for rep_type in ["bow", "glove", "word2vec"]}
+
+
+def fixed_window_bounds(n_tokens: int, window_prop: WindowProp) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the start and end token indices of the fixed-size windows that `segment` would create."""
+    window_size = window_prop.window_size or n_tokens
+    window_shift = window_prop.window_shift or window_size
+    starts = np.arange(0, n_tokens, window_shift, dtype=np.int64)
+    ends = np.minimum(starts + window_size, n_tokens)
+    return starts, ends
+
+
+def prefix_sum_window_means(token_matrix: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Computes the mean token vector of every [start, end) window from cumulative sums.
+
+    The cumulative sum of the token matrix is taken once, so each window mean costs O(1) regardless
+    of the window size and overlap. Empty windows get a zero vector.
+    """
+    cumulative = np.zeros((token_matrix.shape[0] + 1, token_matrix.shape[1]), dtype=np.float64)
+    np.cumsum(token_matrix, axis=0, out=cumulative[1:])
+    sums = cumulative[ends] - cumulative[starts]
+    lengths = (ends - starts)[:, np.newaxis]
+    means = np.zeros_like(sums)
+    np.divide(sums, lengths, out=means, where=lengths > 0)
+    return means
+
+
+def token_feature_ids(doc: Doc, vectorizer: CountVectorizer) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maps every token of `doc` to the vectorizer features it contributes to.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: CSR-style `(offsets, feature_ids)`, where the features of token
+            `i` are `feature_ids[offsets[i]:offsets[i + 1]]`. Analysing tokens one by one gives the same
+            features as analysing the space-joined window text, as `compute_bow_representation` does.
+    """
+    analyzer = vectorizer.build_analyzer()
+    vocabulary = vectorizer.vocabulary_
+    offsets = [0]
+    feature_ids = []
+    for token in doc:
+        feature_ids.extend(vocabulary[term] for term in analyzer(token.text) if term in vocabulary)
+        offsets.append(len(feature_ids))
+    return np.array(offsets, dtype=np.int64), np.array(feature_ids, dtype=np.int64)
+
+
+def window_token_counts(
+    offsets: np.ndarray, feature_ids: np.ndarray, starts: np.ndarray, ends: np.ndarray, n_features: int, row: int
+) -> sparse.csr_matrix:
+    """Counts the features of the tokens in a window as a sparse (1 x features) row."""
+    features, counts = np.unique(feature_ids[offsets[starts[row]]:offsets[ends[row]]], return_counts=True)
+    return sparse.csr_matrix((counts, features, [0, len(features)]), shape=(1, n_features))
+
+
+def token_count_source(
+    offsets: np.ndarray, feature_ids: np.ndarray, starts: np.ndarray, ends: np.ndarray, n_features: int
+) -> Callable[[int], sparse.csr_matrix]:
+    """Window array source counting the features of the tokens in a window (see `window_token_counts`)."""
+    return partial(window_token_counts, offsets, feature_ids, starts, ends, n_features)
+
+
+def sliding_window_bow_scores(
+    offsets: np.ndarray,
+    feature_ids: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    comparison_vector: Union[np.ndarray, sparse.spmatrix]
+) -> np.ndarray:
+    """
+    Cosine similarity of the BoW counts of every [start, end) window with `comparison_vector`.
+
+    Dot products come from a prefix sum over per-token contributions. Squared norms are kept up to
+    date while sliding over the document: adding an occurrence of a feature with count c raises the
+    squared norm by 2c + 1, removing one lowers it by 2c - 1. Windows must be ordered with
+    non-decreasing starts and ends, as fixed-size windows are, so every token is added and removed
+    at most once and the total cost is linear in the document length.
+    """
+    n_tokens = len(offsets) - 1
+
+    token_of_feature = np.repeat(np.arange(n_tokens), np.diff(offsets))
+    feature_weights = sparse_row_values(comparison_vector, feature_ids)
+    token_dots = np.bincount(token_of_feature, weights=feature_weights, minlength=n_tokens)
+    cumulative_dots = np.concatenate(([0.0], np.cumsum(token_dots)))
+    dots = cumulative_dots[ends] - cumulative_dots[starts]
+
+    counts = np.zeros(comparison_vector.shape[-1], dtype=np.int64)
+    squared_norms = np.zeros(len(starts), dtype=np.float64)
+    squared_norm = 0
+    low = high = 0  # the counts hold the tokens in [low, high)
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        while low < min(start, high):
+            for feature in feature_ids[offsets[low]:offsets[low + 1]]:
+                squared_norm -= 2 * counts[feature] - 1
+                counts[feature] -= 1
+            low += 1
+        if low < start:  # gap between windows: the counts are empty now
+            low = high = start
+        while high < end:
+            for feature in feature_ids[offsets[high]:offsets[high + 1]]:
+                squared_norm += 2 * counts[feature] + 1
+                counts[feature] += 1
+            high += 1
+        squared_norms[i] = squared_norm
+
+    norms = np.sqrt(squared_norms) * vector_norm(comparison_vector)
+    scores = np.zeros(len(starts))
+    np.divide(dots, norms, out=scores, where=norms > 0)
+    return scores
+
+
+def fixed_window_representations(
+    doc: Doc,
+    window_prop: WindowProp,
+    vectorizer: CountVectorizer,
+    comparison_representations: ArrRepresentations
+) -> Dict[str, WindowView]:
+    """
+    Computes representations and similarity scores for the fixed-size windows of a document.
+
+    Produces the same windows as `segment` with a fixed `window_size`/`window_shift`, but without
+    creating spans: the token-vector matrix is built once and window means come from cumulative sums
+    (`prefix_sum_window_means`), and BoW scores from prefix-summed dot products and sliding norms
+    (`sliding_window_bow_scores`). Scoring cost thus depends on the document length only, not on
+    the window size or overlap.
+
+    Args:
+        doc (Doc): The document to segment.
+        window_prop (WindowProp): Fixed window size and shift.
+        vectorizer (CountVectorizer): Fitted vectorizer used for the BoW representation.
+        comparison_representations (ArrRepresentations): BoW, GloVe and Word2Vec representations
+            of the comparison text.
+
+    Returns:
+        Dict[str, WindowView]: Window representations keyed by representation type ('bow', 'glove',
+            'word2vec'), in document order, backed by one WindowTable.
+    """
+    starts, ends = fixed_window_bounds(len(doc), window_prop)
+
+    # Character offsets of each window, as in `segment`
+    token_starts = np.array([token.idx for token in doc], dtype=np.int64)
+    token_ends = token_starts + np.array([len(token) for token in doc], dtype=np.int64)
+
+    offsets, feature_ids = token_feature_ids(doc, vectorizer)
+    token_matrices = {
+        "glove": compute_glove_representation(doc),
+        "word2vec": compute_word2vec_representation(doc),
+    }
+
+    window_scores = {}
+    for i, rep_type in enumerate(["bow", "glove", "word2vec"]):
+        comparison_vector = comparison_window_vector(comparison_representations, i)
+        if comparison_vector is None:
+            window_scores[rep_type] = [None] * len(starts)
+        elif rep_type == "bow":
+            window_scores[rep_type] = sliding_window_bow_scores(
+                offsets, feature_ids, starts, ends, comparison_vector
+            )
+        else:
+            window_means = prefix_sum_window_means(token_matrices[rep_type], starts, ends)
+            window_scores[rep_type] = cosine_scores(window_means, comparison_vector)
+
+    # Window arrays are computed only when a window is accessed
+    array_sources = {
+        "bow": token_count_source(offsets, feature_ids, starts, ends, len(vectorizer.vocabulary_)),
+        **token_slice_sources(token_matrices, starts, ends),
+    }
+
+    logger.info(f"Scored {len(starts)} fixed-size windows with prefix sums.")
+    return assemble_window_table(token_starts[starts], token_ends[ends - 1], array_sources, window_scores)
+
+
+def build_reference_profile(comparison_text: Union[str, spacy.tokens.Doc]) -> ReferenceProfile:
+    """Parses a comparison text and precomputes its BoW terms and token-vector matrices."""
+    text_content = comparison_text.text if isinstance(comparison_text, spacy.tokens.Doc) else comparison_text
+    doc = comparison_text if isinstance(comparison_text, spacy.tokens.Doc) else parse_text(text_content)
+    return ReferenceProfile(
+        key=hashlib.sha256(text_content.encode("utf-8")).hexdigest(),
+        doc=doc,
+        terms=frozenset(bow_analyzer(text_content)),
+        term_counts=dict(Counter(bow_analyzer(" ".join(token.text for token in doc)))),
+        glove=compute_glove_representation(doc),
+        word2vec=compute_word2vec_representation(doc),
+    )
+
+
+def get_reference_profile(comparison_text: Union[str, spacy.tokens.Doc]) -> ReferenceProfile:
+    """
+    Returns the reference profile of a comparison text, building it on first use.
+
+    Profiles are cached by the SHA-256 hash of the text content, so fixed references such as
+    `values_text` and `objectivity_text` are parsed and vectorized once and then reused for every
+    target document. The cache keeps the `REFERENCE_PROFILE_CACHE_SIZE` most recently used profiles.
+    """
+    text_content = comparison_text.text if isinstance(comparison_text, spacy.tokens.Doc) else comparison_text
+    key = hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+    profile = _reference_profiles.get(key)
+    if profile is not None:
+        _reference_profiles.move_to_end(key)
+        return profile
+
+    profile = build_reference_profile(comparison_text)
+    _reference_profiles[key] = profile
+    if len(_reference_profiles) > REFERENCE_PROFILE_CACHE_SIZE:
+        evicted_key, _ = _reference_profiles.popitem(last=False)
+        logger.info(f"Evicted reference profile {evicted_key[:12]} from the cache.")
+    return profile
+
+
+def reference_vectorizer(profile: ReferenceProfile, text_content: str) -> CountVectorizer:
+    """
+    Builds a CountVectorizer over the terms of a target text and a reference profile, without fitting.
+
+    The vocabulary is the same as fitting a CountVectorizer on both texts, so BoW vectors and scores
+    are unchanged. Fitting with a fixed vocabulary only validates it; no text is analysed.
+    """
+    terms = profile.terms.union(bow_analyzer(text_content))
+    vectorizer = CountVectorizer(vocabulary={term: i for i, term in enumerate(sorted(terms))})
+    return vectorizer.fit([])
+
+
+def profile_representations(profile: ReferenceProfile, vectorizer: CountVectorizer) -> ArrRepresentations:
+    """Returns the BoW (as a sparse row), GloVe and Word2Vec representations of a reference profile."""
+    vocabulary = vectorizer.vocabulary_
+    counts = sorted((vocabulary[term], count) for term, count in profile.term_counts.items() if term in vocabulary)
+    features = np.array([feature for feature, _ in counts], dtype=np.int64)
+    bow_representation = sparse.csr_matrix(
+        (np.array([count for _, count in counts], dtype=np.int64), features, [0, len(features)]),
+        shape=(1, len(vocabulary)),
+    )
+    return bow_representation, profile.glove, profile.word2vec
+
+
 def text_to_document_wrapper(
     text: Union[str, spacy.tokens.Doc], 
-    comparison_text: Optional[Union[str, spacy.tokens.Doc]] = None,
-    window_prop: WindowProp = WindowProp(window_size=20, window_shift=10)
+    comparison_text: Optional[Union[str, spacy.tokens.Doc, ReferenceProfile]] = None,
+    window_prop: WindowProp = WindowProp(window_size=20, window_shift=10),
+    vocabulary: Optional[CorpusVocabulary] = None
 ) -> DocumentWrapper:
     """
     Generates a document wrapper for the given text and optional comparison document.
 
     Args:
         text (Union[str, spacy.tokens.Doc]): The input text or Doc to generate the document wrapper for.
-        comparison_text (Optional[Union[str, spacy.tokens.Doc]]): The comparison text or Doc to compute similarity scores with.
-            Defaults to None. If not provided, similarity scores will not be computed.
+        comparison_text (Optional[Union[str, spacy.tokens.Doc, ReferenceProfile]]): The comparison text or Doc
+            to compute similarity scores with, or its precomputed reference profile. Profiles of texts are
+            cached (see `get_reference_profile`). Defaults to None.
         window_prop (WindowProp): Window properties for analyzing text segments. Defaults to 
         an empty WindowProp.
+        vocabulary (Optional[CorpusVocabulary]): Shared corpus vocabulary for the BoW representations, which
+            makes BoW scores comparable across documents. Defaults to the vocabulary saved at
+            `CORPUS_VOCABULARY_FILE` if there is one, otherwise a vocabulary of the two texts is used.
 
     Returns:
         DocumentWrapper: The generated document wrapper.
@@ -185,62 +586,47 @@ def text_to_document_wrapper(
         logger.error("Text or comparison text cannot be None")
         raise ValueError("Text or comparison text cannot be None")
 
-    # Adapt vectorizer fitting
-    text_content = text.text if isinstance(text, spacy.tokens.Doc) else text
-    comparison_text_content = (
-        comparison_text.text if isinstance(comparison_text, spacy.tokens.Doc) else comparison_text
+    # The comparison text is parsed and vectorized once, then reused from the profile cache
+    profile = (
+        comparison_text if isinstance(comparison_text, ReferenceProfile)
+        else get_reference_profile(comparison_text)
     )
-    vectorizer = CountVectorizer()
-    vectorizer.fit([text_content, comparison_text_content])
+
+    # Shared corpus vocabulary, or else the vocabulary of the target and comparison texts
+    text_content = text.text if isinstance(text, spacy.tokens.Doc) else text
+    vocabulary = vocabulary if vocabulary is not None else default_corpus_vocabulary()
+    if vocabulary is not None:
+        vectorizer = vocabulary.vectorizer
+    else:
+        vectorizer = reference_vectorizer(profile, text_content)
+
+    # Parse the target text once; representations and segmentation share the same tokens
+    doc = text if isinstance(text, spacy.tokens.Doc) else parse_text(text_content, window_prop)
 
     # Retrieve representations
-    target_representations = representation_func(text, vectorizer)
-    comparison_representations = representation_func(comparison_text, vectorizer)
-
-    # Compute similarities
-    similarities = similarity_func(target_representations, comparison_representations)
-
-    # Build SimRepresentation instances
-    sim_reprs = {
-        rep_type: SimRepresentation(
-            doc_representation=target_representations[i],
-            #features=vectorizer.get_feature_names(),
-            comparison_array=comparison_representations[i],
-            name=rep_type,
-        )
-        for i, rep_type in enumerate(["bow", "glove", "word2vec"])
-    }
+    target_representations = representation_func(doc, vectorizer)
+    comparison_representations = profile_representations(profile, vectorizer)
 
     # Check for None window_prop and log a warning if necessary
     if window_prop is None or all(value is None for value in window_prop._asdict().values()):
         logger.warning(
             "No segmentation will be performed, the entire document will be used as a single window."
         )
-        #windows = [Window(content=text, start_pos=0, end_pos=len(text_content))]
-        windows = [
-            WindowRepresentation(
-                arr=target_representations[i],
-                pos=(0, len(text_content)),
-                similarity_score=similarities[i])
-                for i, rep_type in enumerate(["bow", "glove", "word2vec"])
-            ]
-    else:
-        # Segment the text
-        doc = nlp_glove(text_content)  # Ensure we have a Doc object
+        windows = [Window(content=doc[:], start_pos=0, end_pos=len(text_content))]
+        window_reprs = batch_window_representations(
+            doc, windows, vectorizer, comparison_representations
+        )
+    elif window_prop.window_type in ('sentence', 'paragraph'):
+        # Compute the representations and similarity scores of all windows in one batch
         windows = segment(doc, window_prop)
-
-    # For each window, compute its representations and similarity scores
-    window_reprs = {'bow': [], 'glove': [], 'word2vec': []}
-    for window in windows:
-        window_target_reprs = representation_func(window.content, vectorizer)
-        window_similarity_scores = similarity_func(window_target_reprs, comparison_representations)
-        for i, rep_type in enumerate(["bow", "glove", "word2vec"]):
-            window_repr = WindowRepresentation(
-                arr=window_target_reprs[i],
-                pos=[window.start_pos, window.end_pos],
-                similarity_score=window_similarity_scores[i]
-            )
-            window_reprs[rep_type].append(window_repr)
+        window_reprs = batch_window_representations(
+            doc, windows, vectorizer, comparison_representations
+        )
+    else:
+        # Fixed-size windows are scored from prefix sums, without building spans
+        window_reprs = fixed_window_representations(
+            doc, window_prop, vectorizer, comparison_representations
+        )
 
     # Create the DocumentWrapper instance
     document_wrapper = DocumentWrapper(
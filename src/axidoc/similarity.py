@@ -0,0 +1,98 @@
+"""
+Cosine similarity kernels.
+
+Vectors are normalized once and compared with plain dot products, in float32. Unlike sklearn's
+`cosine_similarity`, nothing is validated or copied into 2D arrays per call, so the kernels are
+cheap enough to call per window. Dense and sparse (BoW) inputs are both accepted; sparse inputs
+are never densified.
+
+Vectors with zero norm, or with NaN/inf entries, have no direction: their similarity to anything
+is 0 (as `bow.compute_semantic_similarity` does by hand).
+"""
+
+import numpy as np
+from scipy import sparse
+from typing import Optional, Union
+
+Vector = Union[np.ndarray, sparse.spmatrix]
+
+
+def row_norms(matrix: Vector) -> np.ndarray:
+    """Euclidean norm of every row of a dense or sparse matrix, as float32."""
+    if sparse.issparse(matrix):
+        return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1), dtype=np.float32).ravel())
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+
+
+def vector_norm(vector: Vector) -> float:
+    """Euclidean norm of a dense vector or a sparse row."""
+    if sparse.issparse(vector):
+        return float(np.sqrt(vector.multiply(vector).sum()))
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    return float(np.sqrt(vector @ vector))
+
+
+def inverse_norms(norms: np.ndarray) -> np.ndarray:
+    """1 / norm, with 0 for zero or non-finite norms (vectors without a direction)."""
+    norms = np.asarray(norms, dtype=np.float32)
+    valid = np.isfinite(norms) & (norms > 0)
+    return np.divide(1, norms, out=np.zeros_like(norms), where=valid)
+
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    """The unit float32 vector in the direction of `vector` (zeros if it has none)."""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    unit = vector * inverse_norms(np.array([vector_norm(vector)]))[0]
+    return unit if np.isfinite(unit).all() else np.zeros_like(unit)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Unit-normalizes every row of a dense matrix, as float32 (rows without a direction become zeros)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    unit = matrix * inverse_norms(row_norms(matrix))[:, np.newaxis]
+    unit[~np.isfinite(unit).all(axis=1)] = 0
+    return unit
+
+
+def cosine(vector1: Vector, vector2: Vector) -> float:
+    """Cosine similarity of two vectors (dense vectors or sparse rows)."""
+    if sparse.issparse(vector1) or sparse.issparse(vector2):
+        matrix = vector1 if sparse.issparse(vector1) else sparse.csr_matrix(np.asarray(vector1).reshape(1, -1))
+        return float(cosine_scores(matrix, vector2)[0])
+    vector1 = np.asarray(vector1, dtype=np.float32).ravel()
+    vector2 = np.asarray(vector2, dtype=np.float32).ravel()
+    denominator = np.sqrt((vector1 @ vector1) * (vector2 @ vector2))
+    if not (np.isfinite(denominator) and denominator > 0):
+        return 0.0
+    return float((vector1 @ vector2) / denominator)
+
+
+def cosine_scores(matrix: Vector, vector: Vector, matrix_row_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    One-vs-many: cosine similarity of every row of `matrix` with `vector`, in one matrix-vector product.
+
+    Either may be sparse. `matrix_row_norms` can pass precomputed norms of the matrix rows (e.g.
+    kept alongside a corpus matrix), so the matrix is only read once.
+    """
+    norms = row_norms(matrix) if matrix_row_norms is None else np.asarray(matrix_row_norms, dtype=np.float32)
+    if sparse.issparse(vector):
+        vector = sparse.csr_matrix(vector, dtype=np.float32)
+        dots = matrix @ vector.T
+        dots = dots.toarray().ravel() if sparse.issparse(dots) else np.asarray(dots).ravel()
+        scores = dots.astype(np.float32) * inverse_norms(np.array([vector_norm(vector)]))[0]
+    else:
+        unit = normalize(vector)
+        if sparse.issparse(matrix):
+            scores = np.asarray(matrix @ unit, dtype=np.float32).ravel()
+        else:
+            scores = np.asarray(matrix, dtype=np.float32) @ unit
+    scores = scores * inverse_norms(norms)
+    return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def cosine_matrix(matrix1: np.ndarray, matrix2: np.ndarray) -> np.ndarray:
+    """Many-vs-many: the (rows1 x rows2) cosine similarities of the rows of two dense matrices."""
+    return normalize_rows(matrix1) @ normalize_rows(matrix2).T
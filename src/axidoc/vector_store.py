@@ -0,0 +1,192 @@
+import json
+import numpy as np
+import spacy
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from src.logconf import get_logger
+
+# logging
+logger = get_logger(__name__)
+logger.info("Logging from src/axidoc/vector_store.py module.")
+
+# Files of an exported vector table
+VECTORS_FILE: str = "vectors.npy"
+KEYS_FILE: str = "keys.npy"
+ROWS_FILE: str = "rows.npy"
+SCALES_FILE: str = "scales.npy"
+META_FILE: str = "meta.json"
+TOKENIZER_DIR: str = "tokenizer"
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+class VectorTable:
+    """
+    Word-vector table indexed by SpaCy token ID (the orth hash of the token string).
+
+    `keys` is sorted and `rows[i]` is the row of `vectors` holding the vector of `keys[i]`. Several keys
+    may share a row (pruned models map removed words to their nearest kept vector). Tables opened from
+    disk are memory-mapped, so every process using the same export shares one page-cache copy.
+
+    Vectors are stored as float32, float16, or int8 with a float32 scale per row (`scales`); lookups
+    always return float32 vectors.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        keys: np.ndarray,
+        rows: np.ndarray,
+        meta: Dict[str, Any],
+        scales: Optional[np.ndarray] = None
+    ):
+        self.vectors = vectors
+        self.keys = keys
+        self.rows = rows
+        self.meta = meta
+        self.scales = scales
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the stored vectors (and scales) in bytes."""
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def find(self, keys: Iterable[int]) -> np.ndarray:
+        """Returns the vector rows of token IDs, -1 for IDs without a vector."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.searchsorted(self.keys, keys)
+        positions[positions == len(self.keys)] = 0
+        return np.where(self.keys[positions] == keys, self.rows[positions], -1)
+
+    def lookup(self, keys: Iterable[int]) -> np.ndarray:
+        """Returns the float32 vectors of token IDs as a (keys x dimensions) matrix; zeros for missing IDs."""
+        rows = self.find(keys)
+        matrix = np.zeros((len(rows), self.dim), dtype=np.float32)
+        present = rows >= 0
+        matrix[present] = self.vectors[rows[present]]
+        if self.scales is not None:
+            matrix[present] *= self.scales[rows[present], np.newaxis]
+        return matrix
+
+    def float_vectors(self) -> np.ndarray:
+        """Returns all stored vectors as float32 (int8 rows multiplied by their scales)."""
+        vectors = np.asarray(self.vectors, dtype=np.float32)
+        if self.scales is not None:
+            vectors = vectors * self.scales[:, np.newaxis]
+        return vectors
+
+    def get_vector(self, string: str) -> np.ndarray:
+        """Returns the vector of a string (zeros if it has none)."""
+        return self.lookup([spacy.strings.hash_string(string)])[0]
+
+    @classmethod
+    def from_spacy(cls, nlp: spacy.language.Language) -> "VectorTable":
+        """Wraps the vectors of a loaded SpaCy model (the vector data is not copied)."""
+        vectors = nlp.vocab.vectors
+        keys = np.fromiter(vectors.key2row.keys(), dtype=np.uint64, count=len(vectors.key2row))
+        rows = np.fromiter(vectors.key2row.values(), dtype=np.int64, count=len(vectors.key2row))
+        order = np.argsort(keys)
+        meta = {"lang": nlp.lang, "dtype": "float32", "shape": list(vectors.shape)}
+        return cls(np.asarray(vectors.data), keys[order], rows[order], meta)
+
+
+def quantize_rows(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantizes vectors to int8 with one scale per row (symmetric, max-abs scaling).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The int8 vectors and the float32 row scales, such that
+            `quantized * scales[:, None]` approximates `vectors`.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.rint(vectors / scales[:, np.newaxis]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def quantize_table(table: VectorTable, dtype: str) -> VectorTable:
+    """
+    Returns an in-memory copy of a vector table stored as `dtype` ('float32', 'float16' or 'int8').
+    A float16 or int8 table is dequantized first, so its float32 copy holds the vectors its lookups return.
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}'. Choose from {', '.join(SUPPORTED_DTYPES)}.")
+    meta = dict(table.meta, dtype=dtype)
+    vectors = table.float_vectors()
+    if dtype == "int8":
+        quantized, scales = quantize_rows(vectors)
+        return VectorTable(quantized, table.keys, table.rows, meta, scales=scales)
+    return VectorTable(vectors.astype(dtype, copy=False), table.keys, table.rows, meta)
+
+
+def export_vector_table(
+    nlp: spacy.language.Language, output_dir: Union[str, Path], dtype: str = "float32"
+) -> Path:
+    """
+    Exports the vectors of a SpaCy model to a directory of .npy files that can be memory-mapped.
+
+    Parameters:
+    - nlp (spacy.language.Language): Model whose vectors are exported (e.g. a pruned GloVe model).
+    - output_dir (Union[str, Path]): Directory to write `vectors.npy`, `keys.npy`, `rows.npy`,
+      `meta.json` and the model's tokenizer to.
+    - dtype (str): Storage type of the vectors: 'float32', 'float16', or 'int8' with per-row
+      scales (written to `scales.npy`).
+
+    Returns:
+    - Path: The output directory.
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}'. Choose from {', '.join(SUPPORTED_DTYPES)}.")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    table = quantize_table(VectorTable.from_spacy(nlp), dtype)
+
+    np.save(output_dir / VECTORS_FILE, table.vectors)
+    if table.scales is not None:
+        np.save(output_dir / SCALES_FILE, table.scales)
+    np.save(output_dir / KEYS_FILE, table.keys)
+    np.save(output_dir / ROWS_FILE, table.rows)
+    # The tokenizer is saved too, so that texts can be tokenized without loading the model's vectors
+    nlp.tokenizer.to_disk(output_dir / TOKENIZER_DIR)
+    meta = {"lang": nlp.lang, "dtype": dtype, "shape": list(table.vectors.shape), "n_keys": len(table)}
+    with open(output_dir / META_FILE, "w") as file:
+        json.dump(meta, file, indent=4)
+
+    logger.info(f"Exported {meta['shape'][0]} vectors ({len(table)} keys, {dtype}) to {output_dir}.")
+    return output_dir
+
+
+def open_vector_table(table_dir: Union[str, Path]) -> VectorTable:
+    """Opens an exported vector table with memory-mapped, read-only arrays."""
+    table_dir = Path(table_dir)
+    with open(table_dir / META_FILE, "r") as file:
+        meta = json.load(file)
+    return VectorTable(
+        vectors=np.load(table_dir / VECTORS_FILE, mmap_mode="r"),
+        keys=np.load(table_dir / KEYS_FILE, mmap_mode="r"),
+        rows=np.load(table_dir / ROWS_FILE, mmap_mode="r"),
+        meta=meta,
+        scales=np.load(table_dir / SCALES_FILE, mmap_mode="r") if meta["dtype"] == "int8" else None,
+    )
+
+
+def load_tokenizer(table_dir: Union[str, Path]) -> spacy.language.Language:
+    """Returns a blank pipeline with the tokenizer saved alongside an exported vector table (no vectors)."""
+    table_dir = Path(table_dir)
+    with open(table_dir / META_FILE, "r") as file:
+        meta = json.load(file)
+    nlp = spacy.blank(meta["lang"])
+    nlp.tokenizer.from_disk(table_dir / TOKENIZER_DIR)
+    return nlp
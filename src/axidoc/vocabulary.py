@@ -0,0 +1,87 @@
+import os
+import numpy as np
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.logconf import get_logger
+
+# logging
+logger = get_logger(__name__)
+logger.info("Logging from src/axidoc/vocabulary.py module.")
+
+# Frozen corpus vocabulary, one term per line (built from the tokenized Psychometrika corpus)
+CORPUS_VOCABULARY_FILE: str = "data/corpus_vocabulary.txt"
+
+
+class CorpusVocabulary(NamedTuple):
+    """
+    Frozen, integer-indexed vocabulary shared by all BoW representations of a corpus.
+
+    Attributes:
+        terms: Sorted array of the vocabulary terms; a term's index is its BoW column.
+        vectorizer: CountVectorizer with the vocabulary fixed to `terms` (no fitting needed).
+    """
+
+    terms: np.ndarray
+    vectorizer: CountVectorizer
+
+
+def corpus_vocabulary_from_terms(terms: Iterable[str]) -> CorpusVocabulary:
+    """Freezes a collection of terms into a CorpusVocabulary."""
+    sorted_terms = np.array(sorted(set(terms)), dtype=str)
+    vectorizer = CountVectorizer(vocabulary={term: i for i, term in enumerate(sorted_terms.tolist())})
+    vectorizer.fit([])  # validates the fixed vocabulary; nothing is learned
+    return CorpusVocabulary(terms=sorted_terms, vectorizer=vectorizer)
+
+
+def build_corpus_vocabulary(tokenized_documents: Iterable[str], min_df: int = 1) -> CorpusVocabulary:
+    """
+    Builds a corpus vocabulary from tokenized documents.
+
+    Parameters:
+    - tokenized_documents (Iterable[str]): Space-joined document tokens, as produced by
+      `nlp_preprocessing.bow.build_from_scratch`.
+    - min_df (int): Minimum number of documents a term must appear in.
+
+    Returns:
+    - CorpusVocabulary: The frozen vocabulary.
+    """
+    document_frequencies: Counter = Counter()
+    for document in tokenized_documents:
+        document_frequencies.update(set(document.split()))
+    terms = [term for term, frequency in document_frequencies.items() if frequency >= min_df]
+    logger.info(f"Built a corpus vocabulary of {len(terms)} terms.")
+    return corpus_vocabulary_from_terms(terms)
+
+
+def save_corpus_vocabulary(vocabulary: CorpusVocabulary, file_path: str = CORPUS_VOCABULARY_FILE) -> None:
+    """Writes the vocabulary terms to a text file, one term per line, in column order."""
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.writelines(term + "\n" for term in vocabulary.terms.tolist())
+
+
+def load_corpus_vocabulary(file_path: str = CORPUS_VOCABULARY_FILE) -> CorpusVocabulary:
+    """Reads a vocabulary written by `save_corpus_vocabulary`."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        return corpus_vocabulary_from_terms(line.strip() for line in file if line.strip())
+
+
+@lru_cache(maxsize=1)
+def default_corpus_vocabulary() -> Optional[CorpusVocabulary]:
+    """Loads the corpus vocabulary from `CORPUS_VOCABULARY_FILE` once, or returns None if it is missing."""
+    if not os.path.isfile(CORPUS_VOCABULARY_FILE):
+        logger.info(f"No corpus vocabulary at {CORPUS_VOCABULARY_FILE}; BoW vocabularies are built per document.")
+        return None
+    vocabulary = load_corpus_vocabulary(CORPUS_VOCABULARY_FILE)
+    logger.info(f"Loaded corpus vocabulary of {len(vocabulary.terms)} terms.")
+    return vocabulary
+
+
+if __name__ == "__main__":
+    from src.nlp_preprocessing import bow
+
+    corpus_vocabulary = build_corpus_vocabulary(bow.tokenized_documents)
+    save_corpus_vocabulary(corpus_vocabulary, CORPUS_VOCABULARY_FILE)
+    logger.info(f"Saved corpus vocabulary to {CORPUS_VOCABULARY_FILE}.")
@@ -0,0 +1,226 @@
+"""
+Approximate nearest-neighbour search over document embeddings.
+
+An inverted-file (IVF) index: the (unit-normalized) document vectors are clustered with
+spherical k-means, and each cluster keeps the contiguous block of its members' vectors.
+A query is compared with the centroids, and only the `n_probe` closest clusters are
+scanned, instead of the whole corpus. The index is saved as .npy files next to the
+corpus store and opened memory-mapped. Its metadata records the shape and digest of the
+matrix it was built from, so an index of an older version of the corpus is never searched.
+"""
+
+import json
+import time
+import hashlib
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from src.logconf import get_logger
+from src.axidoc.similarity import normalize_rows
+from src.nlp_preprocessing.corpus_query import top_k_indices
+logger = get_logger(__name__)
+logger.info("Logging from the nlp_preprocessing/ann_index module.")
+
+ANN_INDEX_DIR: str = "ann_index"
+ANN_META_FILE: str = "meta.json"
+
+
+def matrix_source(vectors: np.ndarray) -> Dict[str, object]:
+    """The shape and SHA-256 digest (of the float32 values) of a matrix an index is built from."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return {"shape": list(vectors.shape), "sha256": hashlib.sha256(vectors.data).hexdigest()}
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, n_clusters: int, n_iter: int = 20, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Clusters unit vectors by cosine similarity.
+
+    Parameters:
+    - vectors (np.ndarray): Unit-normalized (n x dim) vectors.
+    - n_clusters (int): Number of clusters (at most n).
+    - n_iter (int): Number of assignment/update rounds.
+    - seed (int): Seed of the initial centroid sample.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The (n_clusters x dim) unit centroids and each vector's cluster.
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    assignments = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(n_iter):
+        similarities = vectors @ centroids.T
+        new_assignments = similarities.argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, new_assignments, vectors)
+        empty = np.flatnonzero(np.bincount(new_assignments, minlength=n_clusters) == 0)
+        if len(empty):
+            # reseed empty clusters with the vectors worst served by their centroid
+            worst = np.argsort(similarities[np.arange(len(vectors)), new_assignments])[:len(empty)]
+            sums[empty[:len(worst)]] = vectors[worst]
+        centroids = normalize_rows(sums)
+        if np.array_equal(new_assignments, assignments) and not len(empty):
+            break
+        assignments = new_assignments
+    return centroids, (vectors @ centroids.T).argmax(axis=1)
+
+
+def brute_force_search(vectors: np.ndarray, query: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-k cosine search over unit-normalized vectors; returns (ids, scores)."""
+    scores = vectors @ normalize_rows(query[None, :])[0]
+    ids = top_k_indices(scores, k)
+    return ids, scores[ids]
+
+
+class IVFIndex:
+    """
+    Inverted-file index of unit-normalized vectors.
+
+    Attributes:
+        centroids: The (n_lists x dim) unit cluster centroids.
+        list_offsets: Cluster `c` holds rows `list_offsets[c]:list_offsets[c + 1]` of `vectors`.
+        ids: The original row (document) id of each row of `vectors`.
+        vectors: The unit vectors, grouped by cluster.
+        source: Shape and digest of the matrix the index was built from (see `matrix_source`),
+            or None if unknown.
+    """
+
+    def __init__(
+        self, centroids: np.ndarray, list_offsets: np.ndarray, ids: np.ndarray, vectors: np.ndarray,
+        source: Optional[Dict[str, object]] = None,
+    ):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: Optional[int] = None, n_iter: int = 20, seed: int = 0) -> "IVFIndex":
+        """Clusters the vectors into `n_lists` lists (by default about the square root of their number)."""
+        source = matrix_source(vectors)
+        vectors = normalize_rows(vectors)
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        centroids, assignments = spherical_kmeans(vectors, n_lists, n_iter, seed)
+        order = np.argsort(assignments, kind="stable")
+        list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=len(centroids)))))
+        logger.info(f"Built an IVF index of {len(vectors)} vectors in {len(centroids)} lists.")
+        return cls(centroids, list_offsets, order, vectors[order], source)
+
+    def matches(self, vectors: np.ndarray) -> bool:
+        """Whether the index was built from exactly this matrix."""
+        return self.source is not None and self.source == matrix_source(vectors)
+
+    def search(self, query: np.ndarray, k: int = 10, n_probe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k cosine search.
+
+        Parameters:
+        - query (np.ndarray): The query vector (need not be normalized).
+        - k (int): Number of neighbours.
+        - n_probe (int): Number of closest lists to scan; more is slower and more exact.
+
+        Returns:
+        - Tuple[np.ndarray, np.ndarray]: The ids of the neighbours, best first, and their cosine similarities.
+        """
+        query = normalize_rows(np.asarray(query)[None, :])[0]
+        lists = top_k_indices(self.centroids @ query, n_probe)
+        rows = np.concatenate(
+            [np.arange(self.list_offsets[c], self.list_offsets[c + 1]) for c in lists] or [np.array([], dtype=np.int64)]
+        )
+        scores = self.vectors[rows] @ query
+        best = top_k_indices(scores, k)
+        return np.asarray(self.ids)[rows[best]], scores[best]
+
+    def save(self, index_dir: Union[str, Path]) -> None:
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        for name in ("centroids", "list_offsets", "ids", "vectors"):
+            np.save(index_dir / f"{name}.npy", getattr(self, name))
+        with open(index_dir / ANN_META_FILE, "w") as file:
+            json.dump(
+                {"type": "ivf", "n_vectors": len(self), "n_lists": len(self.centroids), "source": self.source},
+                file, indent=4,
+            )
+
+    @classmethod
+    def load(cls, index_dir: Union[str, Path], mmap: bool = True, vectors: Optional[np.ndarray] = None) -> "IVFIndex":
+        """
+        Opens a saved index. If `vectors` is given, raises ValueError unless the index was built
+        from exactly that matrix (e.g. after the corpus store or corpus index was rewritten).
+        """
+        index_dir = Path(index_dir)
+        mmap_mode = "r" if mmap else None
+        with open(index_dir / ANN_META_FILE) as file:
+            meta = json.load(file)
+        index = cls(
+            *(np.load(index_dir / f"{name}.npy", mmap_mode=mmap_mode) for name in ("centroids", "list_offsets", "ids", "vectors")),
+            source=meta.get("source"),
+        )
+        if vectors is not None and not index.matches(vectors):
+            raise ValueError(
+                f"The ANN index at {index_dir} is stale: it was not built from this {' x '.join(map(str, np.shape(vectors)))} matrix."
+            )
+        return index
+
+
+def load_or_build(index_dir: Union[str, Path], vectors: np.ndarray, **build_kwargs) -> IVFIndex:
+    """Opens the index saved at `index_dir` if it was built from `vectors`; otherwise builds and saves a new one."""
+    try:
+        return IVFIndex.load(index_dir, vectors=vectors)
+    except FileNotFoundError:
+        logger.info(f"No ANN index at {index_dir}; building one.")
+    except ValueError as e:
+        logger.info(f"{e} Rebuilding it.")
+    index = IVFIndex.build(vectors, **build_kwargs)
+    index.save(index_dir)
+    return index
+
+
+def benchmark(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    n_probes: Sequence[int] = (1, 2, 4, 8, 16),
+    index: Optional[IVFIndex] = None,
+) -> List[Dict[str, float]]:
+    """
+    Recall@k and latency of the IVF index against brute-force cosine search.
+
+    Returns:
+        List[Dict[str, float]]: One row per `n_probe` (0 is brute force) with the mean recall@k
+            and the mean milliseconds per query.
+    """
+    index = index or IVFIndex.build(vectors)
+    unit_vectors = normalize_rows(vectors)
+    start = time.perf_counter()
+    exact = [set(brute_force_search(unit_vectors, query, k)[0].tolist()) for query in queries]
+    rows = [{"n_probe": 0, "recall": 1.0, "ms_per_query": 1000 * (time.perf_counter() - start) / len(queries)}]
+    for n_probe in n_probes:
+        start = time.perf_counter()
+        found = [set(index.search(query, k, n_probe)[0].tolist()) for query in queries]
+        elapsed = time.perf_counter() - start
+        recall = np.mean([len(f & e) / max(len(e), 1) for f, e in zip(found, exact)])
+        rows.append({"n_probe": n_probe, "recall": float(recall), "ms_per_query": 1000 * elapsed / len(queries)})
+    return rows
+
+
+if __name__ == "__main__":
+    import spacy
+    from src.nlp_preprocessing.bow import corpus_data_path
+    from src.nlp_preprocessing.corpus_store import CorpusStore
+    from src.nlp_preprocessing.semantic import load_document_vectors
+
+    store = CorpusStore(corpus_data_path)
+    document_vectors = np.asarray(load_document_vectors(store, spacy.load("en_core_web_lg")))
+    index = load_or_build(Path(corpus_data_path) / ANN_INDEX_DIR, document_vectors)
+
+    queries = document_vectors[np.random.default_rng(0).choice(len(document_vectors), min(100, len(document_vectors)), replace=False)]
+    for row in benchmark(document_vectors, queries, index=index):
+        logger.info(f"n_probe={row['n_probe']}: recall@10={row['recall']:.3f}, {row['ms_per_query']:.3f} ms/query")
@@ -14,16 +14,30 @@ from typing import Optional, Any
 
 # requires
 from src.logconf import get_logger
+from src.nlp_preprocessing.corpus_index import CorpusIndex, corpus_index_dir
+from src.nlp_preprocessing.corpus_query import corpus_query, feature_names, top_k_indices
+from src.nlp_preprocessing.corpus_store import CorpusStore, save_corpus_store
+from src.nlp_preprocessing.semantic import (
+    document_mean_vectors,
+    load_document_vectors,
+    reference_vector,
+    semantic_similarity_scores,
+)
+from src.nlp_preprocessing.tokenization import tokenize_corpus, iter_tokenized_documents
 logger = get_logger(__name__)
 logger.info("Logging from the nlp_preprocessing/bow module.")
 
 
 # Data
 
-# store data in these pickle files
+# store data in this corpus store (memory-mapped .npy arrays, see corpus_store.py)
+corpus_store_path: str = "data/corpus_store"
+# legacy pickle files, migrated to the corpus store when found
 bow_vectors_path: str = "data/bow_vectors.pkl"
 vectorizer_path: str = "data/vectorizer.pkl"
 tokenized_docs_path: str = "data/tokenized_docs.pkl"
+# streamed output of the tokenizer (one JSON line per document)
+tokenized_stream_path: str = "data/tokenized_docs.jsonl"
 # Pre-processing
 
 # Step 1: Preprocessing and tokenization
@@ -39,7 +53,12 @@ tokenizer_counter: int = 0  # count successfully tokenized files
 # Assuming logger is configured somewhere else
 #logger = logging.getLogger(__name__)
 
-def load_saved_data(bow_vectors_path, vectorizer_path, tokenized_docs_path):
+def load_saved_data(corpus_store_path):
+    store = CorpusStore(corpus_store_path)
+    return store.matrix, store.vectorizer(), list(store.tokenized_documents())
+
+
+def load_legacy_pickles(bow_vectors_path, vectorizer_path, tokenized_docs_path):
     with open(bow_vectors_path, "rb") as file:
         bow_vectors = pickle.load(file)
     with open(vectorizer_path, "rb") as file:
@@ -50,77 +69,64 @@ def load_saved_data(bow_vectors_path, vectorizer_path, tokenized_docs_path):
 
 
 def build_from_scratch(directory):
-    tokenized_documents = []
-    for idx, filename in enumerate(os.listdir(directory)):
-        if filename.endswith(".txt"):
-            with open(os.path.join(directory, filename), "r", encoding="utf-8") as file:
-                try:
-                    document_text = file.read()
-                except:
-                    logger.error(f"Failed to read file {filename}")
-                    continue
-                try:
-                    doc = nlp(document_text)
-                    tokens = [
-                        token.text.lower()
-                        for token in doc
-                        if not token.is_stop and token.is_alpha and len(token) > 3
-                    ]
-                    tokenized_documents.append(" ".join(tokens))
-                except:
-                    logger.error(f"Failed tokenizing file {filename}")
-                    continue
+    # Tokenize with a streaming, multi-process pipeline; documents go to disk as they are tokenized
+    tokenize_corpus(directory, tokenized_stream_path, nlp)
 
     vectorizer = CountVectorizer()
     try:
-        vectorizer.fit(tokenized_documents)
-    except:
-        logger.error("Failed to vectorize the documents")
-
-    try:
-        bow_vectors = vectorizer.transform(tokenized_documents)
-    except:
-        logger.error("Building bow vectors failed")
+        bow_vectors = vectorizer.fit_transform(iter_tokenized_documents(tokenized_stream_path))
+    except ValueError as e:
+        # e.g. an empty vocabulary: no documents were read, or they only hold stop words
+        logger.error(f"Building bow vectors failed: {e}")
+        raise
 
+    tokenized_documents = list(iter_tokenized_documents(tokenized_stream_path))
     return bow_vectors, vectorizer, tokenized_documents
 
 
-def save_data(
-    bow_vectors,
-    vectorizer,
-    tokenized_documents,
-    bow_vectors_path,
-    vectorizer_path,
-    tokenized_docs_path,
-):
-    with open(bow_vectors_path, "wb") as file:
-        pickle.dump(bow_vectors, file)
-    with open(vectorizer_path, "wb") as file:
-        pickle.dump(vectorizer, file)
-    with open(tokenized_docs_path, "wb") as file:
-        pickle.dump(tokenized_documents, file)
+def save_data(bow_vectors, vectorizer, tokenized_documents, corpus_store_path):
+    save_corpus_store(
+        corpus_store_path,
+        bow_vectors,
+        vectorizer.get_feature_names_out(),
+        tokenized_documents,
+    )
+
 
+def update_corpus_index(directory, nlp, corpus_index_dir=corpus_index_dir):
+    """Indexes the new or modified files of `directory` (only those are tokenized) and returns the bow data."""
+    corpus_index = CorpusIndex(corpus_index_dir)
+    corpus_index.update(directory, nlp)
+    corpus_index.save()
+    return corpus_index.bow_data()
 
-if (
+
+# corpus store the bow data comes from (the corpus index directory is itself a corpus store)
+corpus_data_path: str = corpus_store_path
+
+if os.path.isdir(corpus_index_dir):
+    # the index is only read here; new files are indexed by an explicit `update_corpus_index`
+    logger.info("Loading the corpus index.")
+    corpus_data_path = corpus_index_dir
+    bow_vectors, vectorizer, tokenized_documents = CorpusIndex(corpus_index_dir).bow_data()
+elif os.path.isdir(corpus_store_path):
+    logger.info("Loading saved data.")
+    bow_vectors, vectorizer, tokenized_documents = load_saved_data(corpus_store_path)
+elif (
     os.path.isfile(bow_vectors_path)
     and os.path.isfile(vectorizer_path)
     and os.path.isfile(tokenized_docs_path)
 ):
-    logger.info("Loading saved data.")
-    bow_vectors, vectorizer, tokenized_documents = load_saved_data(
+    logger.info("Migrating pickled data to the corpus store.")
+    bow_vectors, vectorizer, tokenized_documents = load_legacy_pickles(
         bow_vectors_path, vectorizer_path, tokenized_docs_path
     )
+    save_data(bow_vectors, vectorizer, tokenized_documents, corpus_store_path)
+    bow_vectors, vectorizer, tokenized_documents = load_saved_data(corpus_store_path)
 else:
     logger.info("Building data from scratch.")
     bow_vectors, vectorizer, tokenized_documents = build_from_scratch(directory)
-    save_data(
-        bow_vectors,
-        vectorizer,
-        tokenized_documents,
-        bow_vectors_path,
-        vectorizer_path,
-        tokenized_docs_path,
-    )
+    save_data(bow_vectors, vectorizer, tokenized_documents, corpus_store_path)
 
 
 def get_top_tokens(vectorizer, bow_vectors, top_n=5, num_docs=7):
@@ -160,7 +166,9 @@ def compute_similarity(bow_vectors, doc1_index, doc2_index):
 
 
 def load_tokenized_documents(tokenized_docs_path):
-    """Load tokenized documents from a pickle file."""
+    """Load tokenized documents from a corpus store (or a legacy pickle file)."""
+    if os.path.isdir(tokenized_docs_path):
+        return list(CorpusStore(tokenized_docs_path).tokenized_documents())
     with open(tokenized_docs_path, 'rb') as file:
         return pickle.load(file)
 
@@ -177,19 +185,11 @@ def tokenize_new_document(nlp, objectivity_file):
 
 def find_similar_documents(vectorizer, bow_vectors, values_tokenized, top_n=10):
     """Finds and returns indices of top_n most similar documents."""
-    values_vector = vectorizer.transform([values_tokenized])
-    values_similarity_scores = cosine_similarity(values_vector, bow_vectors)
-    most_similar_indices = values_similarity_scores.argsort()[0][::-1][:top_n]
-    return most_similar_indices
+    return corpus_query(bow_vectors, vectorizer).top_documents(values_tokenized, top_n)
 
 def get_important_tokens(vectorizer, bow_vectors, most_similar_indices, top_n=20):
     """Returns the most important tokens for each similar document."""
-    important_tokens_per_document = []
-    for doc_vector in bow_vectors[most_similar_indices]:
-        sorted_indices = np.argsort(doc_vector.toarray(), axis=1)[:, ::-1]
-        important_tokens = [vectorizer.get_feature_names_out()[idx] for idx in sorted_indices[:, :top_n]]
-        important_tokens_per_document.append(important_tokens)
-    return important_tokens_per_document
+    return corpus_query(bow_vectors, vectorizer).top_terms_per_document(most_similar_indices, top_n)
 
 
 def compute_semantic_similarity(doc1, doc2, nlp):
@@ -257,11 +257,14 @@ def analyze_values_in_documents(vectorizer, tokenized_docs_path, nlp):
     bow_vectors = vectorizer.transform(tokenized_docs)
     most_similar_indices = find_similar_documents(vectorizer, bow_vectors, values_tokenized)
     
-    # Integrate semantic similarity comparison
-    semantic_scores = []
-    for doc in tokenized_docs:
-        semantic_scores.append(compute_semantic_similarity(values_tokenized, doc, nlp))
-    most_similar_indices_semantic = np.argsort(semantic_scores)[::-1][:10]
+    # Integrate semantic similarity comparison: one mean vector per document (cached in the
+    # corpus store), scored against the values vector with a single matrix-vector product
+    if os.path.isdir(tokenized_docs_path):
+        document_vectors = load_document_vectors(CorpusStore(tokenized_docs_path), nlp)
+    else:
+        document_vectors = document_mean_vectors(bow_vectors, feature_names(vectorizer), nlp)
+    semantic_scores = semantic_similarity_scores(document_vectors, reference_vector(values_tokenized, nlp))
+    most_similar_indices_semantic = top_k_indices(semantic_scores, 10)
     
     # Get important tokens
     important_tokens_bow = get_important_tokens(vectorizer, bow_vectors, most_similar_indices)
@@ -270,7 +273,12 @@ def analyze_values_in_documents(vectorizer, tokenized_docs_path, nlp):
     return important_tokens_bow, important_tokens_semantic
 
 if __name__ == "__main__":
-    important_tokens_bow, important_tokens_semantic = analyze_values_in_documents(vectorizer, tokenized_docs_path, nlp)
+    if corpus_data_path == corpus_index_dir:
+        logger.info("Updating the corpus index.")
+        bow_vectors, vectorizer, tokenized_documents = update_corpus_index(directory, nlp)
+
+    # the tokens and document vectors are read from the same store as the vectorizer
+    important_tokens_bow, important_tokens_semantic = analyze_values_in_documents(vectorizer, corpus_data_path, nlp)
     
     logger.info("Most important tokens based on BoW:")
     for i, tokens in enumerate(important_tokens_bow):
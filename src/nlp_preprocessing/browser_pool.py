@@ -0,0 +1,181 @@
+"""
+Pool of headless browsers for pages that need one.
+
+Each worker thread owns one browser, created with its own proxy from the rotation (the proxy
+must be set before the browser starts; adding it to the options afterwards has no effect).
+Workers take URLs from a shared queue, so N pages load in parallel. A worker whose browser
+keeps failing quits it and starts a new one on the next proxy; the failed page is retried
+by whichever worker is free.
+"""
+
+import queue
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Creates a browser (webdriver) that uses the given proxy ('host:port'), or no proxy for None
+DriverFactory = Callable[[Optional[str]], Any]
+# Reads what is needed from a browser that has loaded a page (by default, the page source)
+PageReader = Callable[[Any, str], Any]
+
+
+def chrome_driver(proxy: Optional[str] = None) -> Any:
+    """A headless Chrome webdriver, going through `proxy` if given."""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")  # Run Chrome in headless mode
+    if proxy:
+        options.add_argument(f"--proxy-server={proxy}")
+    return webdriver.Chrome(options=options)
+
+
+def page_source(driver: Any, url: str) -> str:
+    return driver.page_source
+
+
+class BrowserPool:
+    """
+    Loads pages in `size` browsers in parallel.
+
+    Args:
+        size: Number of browsers (worker threads).
+        proxies: Proxies rotated over the browsers; each new browser takes the next one.
+        driver_factory: Creates a browser for a proxy (headless Chrome by default).
+        max_failures: Consecutive failures after which a worker recycles its browser.
+        max_attempts: Times a page is tried (by any worker) before its future gets the error.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        proxies: Sequence[str] = (),
+        driver_factory: DriverFactory = chrome_driver,
+        max_failures: int = 2,
+        max_attempts: int = 3,
+    ):
+        self.size = size
+        self.driver_factory = driver_factory
+        self.max_failures = max_failures
+        self.max_attempts = max_attempts
+        self._proxies = itertools.cycle(proxies) if proxies else None
+        self._proxy_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        # pages submitted whose future is not settled yet (including the ones queued for a retry)
+        self._unsettled = 0
+        self._settled = threading.Condition()
+        self.recycled = 0
+
+    def next_proxy(self) -> Optional[str]:
+        if self._proxies is None:
+            return None
+        with self._proxy_lock:
+            return next(self._proxies)
+
+    def start(self) -> "BrowserPool":
+        for i in range(self.size):
+            worker = threading.Thread(target=self._work, name=f"browser-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def close(self) -> None:
+        """Lets the workers finish the queued pages (and their retries), then quits the browsers."""
+        if self._workers:
+            # the stop sentinels must go in after the last retry, or a retried page would be
+            # queued behind them and never be taken
+            with self._settled:
+                self._settled.wait_for(lambda: self._unsettled == 0)
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        # without workers, nothing would ever take what is left in the queue
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                self._settle(item[2], error=RuntimeError("The browser pool was closed."))
+
+    def __enter__(self) -> "BrowserPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _new_driver(self) -> Any:
+        proxy = self.next_proxy()
+        logger.info(f"Starting a browser with proxy {proxy}.")
+        return self.driver_factory(proxy)
+
+    @staticmethod
+    def _quit(driver: Any) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error while quitting the browser: {e}")
+
+    def _settle(self, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        if future.cancelled():
+            pass
+        elif error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+        with self._settled:
+            self._unsettled -= 1
+            self._settled.notify_all()
+
+    def _work(self) -> None:
+        driver, failures = None, 0
+        try:
+            driver = self._new_driver()
+        except Exception as e:
+            logger.warning(f"Could not start a browser (retrying with the first page): {e}")
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            url, read, future, attempt = item
+            try:
+                if driver is None:
+                    driver = self._new_driver()
+                driver.get(url)
+                page = read(driver, url)
+                failures = 0
+                self._settle(future, page)
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Attempt {attempt} to load {url} failed: {e}")
+                if attempt < self.max_attempts:
+                    self._queue.put((url, read, future, attempt + 1))
+                else:
+                    self._settle(future, error=e)
+                if failures >= self.max_failures and driver is not None:
+                    # recycle the browser: the next page starts a new one on the next proxy
+                    self._quit(driver)
+                    driver, failures = None, 0
+                    self.recycled += 1
+        if driver is not None:
+            self._quit(driver)
+
+    def submit(self, url: str, read: PageReader = page_source) -> Future:
+        """Queues a page; the future gets `read(driver, url)` once a browser has loaded it."""
+        future: Future = Future()
+        with self._settled:
+            self._unsettled += 1
+        self._queue.put((url, read, future, 1))
+        return future
+
+    def map(self, urls: Iterable[str], read: PageReader = page_source) -> Iterator[Future]:
+        """Queues all pages at once and returns their futures, in order."""
+        return iter([self.submit(url, read) for url in urls])
+
+    def load(self, url: str, read: PageReader = page_source) -> Any:
+        """Loads one page and waits for it (a blocking resolver, e.g. for `AsyncDownloader`)."""
+        return self.submit(url, read).result()
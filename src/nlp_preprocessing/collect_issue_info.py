@@ -10,34 +10,23 @@ import re
 import json
 from datetime import datetime
 from typing import Optional, NamedTuple, List, Any
-from selenium import webdriver
 from bs4 import BeautifulSoup
 from collections import namedtuple
 
+from browser_pool import BrowserPool
+from page_resolver import PageResolver, VOLUMES_PAGE_SELECTORS
 
-# Selenium
 
-# Configure Selenium options
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")  # Run Chrome in headless mode
-#PROXY = "195.248.240.25"
-#options.add_argument(f'--proxy-server={PROXY}')
-
-# Create a new Chrome browser instance
-browser = webdriver.Chrome(options=options)
+# Fetch the page over HTTP; a headless Chrome is started only if the HTML lacks the issue list
+page_resolver = PageResolver(VOLUMES_PAGE_SELECTORS, browser_pool_factory=lambda: BrowserPool(size=1))
 
 # URL for the volumes of issues page, which contains a list of all issues of the journal
 url_volumes_and_issues = "https://link.springer.com/journal/11336/volumes-and-issues"
 
 try:
 
-    # URL of a specific issue page
-    browser.get(url_volumes_and_issues)
     # Get the HTML content of the volumes and issues page
-    html_volumes_and_issues = browser.page_source
-
-    # Close the driver
-    browser.quit()
+    html_volumes_and_issues = page_resolver.resolve(url_volumes_and_issues)
 
     # Parse the HTML content using Beautiful Soup
     soup = BeautifulSoup(html_volumes_and_issues, 'html.parser')
@@ -87,5 +76,5 @@ try:
     print(f"Wrote {len(issue_dicts)} issue dicts to file ./issue_data.json")
 
 finally:
-    # Close the browser
-    browser.quit()
+    # Close the HTTP session (and the browser, if one was started)
+    page_resolver.close()
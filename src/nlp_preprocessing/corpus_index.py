@@ -0,0 +1,196 @@
+"""
+Incremental bag-of-words index of the text corpus.
+
+The index records the content hash and modification time of every indexed file, so an
+update only tokenizes files that are new or have changed, and appends their rows to the
+sparse BoW matrix. The vocabulary is append-only: new terms get new columns at the end,
+and existing columns never move, so existing rows stay valid.
+
+The matrix, vocabulary and tokens are persisted as a corpus store (see `corpus_store`),
+next to a JSON manifest of the indexed files.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import scipy.sparse as sp
+import spacy
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.logconf import get_logger
+from src.nlp_preprocessing.corpus_store import CorpusStore, save_corpus_store
+from src.nlp_preprocessing.tokenization import TOKENIZER_PROCESSES, iter_corpus_texts, stream_tokenize
+logger = get_logger(__name__)
+logger.info("Logging from the nlp_preprocessing/corpus_index module.")
+
+corpus_index_dir: str = "data/corpus_index"
+corpus_dir: str = "data/psychometrika/txt"
+
+MANIFEST_FILE: str = "manifest.json"
+
+
+def file_hash(file_path: Union[str, Path]) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CorpusIndex:
+    """
+    Incrementally updated BoW index of the .txt files of a directory.
+
+    Attributes:
+        index_dir: Directory the index is saved to.
+        manifest: Per-file `{"sha256", "mtime", "size", "row"}` records, keyed by filename.
+        terms: Vocabulary terms in column order (append-only).
+        vocabulary: Term-to-column mapping.
+        bow_vectors: Sparse (documents x terms) count matrix; row `manifest[f]["row"]` is file `f`.
+        tokenized_documents: Space-joined tokens of each row.
+    """
+
+    def __init__(self, index_dir: Union[str, Path] = corpus_index_dir):
+        self.index_dir = Path(index_dir)
+        self.manifest: Dict[str, Dict] = {}
+        self.terms: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.bow_vectors = sp.csr_matrix((0, 0), dtype=np.int64)
+        self.tokenized_documents: List[str] = []
+        if (self.index_dir / MANIFEST_FILE).is_file():
+            self.load()
+
+    def load(self) -> None:
+        with open(self.index_dir / MANIFEST_FILE, "r", encoding="utf-8") as file:
+            self.manifest = json.load(file)
+        # the index is modified in place, so the store is read into memory
+        store = CorpusStore(self.index_dir, mmap=False)
+        self.terms = store.vocabulary.tolist()
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.bow_vectors = store.matrix.astype(np.int64)
+        self.tokenized_documents = list(store.tokenized_documents())
+        logger.info(f"Loaded corpus index of {len(self.manifest)} files and {len(self.terms)} terms.")
+
+    def save(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.index_dir / MANIFEST_FILE, "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, indent=4)
+        documents = sorted(self.manifest, key=lambda filename: self.manifest[filename]["row"])
+        save_corpus_store(self.index_dir, self.bow_vectors, self.terms, self.tokenized_documents, documents)
+
+    def _count_row(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the (columns, counts) of a document, adding unseen terms to the vocabulary."""
+        counts = Counter(tokens)
+        for term in counts:
+            if term not in self.vocabulary:
+                self.vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+        columns = np.array([self.vocabulary[term] for term in counts], dtype=np.int64)
+        order = np.argsort(columns)
+        return columns[order], np.array(list(counts.values()), dtype=np.int64)[order]
+
+    def _changed_files(self, directory: Union[str, Path]) -> Tuple[Dict[str, Dict], List[str], int]:
+        """
+        Returns the new or modified files (with the `sha256`, `mtime` and `size` of their
+        manifest records), the removed files, and the number of unchanged files.
+        """
+        filenames = sorted(filename for filename in os.listdir(directory) if filename.endswith(".txt"))
+        changed: Dict[str, Dict] = {}
+        unchanged = 0
+        for filename in filenames:
+            stat = os.stat(os.path.join(directory, filename))
+            record = self.manifest.get(filename)
+            if record and record["mtime"] == stat.st_mtime and record["size"] == stat.st_size:
+                unchanged += 1
+                continue
+            content_hash = file_hash(os.path.join(directory, filename))
+            if record and record["sha256"] == content_hash:
+                # touched but identical: only refresh the timestamps
+                record.update(mtime=stat.st_mtime, size=stat.st_size)
+                unchanged += 1
+                continue
+            changed[filename] = {"sha256": content_hash, "mtime": stat.st_mtime, "size": stat.st_size}
+        removed = sorted(set(self.manifest) - set(filenames))
+        return changed, removed, unchanged
+
+    def _remove_rows(self, filenames: List[str]) -> None:
+        rows = {self.manifest.pop(filename)["row"] for filename in filenames}
+        kept = [row for row in range(self.bow_vectors.shape[0]) if row not in rows]
+        new_row = {old: new for new, old in enumerate(kept)}
+        self.bow_vectors = self.bow_vectors[kept]
+        self.tokenized_documents = [self.tokenized_documents[row] for row in kept]
+        for record in self.manifest.values():
+            record["row"] = new_row[record["row"]]
+
+    def update(
+        self, directory: Union[str, Path], nlp: spacy.language.Language, n_process: int = TOKENIZER_PROCESSES
+    ) -> Dict[str, int]:
+        """
+        Brings the index up to date with the .txt files of `directory`.
+
+        Only new and modified files are read and tokenized; their rows are appended to the
+        BoW matrix (a modified file's old row is dropped). Rows of deleted files are dropped too.
+
+        Returns:
+            Dict[str, int]: Numbers of added, updated, removed and unchanged files.
+        """
+        changed, removed, unchanged = self._changed_files(directory)
+        updated = [filename for filename in changed if filename in self.manifest]
+        if updated or removed:
+            self._remove_rows(updated + removed)
+
+        rows, columns, counts = [], [], []
+        texts = iter_corpus_texts(directory, list(changed))
+        for filename, tokens in stream_tokenize(nlp, texts, n_process=n_process):
+            row_columns, row_counts = self._count_row(tokens)
+            rows.append(np.full(len(row_columns), len(self.tokenized_documents), dtype=np.int64))
+            columns.append(row_columns)
+            counts.append(row_counts)
+            # the file was hashed (and stat-ed) once, when its change was detected
+            self.manifest[filename] = dict(changed[filename], row=len(self.tokenized_documents))
+            self.tokenized_documents.append(" ".join(tokens))
+
+        # Existing rows keep their columns; the matrix only grows to the right and downwards
+        n_rows, n_terms = len(self.tokenized_documents), len(self.terms)
+        old = self.bow_vectors.tocoo()
+        self.bow_vectors = sp.csr_matrix(
+            (
+                np.concatenate([old.data.astype(np.int64)] + counts),
+                (np.concatenate([old.row.astype(np.int64)] + rows), np.concatenate([old.col.astype(np.int64)] + columns)),
+            ),
+            shape=(n_rows, n_terms),
+        )
+
+        summary = {
+            "added": len(changed) - len(updated),
+            "updated": len(updated),
+            "removed": len(removed),
+            "unchanged": unchanged,
+        }
+        logger.info(f"Corpus index update: {summary}.")
+        return summary
+
+    def vectorizer(self) -> Optional[CountVectorizer]:
+        """
+        A CountVectorizer whose columns are the index's vocabulary (no fitting needed), or None
+        if the vocabulary is empty (nothing indexed yet), which CountVectorizer does not accept.
+        """
+        if not self.vocabulary:
+            logger.warning("The corpus index has an empty vocabulary; there is no vectorizer.")
+            return None
+        return CountVectorizer(vocabulary=dict(self.vocabulary)).fit([])
+
+    def bow_data(self) -> Tuple[sp.csr_matrix, Optional[CountVectorizer], List[str]]:
+        """Returns `(bow_vectors, vectorizer, tokenized_documents)`, as `bow.build_from_scratch` does."""
+        return self.bow_vectors, self.vectorizer(), self.tokenized_documents
+
+
+if __name__ == "__main__":
+    corpus_index = CorpusIndex(corpus_index_dir)
+    corpus_index.update(corpus_dir, spacy.load("en_core_web_lg"))
+    corpus_index.save()
@@ -0,0 +1,98 @@
+"""
+Top-k queries over the BoW corpus.
+
+Queries work on the sparse matrix directly: document scores are one sparse matrix-vector
+product divided by precomputed row norms, and only the k best entries are selected (with
+`np.argpartition`) and sorted, instead of sorting every score or densifying rows.
+"""
+
+import weakref
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Sequence, Tuple
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.logconf import get_logger
+from src.axidoc.similarity import cosine_scores, row_norms
+logger = get_logger(__name__)
+logger.info("Logging from the nlp_preprocessing/corpus_query module.")
+
+_feature_names: "weakref.WeakKeyDictionary[CountVectorizer, np.ndarray]" = weakref.WeakKeyDictionary()
+
+
+def feature_names(vectorizer: CountVectorizer) -> np.ndarray:
+    """`vectorizer.get_feature_names_out()`, computed once per vectorizer."""
+    if vectorizer not in _feature_names:
+        _feature_names[vectorizer] = vectorizer.get_feature_names_out()
+    return _feature_names[vectorizer]
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first (ties go to the lower index).
+
+    Runs in O(n + k log k): the k best are selected with `np.argpartition` and only they are sorted.
+    """
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+class CorpusQuery:
+    """
+    Top-k document and term queries against a BoW matrix.
+
+    Attributes:
+        bow_vectors: Sparse (documents x terms) count matrix.
+        vectorizer: The vectorizer whose vocabulary indexes the matrix columns.
+        feature_names: The terms of the matrix columns.
+        norms: Norm of every document row.
+    """
+
+    def __init__(self, bow_vectors: sp.spmatrix, vectorizer: CountVectorizer):
+        self.bow_vectors = sp.csr_matrix(bow_vectors)
+        self.vectorizer = vectorizer
+        self.feature_names = feature_names(vectorizer)
+        self.norms = row_norms(self.bow_vectors)
+
+    def similarity_scores(self, query_tokenized: str) -> np.ndarray:
+        """Cosine similarity of the query to every document (0 for empty documents or queries)."""
+        return cosine_scores(self.bow_vectors, self.vectorizer.transform([query_tokenized]), self.norms)
+
+    def top_documents(self, query_tokenized: str, k: int = 10) -> np.ndarray:
+        """Row indices of the k documents most similar to the query, best first."""
+        return top_k_indices(self.similarity_scores(query_tokenized), k)
+
+    def top_terms(self, row: int, k: int = 20) -> List[str]:
+        """The k most frequent terms of a document, read from its sparse row."""
+        start, end = self.bow_vectors.indptr[row], self.bow_vectors.indptr[row + 1]
+        columns = self.bow_vectors.indices[start:end]
+        best = top_k_indices(self.bow_vectors.data[start:end], k)
+        return self.feature_names[columns[best]].tolist()
+
+    def top_terms_per_document(self, rows: Sequence[int], k: int = 20) -> List[List[str]]:
+        return [self.top_terms(row, k) for row in rows]
+
+
+# id(matrix) -> (weak reference to the matrix, vectorizer -> query); sparse matrices are not
+# hashable, so entries are keyed by id and dropped when their matrix is garbage collected
+_corpus_queries: Dict[int, Tuple[weakref.ref, "weakref.WeakKeyDictionary[CountVectorizer, CorpusQuery]"]] = {}
+
+
+def corpus_query(bow_vectors: sp.spmatrix, vectorizer: CountVectorizer) -> CorpusQuery:
+    """The `CorpusQuery` of a matrix and vectorizer, built (and its row norms computed) once."""
+    key = id(bow_vectors)
+    entry = _corpus_queries.get(key)
+    if entry is None or entry[0]() is not bow_vectors:
+        matrix_ref = weakref.ref(bow_vectors, lambda _, key=key: _corpus_queries.pop(key, None))
+        entry = _corpus_queries[key] = (matrix_ref, weakref.WeakKeyDictionary())
+    queries = entry[1]
+    if vectorizer not in queries:
+        queries[vectorizer] = CorpusQuery(bow_vectors, vectorizer)
+    return queries[vectorizer]
@@ -0,0 +1,177 @@
+"""
+Versioned on-disk corpus store.
+
+A store is a directory of plain .npy arrays that can be memory-mapped, so opening it is
+near-instant and single rows can be read without loading the whole corpus:
+
+ - data.npy, indices.npy, indptr.npy: the CSR arrays of the (documents x terms) BoW matrix
+ - vocabulary.npy: the terms, in column order (followed by any token not in the BoW vocabulary)
+ - token_ids.npy, token_offsets.npy: the tokens of every document as vocabulary ids, document `i`
+   being `token_ids[token_offsets[i]:token_offsets[i + 1]]`
+ - documents.npy: the source filename of every row
+ - meta.json: format version and shapes, plus the keys of any derived arrays cached in the store
+
+Nothing is pickled, so stores are safe to share.
+"""
+
+import json
+import numpy as np
+import scipy.sparse as sp
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence, Union
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.logconf import get_logger
+logger = get_logger(__name__)
+logger.info("Logging from the nlp_preprocessing/corpus_store module.")
+
+STORE_FORMAT: str = "axidoc-corpus-store"
+STORE_VERSION: int = 1
+
+META_FILE: str = "meta.json"
+
+
+def save_corpus_store(
+    store_dir: Union[str, Path],
+    bow_vectors: sp.spmatrix,
+    vocabulary: Sequence[str],
+    tokenized_documents: Iterable[str],
+    documents: Optional[Sequence[str]] = None,
+) -> Path:
+    """
+    Writes a BoW matrix, its vocabulary and the tokenized documents to a corpus store.
+
+    Parameters:
+    - store_dir (Union[str, Path]): Directory of the store (created if needed).
+    - bow_vectors (sp.spmatrix): The (documents x terms) count matrix.
+    - vocabulary (Sequence[str]): The terms of the matrix columns, in column order.
+    - tokenized_documents (Iterable[str]): Space-joined tokens of each row.
+    - documents (Optional[Sequence[str]]): Source filename of each row.
+
+    Returns:
+    - Path: The store directory.
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    bow_vectors = sp.csr_matrix(bow_vectors)
+    bow_vectors.sum_duplicates()
+    n_documents, n_terms = bow_vectors.shape
+
+    # Tokens outside the BoW vocabulary get ids after the last column
+    term_ids: Dict[str, int] = {term: i for i, term in enumerate(vocabulary)}
+    terms: List[str] = list(vocabulary)
+    token_ids: List[int] = []
+    token_offsets = [0]
+    for document in tokenized_documents:
+        for token in document.split():
+            if token not in term_ids:
+                term_ids[token] = len(terms)
+                terms.append(token)
+            token_ids.append(term_ids[token])
+        token_offsets.append(len(token_ids))
+    if len(token_offsets) - 1 != n_documents:
+        raise ValueError(f"Got {len(token_offsets) - 1} tokenized documents for {n_documents} matrix rows.")
+
+    index_dtype = np.int32 if max(bow_vectors.nnz, n_terms, len(terms)) < np.iinfo(np.int32).max else np.int64
+    np.save(store_dir / "data.npy", bow_vectors.data.astype(np.int32))
+    np.save(store_dir / "indices.npy", bow_vectors.indices.astype(index_dtype))
+    np.save(store_dir / "indptr.npy", bow_vectors.indptr.astype(np.int64))
+    np.save(store_dir / "vocabulary.npy", np.array(terms, dtype=str))
+    np.save(store_dir / "token_ids.npy", np.array(token_ids, dtype=index_dtype))
+    np.save(store_dir / "token_offsets.npy", np.array(token_offsets, dtype=np.int64))
+    np.save(store_dir / "documents.npy", np.array(documents if documents is not None else [], dtype=str))
+
+    meta = {
+        "format": STORE_FORMAT,
+        "version": STORE_VERSION,
+        "n_documents": n_documents,
+        "n_terms": n_terms,
+        "n_tokens": len(token_ids),
+    }
+    with open(store_dir / META_FILE, "w") as file:
+        json.dump(meta, file, indent=4)
+    logger.info(f"Saved corpus store of {n_documents} documents and {n_terms} terms to {store_dir}.")
+    return store_dir
+
+
+class CorpusStore:
+    """
+    Read access to a corpus store; arrays are memory-mapped unless `mmap` is False.
+
+    Attributes:
+        store_dir: Directory of the store.
+        meta: Format version and shapes.
+        vocabulary: Terms of the BoW columns (`n_terms` of them).
+        documents: Source filename of each row (may be empty).
+    """
+
+    def __init__(self, store_dir: Union[str, Path], mmap: bool = True):
+        self.store_dir = Path(store_dir)
+        with open(self.store_dir / META_FILE, "r") as file:
+            self.meta = json.load(file)
+        if self.meta.get("format") != STORE_FORMAT or self.meta.get("version", 0) > STORE_VERSION:
+            raise ValueError(f"Unsupported corpus store at {store_dir}: {self.meta}.")
+
+        mmap_mode = "r" if mmap else None
+        self._data = np.load(self.store_dir / "data.npy", mmap_mode=mmap_mode)
+        self._indices = np.load(self.store_dir / "indices.npy", mmap_mode=mmap_mode)
+        self._indptr = np.load(self.store_dir / "indptr.npy", mmap_mode=mmap_mode)
+        self._terms = np.load(self.store_dir / "vocabulary.npy", mmap_mode=mmap_mode)
+        self._token_ids = np.load(self.store_dir / "token_ids.npy", mmap_mode=mmap_mode)
+        self._token_offsets = np.load(self.store_dir / "token_offsets.npy", mmap_mode=mmap_mode)
+        self.documents = np.load(self.store_dir / "documents.npy", mmap_mode=mmap_mode)
+        self.vocabulary = self._terms[:self.meta["n_terms"]]
+
+    @property
+    def shape(self):
+        return self.meta["n_documents"], self.meta["n_terms"]
+
+    def __len__(self) -> int:
+        return self.meta["n_documents"]
+
+    @property
+    def matrix(self) -> sp.csr_matrix:
+        """The whole BoW matrix (backed by the memory-mapped arrays)."""
+        return sp.csr_matrix((self._data, self._indices, self._indptr), shape=self.shape, copy=False)
+
+    def rows(self, row_indices: Sequence[int]) -> sp.csr_matrix:
+        """Reads only the given rows of the BoW matrix."""
+        row_indices = np.asarray(row_indices, dtype=np.int64)
+        starts, ends = self._indptr[row_indices], self._indptr[row_indices + 1]
+        indptr = np.concatenate(([0], np.cumsum(ends - starts)))
+        data = np.concatenate([self._data[start:end] for start, end in zip(starts, ends)] or [[]])
+        indices = np.concatenate([self._indices[start:end] for start, end in zip(starts, ends)] or [[]])
+        return sp.csr_matrix((data, indices, indptr), shape=(len(row_indices), self.shape[1]))
+
+    def token_ids(self, row: int) -> np.ndarray:
+        """The vocabulary ids of a document's tokens."""
+        return self._token_ids[self._token_offsets[row]:self._token_offsets[row + 1]]
+
+    def tokens(self, row: int) -> List[str]:
+        """The tokens of a document."""
+        return self._terms[self.token_ids(row)].tolist()
+
+    def tokenized_documents(self) -> Generator[str, None, None]:
+        """Lazily yields the space-joined tokens of every document."""
+        for row in range(len(self)):
+            yield " ".join(self.tokens(row))
+
+    def vectorizer(self) -> CountVectorizer:
+        """A CountVectorizer whose columns are the store's vocabulary (no fitting needed)."""
+        return CountVectorizer(vocabulary={term: i for i, term in enumerate(self.vocabulary.tolist())}).fit([])
+
+    def cached_array(self, name: str, key: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        A derived array cached in the store (e.g. document vectors), or None if it is missing or
+        was computed with a different `key`. Rewriting the store drops every cached array.
+        """
+        if self.meta.get("arrays", {}).get(name) != key:
+            return None
+        return np.load(self.store_dir / f"{name}.npy", mmap_mode="r")
+
+    def save_array(self, name: str, array: np.ndarray, key: Dict[str, Any]) -> None:
+        """Caches a derived array in the store under `name`, tagged with the `key` it was computed with."""
+        np.save(self.store_dir / f"{name}.npy", array)
+        self.meta.setdefault("arrays", {})[name] = key
+        with open(self.store_dir / META_FILE, "w") as file:
+            json.dump(self.meta, file, indent=4)
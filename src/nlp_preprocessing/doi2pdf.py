@@ -4,18 +4,18 @@ import time
 import random
 import logging
 import urllib.parse
-from urllib.parse import urljoin, urlparse
 from pathlib import Path
-import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
 from typing import NamedTuple, Generator, List, Dict, Tuple
 from typing import Optional, Any
 from dotenv import load_dotenv
 
 from constants import JSON_ISSUE_FILE, JSON_UPDATE_FILE, IPS_FILE
-from constants import DOILIST_FILE, DOI_EXCEPTIONS_FILE, DOWNLOAD_DIR
+from constants import DOILIST_FILE, DOI_EXCEPTIONS_FILE, DOWNLOAD_DIR, DOWNLOAD_STATE_FILE
+from browser_pool import BrowserPool
+from downloader import AsyncDownloader, DownloadResult, pdf_url_from_page
+from job_state import JobStateStore
+from retry import ProxyRotation, RetryDecision, RetryScheduler, download_with_retries
+from retry import SUCCESS, PERMANENT
 
 # Load environment variables from .env file
 load_dotenv()
@@ -42,12 +42,6 @@ issue_data: list[Dict[str, str|Articles]] = []
 with open(JSON_ISSUE_FILE, "r") as file:
     issue_data = json.load(file)
 
-def rotate_proxy(ip_list:list[str]) -> Generator[str, None, None]:
-    while True:
-        for ip in ip_list:
-            yield ip
-
-
 def safe_slice(articles:Articles, start:int, end:int) -> Articles:
     """Proposes a fallback slicing in case of IndexError, and tries
     all the sub-slices of the current slice, checking if one of them
@@ -119,28 +113,19 @@ def filter_articles(articles: Articles, criterion: str) -> Articles:
             return articles
 
 
+# Download state (one record per DOI, committed as each download finishes)
+job_state = JobStateStore(DOWNLOAD_STATE_FILE)
+
 # Check if pdf file is already downloaded
 
 def already_downloaded(pdf_filename):
     """Check if pdf file is already downloaded, by
-    looking in the download directory and checking if
-    any filename that can be found there matches the
-    `pdf_filename` argument.
+    looking it up in the download state, or else (for files
+    downloaded before the state was recorded) checking if
+    the file exists in the download directory.
     Note: looks at DOWNLOAD_DIR (a filepath object)
     """
-
-    article_exists = False
-    # Iterate over the files in the download directory
-    for existing_filename in os.listdir(DOWNLOAD_DIR):
-        if existing_filename == pdf_filename:
-            #print("  # FILENAME CHECK")
-            #print("  # ==============")
-            #print(f"pdf_filename: {pdf_filename}")
-            #print(f"existing_filename: {existing_filename}")
-            #print("  # ==============")
-            article_exists = True
-            break
-    return article_exists
+    return job_state.has_file(pdf_filename) or (DOWNLOAD_DIR / pdf_filename).is_file()
 
 # Configure logging
 
@@ -163,28 +148,13 @@ file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(mes
 logger.addHandler(file_handler)
 
 
-# Configure Selenium options
-
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")  # Run Chrome in headless mode
-
-# Create a new Chrome browser instance
-browser = webdriver.Chrome(options=options)
-
 # Load DOI list from file
 with open(DOILIST_FILE, "r") as file:
     doi_list = file.read().splitlines()
 
-# Create a generator to rotate proxies
-proxy_generator = rotate_proxy(IP_LIST)
-
-
 
-# global var for exception logging
-pdf_url_current = ""
-
-# Iterate over each DOI in the list
-#for doi in doi_list:
+# Collect the articles to download: DOI -> (article, issue_id)
+pending_articles: Dict[str, Tuple[Dict[str, str], str]] = {}
 
 # Iterate over each issue in the issue data
 for issue in issue_data:
@@ -209,99 +179,71 @@ for issue in issue_data:
             logger.info(already_exists)
             continue
 
-        # Get the DOI URL for the current article
-        doi:str = article["doi"]
-
-        # Get the next proxy from the generator
-        proxy = next(proxy_generator)
-        options.add_argument(f'--proxy-server={proxy}')
-
-        # Encode the DOI
-        #encoded_doi = urllib.parse.quote(doi)
-        try:
-            url_with_doi = DOI_SOURCE_URL + doi # + encoded_doi
-            logger.info(f"Started searching URL {url_with_doi}.")
-            # Load the source website
-            browser.get(url_with_doi)
-        except Exception as e:
-            wrong_url = f"Error downloading article with DOI {doi} from {pdf_url_current} {issue_id}."
-            wrong_url += f"Unsuccessful attempt to extract pdf url from {DOI_SOURCE_URL}{doi}."
-            logger.error(wrong_url)
-            logger.exception(e)
+        # resume: an article downloaded in an earlier (possibly interrupted) run only needs its fields
+        record = job_state.get(article["doi"])
+        if record is not None and record.done:
+            article["pdf"] = record.filename
+            article["txt"] = record.filename[:-len(".pdf")] + ".txt"
+            logger.info(f"Article already downloaded in an earlier run: {record.filename} {issue_id}.")
             continue
-
-        try:
-            # Get the PDF URL
-            pdf_url = browser.find_element(By.CSS_SELECTOR,'embed#pdf').get_attribute('src')
-            # Example of inital pdf_url string (note: no https prefix & some extra '#navp...'):
-            # "//source.com/journal-article/e08...cc2/lev1936.pdf#navpanes=0&view=FitH"
-
-        except NoSuchElementException:
-            # Handle the case when the PDF URL element is not found
-            logger.info(f"Article likely not stored, since PDF URL not found for DOI: {doi} {issue_id}")
-            EXCEPTIONS.append(doi)
-            continue  # Skip to the next iteration without stopping the loop
-
-        try:
-            # Add the "https://" prefix if necessary
-            if pdf_url is None:
-                continue
-            elif pdf_url.startswith("//"):
-                pdf_url = "https:" + pdf_url
-
-            # Remove any trailing fragment identifier
-            pdf_url = urljoin(pdf_url, urlparse(pdf_url).path)
-            pdf_url_current = pdf_url  # for exception logging
-
-            # Extract filename from PDF URL
-            filename = Path(pdf_url).stem
-            # Modify the output filename format as needed
-            # keep only the doi code
-            doi_domain = "https://doi.org/10.1007/"
-            doi_code:str = ""
-            if doi.startswith(doi_domain):
-                doi_code = doi[len(doi_domain):]
-            else:
-                no_prefix = f"Could not extract prefix '{doi_domain}' from DOI url {issue_id}. "
-                no_prefix += f"Using the entire DOI url {doi} as part of the filename."
-                logger.info(no_prefix)
-                doi_code = doi
-            output_filename = f"{filename}_{doi_code.replace('/', '_')}.pdf"
-            article["pdf"] = output_filename
-            article["txt"] = f"{filename}_{doi_code.replace('/', '_')}.txt"
-
-            # check if we might not already have the pdf file in our pdf store
-            if already_downloaded(article["pdf"]):
-                already_exists = f"Pdf appears to be already downloaded: {article['pdf']} {issue_id}. "
-                already_exists += f"We move on without attempting another download."
-                logger.info(already_exists)
-                continue
-
-            # Download the PDF
-            response = requests.get(pdf_url)
-            # write it into the output file
-            with open(DOWNLOAD_DIR / output_filename, 'wb') as file:  # type: ignore
-                file.write(response.content)  # type: ignore
-
-            SUCCESSES.append(f"  + {issue_id} -- {pdf_url}")
-            logger.info(f"Downloaded article with DOI {doi} from {pdf_url} {issue_id}.")
-            #print(f"Downloaded article with DOI: {doi}")
-
-        except Exception as e:
-            EXCEPTIONS.append(doi)
-            logger.error(f"Error downloading article with DOI {doi} from {pdf_url_current} {issue_id}.")
-            logger.error(f"Unsuccessful attempt to extract pdf url from {DOI_SOURCE_URL}{doi}.")
-            logger.exception(e)
+        # do not spend requests on DOIs that failed permanently (no pdf, 404, ...) in an earlier run
+        if record is not None and record.failure == PERMANENT:
+            logger.info(f"Skipping DOI {article['doi']} {issue_id}: permanent failure ({record.status}) in an earlier run.")
             continue
-            #print(f"Error downloading article with DOI: {doi}")
-            #print(str(e))
-
-# Close the browser and clean up resources
-try:
-    browser.quit()
-except Exception as e:
-    logger.warning("Error while quitting the browser.")
-    logger.exception(e)
+
+        pending_articles[article["doi"]] = (article, issue_id)
+
+
+def record_result(result: DownloadResult, decision: RetryDecision) -> None:
+    """Records a download attempt and, unless it will be retried, updates its article and the
+    success/exception lists."""
+    job_state.record(result, failure=None if decision.result_class == SUCCESS else decision.result_class)
+    if decision.retry_in is not None:
+        return
+    article, issue_id = pending_articles[result.doi]
+    if result.status in ("downloaded", "exists"):
+        article["pdf"] = result.filename
+        article["txt"] = result.filename[:-len(".pdf")] + ".txt"
+    if result.status == "downloaded":
+        SUCCESSES.append(f"  + {issue_id} -- {result.pdf_url}")
+    elif result.status in ("not_found", "failed"):
+        EXCEPTIONS.append(result.doi)
+        logger.info(f"No pdf for DOI {result.doi} {issue_id} ({result.status}, {decision.result_class} "
+                    f"after {decision.attempt} attempts).")
+
+
+# Number of headless browsers resolving article pages in parallel (each with its own proxy)
+BROWSERS: int = 8
+
+
+def read_pdf_url(driver: Any, page_url: str) -> Optional[str]:
+    """Reads the pdf url from the `embed#pdf` element of a page loaded in a browser."""
+    return pdf_url_from_page(driver.page_source, page_url)
+
+
+# Proxies of the pdf downloads (a proxy cools down after a transient failure)
+proxy_rotation = ProxyRotation(IP_LIST)
+# Transient failures (timeouts, 5xx, ...) are retried with backoff; permanent ones are not
+retry_scheduler = RetryScheduler(max_attempts=5, proxy_rotation=proxy_rotation)
+
+# Resolve the pdf urls in a pool of browsers and download the pdf files concurrently
+with BrowserPool(size=BROWSERS, proxies=IP_LIST) as browser_pool:
+    downloader = AsyncDownloader(
+        DOWNLOAD_DIR,
+        source_url=DOI_SOURCE_URL,
+        resolver=lambda page_url: browser_pool.load(page_url, read_pdf_url),
+        exists=already_downloaded,
+        resolve_workers=BROWSERS,
+        proxies=proxy_rotation,
+    )
+    download_with_retries(downloader, pending_articles, retry_scheduler, on_result=record_result)
+
+for result_class, stats in retry_scheduler.report().items():
+    logger.info(f"  # {result_class}: {stats['results']} results ({stats['per_minute']:.1f}/min), "
+                f"{stats['mb']:.1f} MB ({stats['mb_per_minute']:.2f} MB/min)")
+logger.info(f"Retried {retry_scheduler.counts['retried']} times, gave up on {retry_scheduler.counts['gave_up']} DOIs.")
+logger.info(f"Download state by status: {job_state.counts()}")
+job_state.close()
 
 
 ## Successes
@@ -0,0 +1,336 @@
+"""
+Concurrent PDF downloader.
+
+Downloads run as a two-stage asyncio pipeline:
+
+ 1. resolve: fetch an article's page (`DOI_SOURCE_URL + doi`) and find the PDF URL in its
+    `embed#pdf` element (or use any other resolver, e.g. a browser);
+ 2. fetch: stream the PDF to disk in chunks (to a `.part` file, renamed when complete).
+
+Resolved articles are handed from one stage to the other through a queue, so pages are resolved
+while earlier PDFs are still downloading. Blocking `requests` calls run in worker threads and share
+one connection pool (a single `requests.Session`). Resolving is limited by the number of resolve
+workers only (a browser pool resolver has its own limit, one page per browser); PDF fetches are
+also limited per host by semaphores. A `retry_in` hook can put failed DOIs back into the pipeline
+after a delay, while the other DOIs keep going.
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+import itertools
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DOI_DOMAIN: str = "https://doi.org/10.1007/"
+CHUNK_SIZE: int = 1 << 16
+
+# Resolves the page URL of an article to its PDF URL (None if the page has no PDF)
+Resolver = Callable[[str], Optional[str]]
+
+
+class DownloadResult(NamedTuple):
+    """
+    Outcome of downloading the PDF of one DOI.
+
+    Attributes:
+        doi: The DOI URL of the article.
+        status: 'downloaded', 'exists' (already on disk), 'not_found' (no PDF on the page) or 'failed'.
+        pdf_url: The resolved PDF URL, if any.
+        filename: The PDF filename in the download directory, if the PDF URL was resolved.
+        size: Number of bytes written.
+        error: Error message of a failed download.
+        sha256: SHA-256 hex digest of the downloaded PDF.
+        proxy: The proxy the PDF (or, if resolving failed, the article page) was requested through, if any.
+        exception: The exception of a failed download (e.g. to tell transient failures from permanent ones).
+    """
+
+    doi: str
+    status: str
+    pdf_url: Optional[str] = None
+    filename: Optional[str] = None
+    size: int = 0
+    error: Optional[str] = None
+    sha256: Optional[str] = None
+    proxy: Optional[str] = None
+    exception: Optional[BaseException] = None
+
+
+class _PdfEmbedParser(HTMLParser):
+    """Finds the `src` of the `<embed id="pdf">` element of a page."""
+
+    def __init__(self):
+        super().__init__()
+        self.src: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if self.src is None and tag == "embed" and attributes.get("id") == "pdf":
+            self.src = attributes.get("src")
+
+
+def pdf_url_from_page(html: str, page_url: str = "") -> Optional[str]:
+    """The normalized PDF URL embedded in a page (`embed#pdf`), or None."""
+    parser = _PdfEmbedParser()
+    parser.feed(html)
+    if not parser.src:
+        return None
+    src = parser.src if parser.src.startswith("//") else urljoin(page_url, parser.src)
+    return normalize_pdf_url(src)
+
+
+def normalize_pdf_url(pdf_url: str) -> str:
+    """Adds the https: scheme to protocol-relative URLs and removes fragments ('#navpanes=0...')."""
+    if pdf_url.startswith("//"):
+        pdf_url = "https:" + pdf_url
+    return urljoin(pdf_url, urlparse(pdf_url).path)
+
+
+def pdf_filename(pdf_url: str, doi: str) -> str:
+    """The output filename of a PDF: the name of the PDF file followed by the DOI code."""
+    filename = Path(urlparse(pdf_url).path).stem
+    doi_code = doi[len(DOI_DOMAIN):] if doi.startswith(DOI_DOMAIN) else doi
+    return f"{filename}_{doi_code.replace('/', '_')}.pdf"
+
+
+def make_session(pool_size: int = 32) -> requests.Session:
+    """A session whose connection pool is large enough for `pool_size` concurrent requests per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class AsyncDownloader:
+    """
+    Downloads the PDFs of many DOIs concurrently.
+
+    Args:
+        download_dir: Directory the PDFs are written to.
+        source_url: Prefix of the article pages (the DOI is appended).
+        resolver: Blocking function from a page URL to its PDF URL. Defaults to fetching the page
+            with the shared session and reading its `embed#pdf` element.
+        exists: Tells whether a PDF filename was already downloaded. Defaults to checking the file.
+        per_host_limit: Maximum concurrent PDF fetches from any one host.
+        resolve_workers: Number of concurrent page resolutions (e.g. the size of a browser pool).
+        fetch_workers: Number of concurrent PDF downloads.
+        proxies: Proxies ('host:port') rotated over the requests, if any, or an iterator that yields
+            the proxy of each request (e.g. a `retry.ProxyRotation`, which skips proxies cooling down).
+        timeout: Seconds to wait for a server response.
+        chunk_size: Bytes read and written at a time when streaming a PDF.
+    """
+
+    def __init__(
+        self,
+        download_dir: Union[str, Path],
+        source_url: str = "",
+        resolver: Optional[Resolver] = None,
+        exists: Optional[Callable[[str], bool]] = None,
+        per_host_limit: int = 4,
+        resolve_workers: int = 8,
+        fetch_workers: int = 8,
+        proxies: Union[Sequence[str], Iterator] = (),
+        timeout: float = 30,
+        chunk_size: int = CHUNK_SIZE,
+        session: Optional[requests.Session] = None,
+    ):
+        self.download_dir = Path(download_dir)
+        self.source_url = source_url
+        self.resolver = resolver or self.resolve_page
+        self.exists = exists or (lambda filename: (self.download_dir / filename).is_file())
+        self.per_host_limit = per_host_limit
+        self.resolve_workers = resolve_workers
+        self.fetch_workers = fetch_workers
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.session = session or make_session(resolve_workers + fetch_workers)
+        if isinstance(proxies, Iterator):
+            self._proxies: Optional[Iterator] = proxies
+        else:
+            self._proxies = itertools.cycle(proxies) if proxies else None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # threads of the blocking requests, for the duration of a `run`
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def next_proxy(self) -> Optional[str]:
+        return None if self._proxies is None else next(self._proxies)
+
+    @staticmethod
+    def _request_proxies(proxy: Optional[str]) -> Optional[Dict[str, str]]:
+        if proxy is None:
+            return None
+        return {"http": f"http://{proxy}", "https": f"http://{proxy}"}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    async def _in_thread(self, func: Callable, *args):
+        """Runs a blocking call in the threads of the current `run` (the loop's default executor outside of one)."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def resolve_page(self, page_url: str, proxy: Optional[str] = None) -> Optional[str]:
+        """Fetches an article page (through `proxy`, if given) and returns its PDF URL (the default resolver)."""
+        response = self.session.get(page_url, timeout=self.timeout, proxies=self._request_proxies(proxy))
+        response.raise_for_status()
+        return pdf_url_from_page(response.text, page_url)
+
+    def fetch_pdf(self, pdf_url: str, path: Path, proxy: Optional[str] = None) -> Tuple[int, str]:
+        """Streams a PDF to `path` in chunks (through `proxy`, if given); returns the number of bytes written and their SHA-256."""
+        part_path = path.with_name(path.name + ".part")
+        size = 0
+        digest = hashlib.sha256()
+        try:
+            with self.session.get(pdf_url, stream=True, timeout=self.timeout, proxies=self._request_proxies(proxy)) as response:
+                response.raise_for_status()
+                with open(part_path, "wb") as file:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        file.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+        except Exception:
+            # do not leave a partial download behind
+            part_path.unlink(missing_ok=True)
+            raise
+        os.replace(part_path, path)
+        return size, digest.hexdigest()
+
+    async def resolve(self, doi: str) -> DownloadResult:
+        """Stage 1: the PDF URL and filename of a DOI ('resolved' status), or why there is none."""
+        page_url = self.source_url + doi
+        # the default resolver goes through the rotated proxies (a browser pool has its own)
+        proxy = self.next_proxy() if self.resolver == self.resolve_page else None
+        try:
+            if proxy is None:
+                pdf_url = await self._in_thread(self.resolver, page_url)
+            else:
+                pdf_url = await self._in_thread(self.resolve_page, page_url, proxy)
+        except Exception as e:
+            logger.error(f"Could not resolve the PDF URL of {doi} from {page_url}: {e}")
+            return DownloadResult(doi, "failed", error=str(e), proxy=proxy, exception=e)
+        if pdf_url is None:
+            logger.info(f"Article likely not stored, since PDF URL not found for DOI: {doi}")
+            return DownloadResult(doi, "not_found")
+        return DownloadResult(doi, "resolved", pdf_url=pdf_url, filename=pdf_filename(pdf_url, doi))
+
+    async def fetch(self, resolved: DownloadResult) -> DownloadResult:
+        """Stage 2: downloads a resolved PDF, unless it is already on disk."""
+        if self.exists(resolved.filename):
+            logger.info(f"Pdf appears to be already downloaded: {resolved.filename}.")
+            return resolved._replace(status="exists")
+        proxy = self.next_proxy()
+        try:
+            async with self._host_semaphore(resolved.pdf_url):
+                size, sha256 = await self._in_thread(
+                    self.fetch_pdf, resolved.pdf_url, self.download_dir / resolved.filename, proxy
+                )
+        except Exception as e:
+            logger.error(f"Error downloading article with DOI {resolved.doi} from {resolved.pdf_url}: {e}")
+            return resolved._replace(status="failed", error=str(e), proxy=proxy, exception=e)
+        logger.info(f"Downloaded article with DOI {resolved.doi} from {resolved.pdf_url}.")
+        return resolved._replace(status="downloaded", size=size, sha256=sha256, proxy=proxy)
+
+    async def run(
+        self,
+        dois: Iterable[str],
+        on_result: Optional[Callable[[DownloadResult], None]] = None,
+        retry_in: Optional[Callable[[DownloadResult], Optional[float]]] = None,
+    ) -> List[DownloadResult]:
+        """
+        Resolves and downloads all DOIs; `on_result` sees every result as it completes.
+
+        `retry_in` is asked about every result too: if it returns a delay (seconds), the DOI is
+        queued again after that delay, within this run; otherwise the result is final. Returns the
+        final result of each DOI, in completion order.
+        """
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        self._host_semaphores = {}
+        # one pool per run, shut down when the run ends
+        with ThreadPoolExecutor(max_workers=self.resolve_workers + self.fetch_workers) as executor:
+            self._executor = executor
+            try:
+                return await self._run(dois, on_result, retry_in)
+            finally:
+                self._executor = None
+
+    async def _run(
+        self,
+        dois: Iterable[str],
+        on_result: Optional[Callable[[DownloadResult], None]],
+        retry_in: Optional[Callable[[DownloadResult], Optional[float]]],
+    ) -> List[DownloadResult]:
+        loop = asyncio.get_running_loop()
+        doi_queue: asyncio.Queue = asyncio.Queue()
+        resolved_queue: asyncio.Queue = asyncio.Queue(maxsize=2 * self.fetch_workers)
+        results: List[DownloadResult] = []
+        for doi in dois:
+            doi_queue.put_nowait(doi)
+        # DOIs without a final result yet; the resolvers stop once there are none
+        unsettled = doi_queue.qsize()
+
+        def stop_resolvers() -> None:
+            for _ in range(self.resolve_workers):
+                doi_queue.put_nowait(None)
+
+        def record(result: DownloadResult) -> None:
+            nonlocal unsettled
+            if on_result is not None:
+                on_result(result)
+            delay = retry_in(result) if retry_in is not None else None
+            if delay is not None:
+                loop.call_later(delay, doi_queue.put_nowait, result.doi)
+                return
+            results.append(result)
+            unsettled -= 1
+            if not unsettled:
+                stop_resolvers()
+
+        if not unsettled:
+            stop_resolvers()
+
+        async def resolve_worker() -> None:
+            while True:
+                doi = await doi_queue.get()
+                if doi is None:
+                    return
+                result = await self.resolve(doi)
+                if result.status == "resolved":
+                    await resolved_queue.put(result)
+                else:
+                    record(result)
+
+        async def fetch_worker() -> None:
+            while True:
+                resolved = await resolved_queue.get()
+                if resolved is None:
+                    return
+                record(await self.fetch(resolved))
+
+        async def resolve_all() -> None:
+            # every DOI has a final result once the resolvers stop, so the fetchers are idle by then
+            await asyncio.gather(*(resolve_worker() for _ in range(self.resolve_workers)))
+            for _ in range(self.fetch_workers):
+                await resolved_queue.put(None)
+
+        # a failing worker fails the run instead of leaving the other workers waiting
+        await asyncio.gather(resolve_all(), *(fetch_worker() for _ in range(self.fetch_workers)))
+        return results
+
+    def download_all(
+        self, dois: Iterable[str], on_result: Optional[Callable[[DownloadResult], None]] = None
+    ) -> List[DownloadResult]:
+        """Blocking entry point: runs the pipeline in a new event loop."""
+        return asyncio.run(self.run(dois, on_result))
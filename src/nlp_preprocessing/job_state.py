@@ -0,0 +1,177 @@
+"""
+Persistent state of the PDF downloads, keyed by DOI.
+
+The state lives in a SQLite database in WAL mode: every download result is committed as soon as
+it arrives (so a crash loses at most the downloads in flight, and a restart skips everything
+already done), and "is this DOI/file already downloaded?" is an indexed lookup instead of a scan
+of the download directory.
+"""
+
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Statuses of a DOI whose PDF is on disk
+DONE_STATUSES = ("downloaded", "exists")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    doi TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pdf_url TEXT,
+    filename TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    sha256 TEXT,
+    error TEXT,
+    failure TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_filename ON jobs (filename);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+
+class JobRecord(NamedTuple):
+    """
+    State of the download of one DOI.
+
+    Attributes:
+        doi: The DOI URL of the article.
+        status: Status of the last attempt (see `DownloadResult.status`).
+        attempts: Number of attempts so far.
+        pdf_url: The resolved PDF URL, if any.
+        filename: The PDF filename in the download directory, if any.
+        size: Size of the downloaded PDF in bytes.
+        sha256: SHA-256 hex digest of the downloaded PDF.
+        error: Error message of the last failed attempt.
+        failure: Class of the last failure ('transient' or 'permanent', see retry.py), if known.
+        created_at: Time of the first attempt (UTC, ISO 8601).
+        updated_at: Time of the last attempt (UTC, ISO 8601).
+    """
+
+    doi: str
+    status: str
+    attempts: int
+    pdf_url: Optional[str]
+    filename: Optional[str]
+    size: int
+    sha256: Optional[str]
+    error: Optional[str]
+    failure: Optional[str]
+    created_at: str
+    updated_at: str
+
+    @property
+    def done(self) -> bool:
+        return self.status in DONE_STATUSES
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class JobStateStore:
+    """
+    SQLite store of `JobRecord`s. Safe to use from several threads (one shared connection,
+    guarded by a lock).
+
+    Args:
+        path: Database file (created if missing).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode, NORMAL still never corrupts the database; a power loss may drop the last commits
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")]
+        if "failure" not in columns:
+            # databases written before failures were classified
+            self._connection.execute("ALTER TABLE jobs ADD COLUMN failure TEXT")
+        self._connection.commit()
+
+    def get(self, doi: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(JobRecord._fields)} FROM jobs WHERE doi = ?", (doi,)
+            ).fetchone()
+        return JobRecord(*row) if row else None
+
+    def is_done(self, doi: str) -> bool:
+        """Whether the PDF of `doi` was downloaded (or found on disk)."""
+        record = self.get(doi)
+        return record is not None and record.done
+
+    def has_file(self, filename: str) -> bool:
+        """Whether a finished download wrote (or found) `filename`."""
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT 1 FROM jobs WHERE filename = ? AND status IN ({', '.join('?' * len(DONE_STATUSES))}) LIMIT 1",
+                (filename, *DONE_STATUSES),
+            ).fetchone()
+        return row is not None
+
+    def record(self, result: Any, failure: Optional[str] = None) -> JobRecord:
+        """
+        Stores the result of an attempt (a `downloader.DownloadResult`, with the class of its
+        failure, if any) and commits it; returns the DOI's updated record.
+        """
+        now = utc_now()
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO jobs (doi, status, attempts, pdf_url, filename, size, sha256, error, failure,
+                                  created_at, updated_at)
+                VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (doi) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = attempts + 1,
+                    pdf_url = COALESCE(excluded.pdf_url, pdf_url),
+                    filename = COALESCE(excluded.filename, filename),
+                    size = excluded.size,
+                    sha256 = COALESCE(excluded.sha256, sha256),
+                    error = excluded.error,
+                    failure = excluded.failure,
+                    updated_at = excluded.updated_at
+                """,
+                (result.doi, result.status, result.pdf_url, result.filename, result.size,
+                 result.sha256, result.error, failure, now, now),
+            )
+            self._connection.commit()
+        return self.get(result.doi)  # type: ignore
+
+    def records(self, status: Optional[str] = None) -> List[JobRecord]:
+        query = f"SELECT {', '.join(JobRecord._fields)} FROM jobs"
+        with self._lock:
+            if status is None:
+                rows = self._connection.execute(query).fetchall()
+            else:
+                rows = self._connection.execute(query + " WHERE status = ?", (status,)).fetchall()
+        return [JobRecord(*row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of DOIs per status."""
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "JobStateStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,227 @@
+"""
+HTTP-first page resolver.
+
+Journal pages (the volumes-and-issues list, issue pages) are mostly static HTML, so they are
+first fetched with a plain HTTP request over a pooled `requests.Session`. A headless browser
+(see browser_pool.py) is only used for a page whose HTML lacks the elements the parser needs
+(e.g. when the content is rendered by javascript, or the server answers with a challenge
+page); the browsers are started the first time that happens.
+
+Run this module to benchmark the HTTP path against saved HTML fixtures (served locally):
+
+    python src/nlp_preprocessing/page_resolver.py src/nlp_preprocessing/utils/sample.html
+"""
+
+import sys
+import time
+import logging
+import itertools
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import requests
+
+from downloader import make_session
+
+logger = logging.getLogger(__name__)
+
+# Elements an issue page needs: the article cards and their author lists
+ISSUE_PAGE_SELECTORS: Tuple[str, ...] = ("li.c-list-group__item", "ul.c-author-list")
+# Elements the volumes-and-issues page needs: the list of issues
+VOLUMES_PAGE_SELECTORS: Tuple[str, ...] = ("li.c-list-group__item",)
+
+# Creates the fallback browsers (a `BrowserPool`, not yet started) when they are first needed
+BrowserPoolFactory = Callable[[], Any]
+
+
+class _SelectorParser(HTMLParser):
+    """Finds which of the `tag.class` selectors match some element of a page."""
+
+    def __init__(self, selectors: Sequence[str]):
+        super().__init__()
+        self.pending: Dict[str, List[str]] = {}
+        for selector in selectors:
+            tag, _, css_class = selector.partition(".")
+            self.pending.setdefault(tag, []).append(css_class)
+        self.found: Set[str] = set()
+
+    def handle_starttag(self, tag, attrs):
+        css_classes = self.pending.get(tag)
+        if not css_classes:
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        for css_class in list(css_classes):
+            if not css_class or css_class in classes:
+                self.found.add(f"{tag}.{css_class}" if css_class else tag)
+                css_classes.remove(css_class)
+
+
+def missing_selectors(html: str, selectors: Sequence[str]) -> List[str]:
+    """The `tag.class` selectors that match no element of `html`."""
+    parser = _SelectorParser(selectors)
+    parser.feed(html)
+    parser.close()
+    return [selector for selector in selectors if selector not in parser.found]
+
+
+class PageResolver:
+    """
+    Gets the HTML of pages over HTTP, falling back to a browser when the expected elements
+    are missing.
+
+    Args:
+        selectors: `tag.class` selectors the HTML must contain to be used as is.
+        proxies: Proxies ('host:port') rotated over the HTTP requests.
+        browser_pool_factory: Creates the fallback browser pool, e.g.
+            `lambda: BrowserPool(size=2, proxies=proxies)`; called at most once, on the first
+            fallback. Without it, a page missing the selectors is an error.
+        session: HTTP session (by default `downloader.make_session(workers)`, as for the PDF downloads).
+        workers: Number of pages fetched in parallel by `map`.
+        timeout: Timeout of the HTTP requests (seconds).
+    """
+
+    def __init__(
+        self,
+        selectors: Sequence[str] = ISSUE_PAGE_SELECTORS,
+        proxies: Sequence[str] = (),
+        browser_pool_factory: Optional[BrowserPoolFactory] = None,
+        session: Optional[requests.Session] = None,
+        workers: int = 8,
+        timeout: float = 30,
+    ):
+        self.selectors = tuple(selectors)
+        self.workers = workers
+        self.timeout = timeout
+        self.session = session or make_session(workers)
+        self.browser_pool_factory = browser_pool_factory
+        self._proxies = itertools.cycle(proxies) if proxies else None
+        self._lock = threading.Lock()
+        self._browser_pool: Optional[Any] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # pages resolved over 'http' and in a 'browser'
+        self.stats: Counter = Counter()
+
+    def _request_proxies(self) -> Optional[Dict[str, str]]:
+        if self._proxies is None:
+            return None
+        with self._lock:
+            proxy = next(self._proxies)
+        return {"http": f"http://{proxy}", "https": f"http://{proxy}"}
+
+    def browser_pool(self) -> Any:
+        """The fallback browsers (started on first use)."""
+        with self._lock:
+            if self._browser_pool is None:
+                logger.info("Starting the fallback browsers.")
+                self._browser_pool = self.browser_pool_factory().start()
+            return self._browser_pool
+
+    def fetch(self, url: str) -> Optional[str]:
+        """The HTML of a page over HTTP, or None if the request fails."""
+        try:
+            response = self.session.get(url, proxies=self._request_proxies(), timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.info(f"HTTP request for {url} failed: {e}")
+            return None
+        return response.text
+
+    def resolve(self, url: str) -> str:
+        """The HTML of a page: over HTTP if it has all the selectors, otherwise from a browser."""
+        html = self.fetch(url)
+        missing = list(self.selectors) if html is None else missing_selectors(html, self.selectors)
+        if not missing:
+            with self._lock:
+                self.stats["http"] += 1
+            return html
+        if self.browser_pool_factory is None:
+            raise ValueError(f"No {', '.join(missing)} in the HTML of {url}, and no browser to fall back to.")
+        logger.info(f"No {', '.join(missing)} in the HTML of {url}; loading it in a browser.")
+        html = self.browser_pool().load(url)
+        with self._lock:
+            self.stats["browser"] += 1
+        return html
+
+    def map(self, urls: Iterable[str]) -> Iterator[Future]:
+        """Resolves pages `workers` at a time and returns their futures, in order."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="page")
+        return iter([self._executor.submit(self.resolve, url) for url in urls])
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._browser_pool is not None:
+            self._browser_pool.close()
+            self._browser_pool = None
+        self.session.close()
+        logger.info(f"Pages resolved over HTTP: {self.stats['http']}, in a browser: {self.stats['browser']}.")
+
+    def __enter__(self) -> "PageResolver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def benchmark(fixtures: Sequence[str], repeat: int = 50, selectors: Sequence[str] = ISSUE_PAGE_SELECTORS,
+              browser_pool_factory: Optional[BrowserPoolFactory] = None) -> List[Dict[str, Any]]:
+    """
+    Times resolving saved HTML pages served from a local HTTP server, over HTTP (fetch and
+    selector check) and, if `browser_pool_factory` is given, in browsers.
+    Returns one row per mode with the mean milliseconds per page.
+    """
+    import shutil
+    import tempfile
+    from functools import partial
+    from pathlib import Path
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    with tempfile.TemporaryDirectory() as root:
+        names = []
+        for i, fixture in enumerate(fixtures):
+            names.append(f"{i}-{Path(fixture).name}")
+            shutil.copy(fixture, Path(root) / names[-1])
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=root))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls = [f"http://127.0.0.1:{server.server_port}/{name}" for name in names] * repeat
+
+        modes = [("http", selectors)]
+        if browser_pool_factory is not None:
+            # no page has this element, so every page falls back to a browser
+            modes.append(("browser", ("no.such-element",)))
+        rows = []
+        try:
+            for mode, mode_selectors in modes:
+                with PageResolver(mode_selectors, browser_pool_factory=browser_pool_factory, workers=1) as resolver:
+                    start = time.perf_counter()
+                    for url in urls:
+                        resolver.resolve(url)
+                    elapsed = time.perf_counter() - start
+                rows.append({"mode": mode, "pages": len(urls), "ms_per_page": 1000 * elapsed / len(urls),
+                             "http": resolver.stats["http"], "browser": resolver.stats["browser"]})
+        finally:
+            server.shutdown()
+            server.server_close()
+    return rows
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    fixtures = sys.argv[1:] or ["src/nlp_preprocessing/utils/sample.html"]
+    with_browser = "--browser" in fixtures
+    fixtures = [fixture for fixture in fixtures if fixture != "--browser"]
+    factory = None
+    if with_browser:
+        from browser_pool import BrowserPool
+        factory = lambda: BrowserPool(size=1)
+    for row in benchmark(fixtures, browser_pool_factory=factory):
+        logger.info(f"{row['mode']}: {row['pages']} pages, {row['ms_per_page']:.2f} ms/page")
@@ -0,0 +1,246 @@
+"""
+Retries of failed DOI downloads.
+
+Failures are classified as
+
+ - permanent: the article page has no `embed#pdf` (status 'not_found') or the server answers
+   400/404/410/451; retrying would only waste crawl budget, so these are given up at once;
+ - transient: timeouts, connection errors, 5xx, 429 and anything unexpected; these are
+   rescheduled with jittered exponential backoff, up to `max_attempts` attempts per DOI.
+
+A transient failure also puts the proxy it went through (of the page or the PDF request) on a
+(growing) cooldown, during which `ProxyRotation` hands out the other proxies. Throughput is reported per class.
+"""
+
+import time
+import heapq
+import random
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "success"
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# Statuses of a successful download (see `downloader.DownloadResult.status`)
+SUCCESS_STATUSES = ("downloaded", "exists")
+# HTTP statuses after which the same request will not succeed
+PERMANENT_HTTP_STATUSES = frozenset({400, 404, 410, 451})
+
+
+def failure_class(error: Optional[BaseException]) -> str:
+    """TRANSIENT or PERMANENT, for the exception of a failed download."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        if error.response.status_code in PERMANENT_HTTP_STATUSES:
+            return PERMANENT
+    # timeouts, connection errors, 5xx, 429, errors of the browsers, ...
+    return TRANSIENT
+
+
+def result_class(result: Any) -> str:
+    """SUCCESS, TRANSIENT or PERMANENT, for a `downloader.DownloadResult`."""
+    if result.status in SUCCESS_STATUSES:
+        return SUCCESS
+    if result.status == "not_found":
+        return PERMANENT
+    return failure_class(result.exception)
+
+
+class ProxyRotation:
+    """
+    Round-robin over proxies that skips the ones cooling down after a transient failure.
+    Each consecutive failure of a proxy doubles its cooldown (up to `max_cooldown` seconds);
+    a success ends it. If every proxy is cooling down, the one that is ready first is used.
+    """
+
+    def __init__(self, proxies: Sequence[str], base_cooldown: float = 30, max_cooldown: float = 600,
+                 clock: Callable[[], float] = time.monotonic):
+        if not proxies:
+            raise ValueError("ProxyRotation needs at least one proxy.")
+        self.proxies = list(proxies)
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self._failures: Counter = Counter()
+        self._ready_at: Dict[str, float] = {}
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> "ProxyRotation":
+        return self
+
+    def __next__(self) -> str:
+        with self._lock:
+            now = self.clock()
+            n = len(self.proxies)
+            for i in range(n):
+                proxy = self.proxies[(self._position + i) % n]
+                if self._ready_at.get(proxy, 0) <= now:
+                    self._position = (self._position + i + 1) % n
+                    return proxy
+            return min(self.proxies, key=lambda proxy: self._ready_at[proxy])
+
+    def penalize(self, proxy: str) -> float:
+        """Starts (or extends) the cooldown of a proxy; returns its length in seconds."""
+        with self._lock:
+            self._failures[proxy] += 1
+            cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (self._failures[proxy] - 1))
+            self._ready_at[proxy] = self.clock() + cooldown
+        return cooldown
+
+    def reward(self, proxy: str) -> None:
+        with self._lock:
+            self._failures.pop(proxy, None)
+            self._ready_at.pop(proxy, None)
+
+    def cooling(self) -> List[str]:
+        """The proxies currently cooling down."""
+        now = self.clock()
+        with self._lock:
+            return [proxy for proxy, ready_at in self._ready_at.items() if ready_at > now]
+
+
+class RetryDecision(NamedTuple):
+    """
+    What the scheduler makes of a download result.
+
+    Attributes:
+        result_class: SUCCESS, TRANSIENT or PERMANENT.
+        attempt: Number of attempts of the DOI so far (including this one).
+        retry_in: Seconds until the DOI is tried again, or None if it is not retried.
+    """
+
+    result_class: str
+    attempt: int
+    retry_in: Optional[float] = None
+
+
+class RetryScheduler:
+    """
+    Queue of DOIs to retry after transient failures.
+
+    Args:
+        max_attempts: Attempts per DOI after which a transient failure is given up.
+        base_delay: Backoff before the first retry (seconds); it doubles with every attempt.
+        max_delay: Upper bound of the backoff (seconds).
+        proxy_rotation: Proxies to put on cooldown after transient failures, if any.
+        rng: Source of the jitter (each delay is drawn from [backoff / 2, backoff]).
+        clock: Monotonic time in seconds.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 5, max_delay: float = 600,
+                 proxy_rotation: Optional[ProxyRotation] = None, rng: Optional[random.Random] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.proxy_rotation = proxy_rotation
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self.attempts: Counter = Counter()
+        self._queue: List[tuple] = []
+        self._counter = 0
+        # per class: results, bytes; plus 'retried' and 'gave_up'
+        self.counts: Counter = Counter()
+        self.bytes: Counter = Counter()
+        self._started = clock()
+
+    def delay(self, attempt: int) -> float:
+        """Jittered exponential backoff after the `attempt`-th failed attempt."""
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return self.rng.uniform(backoff / 2, backoff)
+
+    def record(self, result: Any, queue: bool = True) -> RetryDecision:
+        """
+        Classifies a result, updates the proxy cooldowns and reschedules transient failures:
+        on the scheduler's queue (see `due`), unless `queue` is False because the caller waits
+        out `retry_in` itself.
+        """
+        self.attempts[result.doi] += 1
+        attempt = self.attempts[result.doi]
+        cls = result_class(result)
+        self.counts[cls] += 1
+        self.bytes[cls] += result.size
+        if result.proxy is not None and self.proxy_rotation is not None:
+            if cls == TRANSIENT:
+                cooldown = self.proxy_rotation.penalize(result.proxy)
+                logger.info(f"Proxy {result.proxy} cools down for {cooldown:.0f} s.")
+            else:
+                self.proxy_rotation.reward(result.proxy)
+        if cls != TRANSIENT:
+            return RetryDecision(cls, attempt)
+        if attempt >= self.max_attempts:
+            self.counts["gave_up"] += 1
+            logger.info(f"Giving up on {result.doi} after {attempt} attempts: {result.error}")
+            return RetryDecision(cls, attempt)
+        retry_in = self.delay(attempt)
+        if queue:
+            self._counter += 1
+            heapq.heappush(self._queue, (self.clock() + retry_in, self._counter, result.doi))
+        self.counts["retried"] += 1
+        logger.info(f"Retrying {result.doi} in {retry_in:.1f} s (attempt {attempt} failed: {result.error}).")
+        return RetryDecision(cls, attempt, retry_in)
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def next_due(self) -> Optional[float]:
+        """Clock time of the next retry, if any."""
+        return self._queue[0][0] if self._queue else None
+
+    def due(self) -> List[str]:
+        """Takes the DOIs whose retry time has come off the queue."""
+        now = self.clock()
+        dois = []
+        while self._queue and self._queue[0][0] <= now:
+            dois.append(heapq.heappop(self._queue)[2])
+        return dois
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per class: number of results, results per minute, and MB (per minute) of PDFs."""
+        minutes = max(self.clock() - self._started, 1e-9) / 60
+        return {
+            cls: {
+                "results": self.counts[cls],
+                "per_minute": self.counts[cls] / minutes,
+                "mb": self.bytes[cls] / 1e6,
+                "mb_per_minute": self.bytes[cls] / 1e6 / minutes,
+            }
+            for cls in (SUCCESS, TRANSIENT, PERMANENT)
+        }
+
+
+async def run_with_retries(
+    downloader: Any, dois: Iterable[str], scheduler: RetryScheduler,
+    on_result: Optional[Callable[[Any, RetryDecision], None]] = None,
+) -> List[Any]:
+    """
+    Downloads the DOIs with an `AsyncDownloader`. Each result goes to the scheduler as soon as it
+    completes, and a transient failure is requeued in the same run once its own backoff is over,
+    so slow hosts do not hold back the retries of the other DOIs. `on_result` sees every attempt
+    with the scheduler's decision; returns the final result of each DOI.
+    """
+
+    def retry_in(result: Any) -> Optional[float]:
+        decision = scheduler.record(result, queue=False)
+        if on_result is not None:
+            on_result(result, decision)
+        return decision.retry_in
+
+    return await downloader.run(dois, retry_in=retry_in)
+
+
+def download_with_retries(
+    downloader: Any, dois: Iterable[str], scheduler: RetryScheduler,
+    on_result: Optional[Callable[[Any, RetryDecision], None]] = None,
+) -> List[Any]:
+    """Blocking entry point of `run_with_retries`."""
+    return asyncio.run(run_with_retries(downloader, dois, scheduler, on_result))
@@ -0,0 +1,79 @@
+"""
+Batched semantic similarity between a reference text and every corpus document.
+
+A document's mean word vector is its BoW row times the (terms x dim) matrix of term vectors,
+divided by the number of its tokens that have a vector. The whole corpus is done with one
+sparse-dense product, cached in the corpus store, and scored against a reference vector
+with one normalized matrix-vector product (`axidoc.similarity.cosine_scores`).
+"""
+
+import numpy as np
+import scipy.sparse as sp
+import spacy
+from typing import Dict, Sequence, Tuple
+
+from src.logconf import get_logger
+from src.axidoc.similarity import cosine_scores
+from src.nlp_preprocessing.corpus_store import CorpusStore
+logger = get_logger(__name__)
+logger.info("Logging from the nlp_preprocessing/semantic module.")
+
+DOCUMENT_VECTORS: str = "document_vectors"
+
+
+def vectors_key(nlp: spacy.language.Language) -> Dict[str, object]:
+    """Identifies the word vectors of a pipeline, to tag cached document vectors with."""
+    return {
+        "model": f"{nlp.meta.get('lang')}_{nlp.meta.get('name')}-{nlp.meta.get('version')}",
+        "vectors": list(nlp.vocab.vectors.shape),
+    }
+
+
+def term_vectors(terms: Sequence[str], nlp: spacy.language.Language) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Looks up the word vector of every term.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (terms x dim) float32 vectors (zero rows for terms
+            without a vector) and the boolean mask of terms that have one.
+    """
+    vectors = nlp.vocab.vectors
+    keys = np.array([nlp.vocab.strings[term] for term in terms], dtype=np.uint64)
+    rows = vectors.find(keys=keys) if len(keys) else np.array([], dtype=np.int64)
+    has_vector = rows >= 0
+    matrix = np.zeros((len(terms), vectors.shape[1]), dtype=np.float32)
+    matrix[has_vector] = np.asarray(vectors.data)[rows[has_vector]]
+    return matrix, has_vector
+
+
+def document_mean_vectors(bow_vectors: sp.spmatrix, terms: Sequence[str], nlp: spacy.language.Language) -> np.ndarray:
+    """Mean word vector of every document (zero for documents without any vector)."""
+    matrix, has_vector = term_vectors(terms, nlp)
+    bow_vectors = sp.csr_matrix(bow_vectors, dtype=np.float32)
+    sums = np.asarray(bow_vectors @ matrix)
+    counts = np.asarray(bow_vectors @ has_vector.astype(np.float32)).ravel()
+    return np.divide(sums, counts[:, None], out=np.zeros_like(sums), where=counts[:, None] > 0)
+
+
+def load_document_vectors(store: CorpusStore, nlp: spacy.language.Language) -> np.ndarray:
+    """The documents' mean vectors, computed on first use and then read from the corpus store."""
+    key = vectors_key(nlp)
+    document_vectors = store.cached_array(DOCUMENT_VECTORS, key)
+    if document_vectors is None:
+        logger.info(f"Computing document vectors for {len(store)} documents.")
+        document_vectors = document_mean_vectors(store.matrix, store.vocabulary.tolist(), nlp)
+        store.save_array(DOCUMENT_VECTORS, document_vectors, key)
+    return document_vectors
+
+
+def reference_vector(tokenized_text: str, nlp: spacy.language.Language) -> np.ndarray:
+    """Mean word vector of a space-joined token string (zero if none of its tokens has a vector)."""
+    matrix, has_vector = term_vectors(tokenized_text.split(), nlp)
+    if not has_vector.any():
+        return np.zeros(matrix.shape[1], dtype=np.float32)
+    return matrix[has_vector].mean(axis=0)
+
+
+def semantic_similarity_scores(document_vectors: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every document vector to the reference; 0 where either has no vector."""
+    return cosine_scores(document_vectors, reference)
@@ -0,0 +1,94 @@
+"""
+Streaming tokenization of the text corpus.
+
+Files are read lazily and fed to `nlp.pipe` in batches, optionally over several processes,
+with every pipeline component disabled: only the tokenizer's lexical attributes (`text`,
+`is_stop`, `is_alpha`) are needed. Tokenized documents are written out as they are produced
+(one JSON line per file), so the corpus is never held in memory.
+"""
+
+import os
+import json
+import spacy
+from pathlib import Path
+from typing import Generator, Iterable, List, Optional, Tuple, Union
+from spacy.tokens import Doc
+
+from src.logconf import get_logger
+logger = get_logger(__name__)
+logger.info("Logging from the nlp_preprocessing/tokenization module.")
+
+TOKENIZER_BATCH_SIZE: int = 16
+TOKENIZER_PROCESSES: int = max(1, (os.cpu_count() or 1) - 1)
+
+
+def document_tokens(doc: Doc) -> List[str]:
+    """Lower-cased alphabetic tokens longer than three characters, without stop words."""
+    return [
+        token.text.lower()
+        for token in doc
+        if not token.is_stop and token.is_alpha and len(token) > 3
+    ]
+
+
+def iter_corpus_texts(
+    directory: Union[str, Path], filenames: Optional[Iterable[str]] = None
+) -> Generator[Tuple[str, str], None, None]:
+    """Lazily reads `(text, filename)` pairs of the .txt files of a directory; unreadable files are skipped."""
+    if filenames is None:
+        filenames = sorted(filename for filename in os.listdir(directory) if filename.endswith(".txt"))
+    for filename in filenames:
+        try:
+            with open(os.path.join(directory, filename), "r", encoding="utf-8") as file:
+                yield file.read(), filename
+        except Exception:
+            logger.error(f"Failed to read file {filename}")
+
+
+def stream_tokenize(
+    nlp: spacy.language.Language,
+    texts: Iterable[Tuple[str, str]],
+    batch_size: int = TOKENIZER_BATCH_SIZE,
+    n_process: int = TOKENIZER_PROCESSES,
+) -> Generator[Tuple[str, List[str]], None, None]:
+    """
+    Tokenizes `(text, filename)` pairs with `nlp.pipe`, yielding `(filename, tokens)` in input order.
+
+    All pipeline components (tagger, parser, NER, ...) are disabled while tokenizing.
+    """
+    with nlp.select_pipes(disable=nlp.pipe_names):
+        for doc, filename in nlp.pipe(texts, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            yield filename, document_tokens(doc)
+
+
+def tokenize_corpus(
+    directory: Union[str, Path],
+    output_path: Union[str, Path],
+    nlp: spacy.language.Language,
+    batch_size: int = TOKENIZER_BATCH_SIZE,
+    n_process: int = TOKENIZER_PROCESSES,
+) -> int:
+    """
+    Tokenizes the .txt files of a directory into a JSON-lines file, one `{"file", "tokens"}` per line.
+
+    Each document is written as soon as it is tokenized.
+
+    Returns:
+        int: Number of tokenized documents.
+    """
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as output:
+        for filename, tokens in stream_tokenize(nlp, iter_corpus_texts(directory), batch_size, n_process):
+            output.write(json.dumps({"file": filename, "tokens": " ".join(tokens)}) + "\n")
+            count += 1
+            if count % 100 == 0:
+                logger.info(f"Tokenized {count} documents.")
+    logger.info(f"Tokenized {count} documents from {directory} into {output_path}.")
+    return count
+
+
+def iter_tokenized_documents(path: Union[str, Path]) -> Generator[str, None, None]:
+    """Lazily reads the space-joined tokens of each document written by `tokenize_corpus`."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            yield json.loads(line)["tokens"]
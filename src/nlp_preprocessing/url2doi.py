@@ -10,11 +10,12 @@ import re
 import json
 import logging
 from typing import Optional, Tuple, NamedTuple, List, Dict, Any
-from selenium import webdriver
 from bs4 import BeautifulSoup  # type: ignore
 from collections import namedtuple
 
 from accessors import update_issue
+from browser_pool import BrowserPool
+from page_resolver import PageResolver, ISSUE_PAGE_SELECTORS
 from constants import IPS_FILE, JSON_ISSUE_FILE, JSON_UPDATE_FILE
 
 # CHANING INPUT AND OUTPUT FILES
@@ -216,18 +217,10 @@ def write_list(lines: List[str], file_path: str) -> None:
     with open(file_path, "w") as file:
         file.writelines(line + "\n" for line in lines)
 
-def rotate_proxy(ip_list):
-    while True:
-        for ip in ip_list:
-            yield ip
-
-
-# Configure Selenium options
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")  # Run Chrome in headless mode
-
-# Create a new Chrome browser instance
-browser = webdriver.Chrome(options=options)
+# Number of issue pages fetched over HTTP in parallel
+HTTP_WORKERS: int = 8
+# Number of headless browsers (each with its own proxy) for pages that need one
+BROWSERS: int = 2
 
 Articles = list[Dict[str,str]]
 
@@ -236,15 +229,22 @@ issue_data: list[Dict[str, str|Articles]] = []
 with open(JSON_ISSUE_FILE, "r") as file:
     issue_data = json.load(file)
 
-# Create a generator to rotate proxies
-proxy_generator = rotate_proxy(IP_LIST)
+# Queue all issue pages: fetched over HTTP, or loaded in a browser (started only if
+# needed) when the HTML lacks the article cards or author lists
+page_resolver = PageResolver(
+    ISSUE_PAGE_SELECTORS,
+    proxies=IP_LIST,
+    browser_pool_factory=lambda: BrowserPool(size=BROWSERS, proxies=IP_LIST),
+    workers=HTTP_WORKERS,
+)
+issue_pages = page_resolver.map(issue["url"] for issue in issue_data)
 
 # Initialize a list to store all DOIs
 ALL_DOIS = []
 EXCEPTIONS:list[Dict[str, str|Articles]] = []
 
-# Iterate over each issue in the issue data
-for issue in issue_data:
+# Iterate over each issue in the issue data (pages load in the background, in parallel)
+for issue, issue_page in zip(issue_data, issue_pages):
 
     # get existing issue fileds
     volume = issue["volume"]
@@ -266,15 +266,8 @@ for issue in issue_data:
     #logger.info(f"Starting checking Vol. {volume} Issue {issue_number} ...")
 
     try:
-        # Get the next proxy from the generator
-        proxy = next(proxy_generator)
-        options.add_argument(f'--proxy-server={proxy}')
-
-        # Load the URL with Selenium
-        browser.get(url)
-
-        # Get the page source (HTML) from Selenium
-        html = browser.page_source
+        # Get the page source (HTML) of the issue
+        html = issue_page.result()
 
         # Apply the function to extract DOIs & authors from the HTML
         dois_n_authors, empty_values = doisnauthors(html)
@@ -313,12 +306,12 @@ for issue in issue_data:
         logger.info(summary)
 
     except Exception as e:
-        logger.error(f"Error processing issue {volume}-{issue_number} with proxy {proxy}.")
+        logger.error(f"Error processing issue {volume}-{issue_number}.")
         logger.exception(e)
         EXCEPTIONS.append(issue)
 
-# Close the driver
-browser.quit()
+# Close the HTTP session (and the browsers, if any were started)
+page_resolver.close()
 
 ## Doi list
 
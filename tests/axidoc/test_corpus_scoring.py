@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from axidoc import corpus_scoring
+from axidoc.doctypes import DocumentWrapper, SimRepresentation, WindowProp, WindowRepresentation
+
+
+class InProcessPool:
+    """Stands in for multiprocessing.Pool: runs the initializer and the tasks in this process."""
+
+    def __init__(self, processes=None, initializer=None, initargs=()):
+        initializer(*initargs)
+
+    def imap_unordered(self, func, iterable, chunksize=1):
+        return map(func, iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+def fake_document_wrapper(text, comparison_text, window_prop):
+    """One window per word, scored by word length; BoW leaves words of three letters or less unscored."""
+    words = text.split()
+
+    def representation(min_length):
+        return SimRepresentation(None, window_repr=[
+            WindowRepresentation(None, (i, i + 1), len(word) / 10 if len(word) >= min_length else None)
+            for i, word in enumerate(words)
+        ])
+
+    assert comparison_text == "profile of the values text" and window_prop.window_size == 20
+    return DocumentWrapper(None, bow=representation(4), glove=representation(0), word2vec=representation(0))
+
+
+@pytest.fixture
+def stubbed_models(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(corpus_scoring.multiprocessing, "Pool", InProcessPool)
+    monkeypatch.setattr(corpus_scoring, "get_vector_table", loaded.append)
+    monkeypatch.setattr(corpus_scoring, "reference_text", lambda reference: f"{reference} text")
+    monkeypatch.setattr(corpus_scoring, "get_reference_profile", lambda text: f"profile of the {text}")
+    monkeypatch.setattr(corpus_scoring, "text_to_document_wrapper", fake_document_wrapper)
+    return loaded
+
+
+def test_summarize_document():
+    record = corpus_scoring.summarize_document(
+        "corpus/a.txt", fake_document_wrapper("to measure values", "profile of the values text", WindowProp(20)), 2
+    )
+    assert record["file"] == "a.txt" and record["n_windows"] == 3
+    assert record["scores"]["bow"] == {"max": 0.7, "mean": pytest.approx(0.65)}
+    assert record["top_windows"]["bow"] == [[1, 2, 0.7], [2, 3, 0.6]]
+    assert record["top_windows"]["glove"] == [[1, 2, 0.7], [2, 3, 0.6]]
+
+    empty = corpus_scoring.summarize_document(
+        "b.txt", fake_document_wrapper("of it", "profile of the values text", WindowProp(20)), 2
+    )
+    assert empty["scores"]["bow"] is None and empty["top_windows"]["bow"] == []
+
+
+def test_score_corpus_streams_jsonl_records(tmp_path, stubbed_models):
+    corpus = tmp_path / "txt"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("to measure values", encoding="utf-8")
+    (corpus / "b.txt").write_text("objectivity", encoding="utf-8")
+    (corpus / "c.txt").mkdir()  # unreadable
+    output = tmp_path / "scores.jsonl"
+
+    failures = corpus_scoring.score_corpus(str(corpus), str(output), workers=1, top_k=1)
+
+    assert failures == 1
+    assert stubbed_models == ["glove", "word2vec"], "The worker should open each vector model once"
+    records = {record["file"]: record for record in map(json.loads, output.read_text().splitlines())}
+    assert set(records) == {"a.txt", "b.txt", "c.txt"}
+    assert records["a.txt"]["top_windows"]["word2vec"] == [[1, 2, 0.7]]
+    assert records["b.txt"]["scores"]["glove"] == {"max": 1.1, "mean": 1.1}
+    assert set(records["c.txt"]) == {"file", "error"}
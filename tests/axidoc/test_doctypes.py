@@ -2,9 +2,10 @@ import sys
 print(sys.path)
 
 
+import numpy as np
 import pytest
 
-from axidoc.doctypes import sorted_windows_scores
+from axidoc.doctypes import sorted_windows_scores, top_window_indices
 from axidoc.repr import text_to_document_wrapper
 from axidoc.constants import values_text, objectivity_text
 from tests.test_utils import text_with_values, text_wo_values
@@ -90,3 +91,25 @@ def test_max_near_min_for_text_wo_values_glove():
     max_score = sorted_doc.glove.window_repr[0].similarity_score
        
     assert max_score - min_score >= SIMILARITY_THRESHOLD, "Threshold is not met (glove)"
+
+
+def test_top_k_windows_match_full_sort():
+    document_wrapper = text_to_document_wrapper(
+        text=text_with_values, comparison_text=values_text,
+    )
+    sorted_doc = sorted_windows_scores(document_wrapper)
+    top_doc = sorted_windows_scores(document_wrapper, top_k=3)
+    for rep_type in ["bow", "word2vec", "glove"]:
+        top_windows = getattr(top_doc, rep_type).window_repr
+        sorted_windows = getattr(sorted_doc, rep_type).window_repr
+        assert len(top_windows) == 3
+        assert [(w.pos, w.similarity_score) for w in top_windows] == [
+            (w.pos, w.similarity_score) for w in sorted_windows[:3]
+        ]
+
+
+def test_windows_without_scores():
+    scores = np.array([0.5, np.nan, 0.9, 0.5])
+    assert top_window_indices(scores).tolist() == [2, 0, 3, 1]
+    assert top_window_indices(scores, top_k=2).tolist() == [2, 0]
+    assert top_window_indices(np.array([np.nan]), top_k=2).tolist() == []
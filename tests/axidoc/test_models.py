@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import spacy
+
+from src.axidoc import models
+from axidoc import repr as axidoc_repr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_imports_do_not_load_models():
+    # in a fresh interpreter, since other tests load the models into this one
+    script = (
+        "import spacy\n"
+        "spacy.load = lambda *args, **kwargs: exit('A model was loaded at import')\n"
+        "import axidoc.repr, axidoc.constants\n"
+        "from src.axidoc import models\n"
+        "assert not models.loaded_models() and not models._vector_tables\n"
+    )
+    pythonpath = os.pathsep.join(os.path.join(ROOT, path) for path in (".", "src", "src/axidoc"))
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": pythonpath},
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_first_access_loads_model_once(monkeypatch):
+    loads = []
+
+    def load(path):
+        loads.append(path)
+        time.sleep(0.05)  # let the other threads ask for the model meanwhile
+        return spacy.blank("en")
+
+    monkeypatch.setenv("MODEL_GLOVE_PRUNED_500K", "/fake/glove")
+    monkeypatch.setattr(models, "_models", {})
+    monkeypatch.setattr(models.spacy, "load", load)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        loaded = list(executor.map(lambda _: axidoc_repr.nlp_glove, range(4)))
+
+    assert loads == ["/fake/glove"], "The model should be loaded exactly once"
+    assert all(model is loaded[0] for model in loaded)
+    assert axidoc_repr.nlp_glove is loaded[0] and models.loaded_models() == {"glove": loaded[0]}
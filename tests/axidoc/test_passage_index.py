@@ -0,0 +1,44 @@
+import numpy as np
+import spacy
+
+from axidoc import passage_index
+from axidoc.doctypes import WindowProp
+from axidoc.passage_index import PassageIndex
+from axidoc.vector_store import VectorTable
+from axidoc.repr import segment
+from tests.test_utils import text_with_values
+
+
+def test_query_matches_window_scan(tmp_path):
+    nlp = spacy.blank("en")
+    file_path = tmp_path / "doc.txt"
+    file_path.write_text(text_with_values, encoding="utf-8")
+    terms = ["values", "psychological", "critics", "measures"]
+    window_prop = WindowProp(window_size=20, window_shift=10)
+
+    PassageIndex.build([str(file_path)], terms, window_prop, nlp=nlp).save(tmp_path / "index")
+    index = PassageIndex.load(tmp_path / "index")
+
+    expected = {}
+    for window in segment(nlp(text_with_values), window_prop):
+        count = sum(token.lower_ in terms for token in window.content)
+        if count:
+            expected[(window.start_pos, window.end_pos)] = count
+    passages = index.query(terms, k=1000)
+    assert {(p.start_pos, p.end_pos): p.score for p in passages} == expected
+    assert [p.score for p in passages] == sorted(expected.values(), reverse=True)
+    assert index.query(["unindexed"]) == []
+
+
+def test_similar_terms(tmp_path, monkeypatch):
+    nlp = spacy.blank("en")
+    for word, vector in [("fairness", [1, 0]), ("equality", [1, 1]), ("freedom", [-1, 0])]:
+        nlp.vocab.set_vector(word, np.array(vector, dtype=np.float32))
+    monkeypatch.setattr(passage_index, "get_vector_table", lambda model: VectorTable.from_spacy(nlp))
+    file_path = tmp_path / "doc.txt"
+    file_path.write_text("fairness and equality, freedom or qwertyuiop", encoding="utf-8")
+    index = PassageIndex.build([str(file_path)], ["freedom", "qwertyuiop", "equality", "fairness"], nlp=nlp)
+
+    # terms without a vector (and the opposite direction) are never similar
+    assert index.similar_terms("fairness") == ["fairness", "equality"]
+    assert index.similar_terms("qwertyuiop") == []
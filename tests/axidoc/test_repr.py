@@ -0,0 +1,101 @@
+import pickle
+
+import numpy as np
+import pytest
+import spacy
+from sklearn.feature_extraction.text import CountVectorizer
+
+from axidoc.doctypes import Window, WindowProp, densify
+from axidoc import repr as axidoc_repr
+from axidoc.repr import (
+    nlp_glove, representation_func, segment, get_reference_profile,
+    batch_window_representations, fixed_window_representations, parse_text, token_vector_matrix,
+    text_to_document_wrapper
+)
+from axidoc.vector_store import export_vector_table, open_vector_table
+from axidoc.constants import values_text, objectivity_text
+from tests.test_utils import text_with_values
+
+
+@pytest.mark.parametrize("window_size, window_shift", [(20, 10), (7, 3), (5, 9), (1, 1), (None, None)])
+def test_fixed_windows_match_segmented_windows(window_size, window_shift):
+    doc = nlp_glove(text_with_values)
+    vectorizer = CountVectorizer()
+    vectorizer.fit([text_with_values, values_text])
+    comparison_representations = representation_func(values_text, vectorizer)
+    window_prop = WindowProp(window_size=window_size, window_shift=window_shift)
+
+    prefix_sum_reprs = fixed_window_representations(doc, window_prop, vectorizer, comparison_representations)
+    segmented_reprs = batch_window_representations(
+        doc, segment(doc, window_prop), vectorizer, comparison_representations
+    )
+
+    for rep_type in ["bow", "glove", "word2vec"]:
+        assert len(prefix_sum_reprs[rep_type]) == len(segmented_reprs[rep_type])
+        for fast, slow in zip(prefix_sum_reprs[rep_type], segmented_reprs[rep_type]):
+            assert fast.pos == slow.pos, f"Window positions differ ({rep_type})"
+            assert fast.similarity_score == pytest.approx(slow.similarity_score, abs=1e-6)
+            assert np.allclose(densify(fast.arr), densify(slow.arr)), f"Window arrays differ ({rep_type})"
+
+
+def test_reference_profiles_are_cached_by_content(monkeypatch):
+    monkeypatch.setattr(axidoc_repr, "REFERENCE_PROFILE_CACHE_SIZE", 1)
+    values_profile = get_reference_profile(values_text)
+    assert get_reference_profile(str(values_text)) is values_profile, "Profile should be reused"
+
+    # The least recently used profile is evicted
+    get_reference_profile(objectivity_text)
+    assert get_reference_profile(values_text) is not values_profile, "Profile should have been evicted"
+
+
+@pytest.fixture
+def vector_model(tmp_path):
+    """A blank model with vectors for two words, and its exported vector table."""
+    nlp = spacy.blank("en")
+    rng = np.random.default_rng(0)
+    for word in ["fairness", "freedom"]:
+        nlp.vocab.set_vector(word, rng.normal(size=8).astype(np.float32))
+    export_vector_table(nlp, tmp_path / "vectors")
+    return nlp, open_vector_table(tmp_path / "vectors")
+
+
+def test_token_vector_matrix(vector_model):
+    nlp, table = vector_model
+    # parsed with another vocab than the table's: tokens are looked up by their orth hash
+    doc = parse_text("fairness and freedom qwertyuiop")
+    assert doc.vocab is not nlp.vocab
+
+    matrix = token_vector_matrix(doc, table)
+    assert matrix.shape == (4, 8)
+    assert np.array_equal(matrix[[0, 2]], [nlp.vocab.get_vector("fairness"), nlp.vocab.get_vector("freedom")])
+    assert not matrix[[1, 3]].any(), "Out-of-vocabulary tokens should get a zero vector"
+    assert token_vector_matrix(doc[1:1], table).shape == (0, 8)
+
+
+def test_empty_window_scores_zero(vector_model, monkeypatch):
+    _, table = vector_model
+    monkeypatch.setattr(axidoc_repr, "get_vector_table", lambda name: table)
+    doc = parse_text("fairness and freedom qwertyuiop")
+    vectorizer = CountVectorizer().fit(["fairness and freedom qwertyuiop"])
+    windows = [Window(doc[0:1], 0, 8), Window(doc[1:1], 9, 9), Window(doc[3:4], 22, 32)]
+
+    views = batch_window_representations(doc, windows, vectorizer, representation_func("fairness", vectorizer))
+    glove = views["glove"]
+    assert glove[0].similarity_score == pytest.approx(1.0)
+    assert glove[1].similarity_score == 0, "An empty window should score 0"
+    assert glove[2].similarity_score == 0, "A window of out-of-vocabulary tokens should score 0"
+    assert densify(glove[1].arr).shape == (0, 8)
+
+
+@pytest.mark.parametrize("window_prop", [WindowProp(window_size=20, window_shift=10), WindowProp(window_type="paragraph")])
+def test_document_wrapper_can_be_pickled(window_prop):
+    wrapper = text_to_document_wrapper(text_with_values, values_text, window_prop)
+    unpickled = pickle.loads(pickle.dumps(wrapper))
+
+    for rep_type in ["bow", "glove", "word2vec"]:
+        windows, unpickled_windows = getattr(wrapper, rep_type).window_repr, getattr(unpickled, rep_type).window_repr
+        assert len(unpickled_windows) == len(windows) > 0
+        for window, unpickled_window in zip(windows, unpickled_windows):
+            assert unpickled_window.pos == window.pos
+            assert unpickled_window.similarity_score == window.similarity_score
+            assert np.array_equal(densify(unpickled_window.arr), densify(window.arr))
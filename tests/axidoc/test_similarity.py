@@ -0,0 +1,25 @@
+import numpy as np
+from scipy import sparse
+from sklearn.metrics.pairwise import cosine_similarity
+
+from axidoc.similarity import cosine, cosine_matrix, cosine_scores
+
+
+def test_kernels_match_sklearn():
+    rng = np.random.default_rng(0)
+    matrix, other, vector = rng.normal(size=(6, 5)), rng.normal(size=(4, 5)), rng.normal(size=5)
+    expected = cosine_similarity(matrix, [vector]).ravel()
+
+    assert np.isclose(cosine(matrix[0], vector), expected[0], atol=1e-6)
+    assert np.allclose(cosine_scores(matrix, vector), expected, atol=1e-6)
+    assert np.allclose(cosine_scores(sparse.csr_matrix(matrix), sparse.csr_matrix(vector)), expected, atol=1e-6)
+    assert np.allclose(cosine_matrix(matrix, other), cosine_similarity(matrix, other), atol=1e-6)
+    assert cosine_scores(matrix, vector).dtype == np.float32
+
+
+def test_vectors_without_direction_score_zero():
+    matrix = np.array([[1.0, 0.0], [0.0, 0.0], [np.nan, 1.0]])
+    assert cosine_scores(matrix, np.array([1.0, 1.0])).tolist() == [np.float32(np.sqrt(0.5)), 0.0, 0.0]
+    assert cosine_scores(matrix, np.zeros(2)).tolist() == [0.0, 0.0, 0.0]
+    assert cosine(np.array([np.nan, 1.0]), np.array([1.0, 1.0])) == 0.0
+    assert cosine_matrix(matrix, matrix)[1].tolist() == [0.0, 0.0, 0.0]
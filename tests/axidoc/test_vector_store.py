@@ -0,0 +1,77 @@
+import numpy as np
+import spacy
+
+from axidoc.vector_store import VectorTable, export_vector_table, open_vector_table, load_tokenizer, quantize_table
+
+
+def make_model():
+    nlp = spacy.blank("en")
+    rng = np.random.default_rng(0)
+    for word in ["fairness", "equality", "freedom", "utility"]:
+        nlp.vocab.set_vector(word, rng.normal(size=8).astype(np.float32))
+    return nlp
+
+
+def test_exported_table_matches_spacy_vectors(tmp_path):
+    nlp = make_model()
+    export_vector_table(nlp, tmp_path / "glove")
+    table = open_vector_table(tmp_path / "glove")
+
+    assert isinstance(table.vectors, np.memmap), "Vectors should be memory-mapped"
+    doc = load_tokenizer(tmp_path / "glove").make_doc("fairness and freedom")
+    matrix = table.lookup([token.orth for token in doc])
+    expected = np.array([token.vector for token in nlp("fairness and freedom")])
+    assert np.array_equal(matrix, expected), "Lookups should match the SpaCy token vectors"
+    assert not matrix[1].any(), "Tokens without a vector should get a zero vector"
+
+
+def test_float16_export_is_close_to_float32(tmp_path):
+    nlp = make_model()
+    export_vector_table(nlp, tmp_path / "glove16", dtype="float16")
+    table = open_vector_table(tmp_path / "glove16")
+
+    assert table.vectors.dtype == np.float16
+    assert np.allclose(table.get_vector("equality"), nlp.vocab.get_vector("equality"), atol=1e-2)
+
+
+def test_int8_export_uses_row_scales(tmp_path):
+    nlp = make_model()
+    export_vector_table(nlp, tmp_path / "glove8", dtype="int8")
+    table = open_vector_table(tmp_path / "glove8")
+
+    assert table.vectors.dtype == np.int8 and table.scales is not None
+    original = nlp.vocab.get_vector("utility")
+    assert np.abs(table.get_vector("utility") - original).max() <= np.abs(original).max() / 127
+
+
+def test_quantizing_an_int8_table_starts_from_its_dequantized_vectors(tmp_path):
+    nlp = make_model()
+    export_vector_table(nlp, tmp_path / "glove8", dtype="int8")
+    table = open_vector_table(tmp_path / "glove8")
+    words = [nlp.vocab.strings["fairness"], nlp.vocab.strings["freedom"]]
+
+    baseline = quantize_table(table, "float32")
+    assert baseline.scales is None and baseline.meta["dtype"] == "float32"
+    assert np.array_equal(baseline.lookup(words), table.lookup(words)), \
+        "A float32 copy of an int8 table should hold the scaled vectors"
+    assert np.allclose(quantize_table(table, "float16").lookup(words), table.lookup(words), atol=1e-2)
+    assert np.allclose(quantize_table(table, "int8").lookup(words), table.lookup(words), atol=1e-6)
+
+
+def test_find_missing_keys():
+    nlp = make_model()
+    table = VectorTable.from_spacy(nlp)
+    keys = sorted(table.keys.tolist())
+    missing = [0, keys[0] + 1, keys[-1] + 1, 2 ** 64 - 1]  # before, between and after the stored keys
+    rows = table.find([keys[0]] + missing + [keys[-1]])
+
+    assert rows[0] >= 0 and rows[-1] >= 0
+    assert rows[1:-1].tolist() == [-1] * len(missing)
+    assert not table.lookup(missing).any()
+
+
+def test_find_in_an_empty_table():
+    table = VectorTable.from_spacy(spacy.blank("en"))
+    assert len(table) == 0
+    assert table.find([1, 2]).tolist() == [-1, -1] and table.find([]).tolist() == []
+    assert table.lookup([1, 2]).shape == (2, table.dim) and not table.lookup([1, 2]).any()
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+# the vocabulary module as imported by axidoc.repr (its default vocabulary is the one repr uses)
+from src.axidoc import vocabulary
+from axidoc.doctypes import WindowProp, window_scores
+from axidoc.repr import get_reference_profile, reference_vectorizer, text_to_document_wrapper
+from axidoc.constants import values_text
+from tests.test_utils import text_with_values
+
+
+@pytest.fixture
+def vocabulary_file(tmp_path, monkeypatch):
+    """Points the default vocabulary at a temporary file and resets the cached default around the test."""
+    file_path = tmp_path / "corpus_vocabulary.txt"
+    monkeypatch.setattr(vocabulary, "CORPUS_VOCABULARY_FILE", str(file_path))
+    vocabulary.default_corpus_vocabulary.cache_clear()
+    yield file_path
+    vocabulary.default_corpus_vocabulary.cache_clear()
+
+
+def test_save_and_load(tmp_path):
+    corpus_vocabulary = vocabulary.build_corpus_vocabulary(
+        ["values science values", "science method", "ethics"], min_df=1
+    )
+    vocabulary.save_corpus_vocabulary(corpus_vocabulary, str(tmp_path / "vocabulary.txt"))
+    loaded = vocabulary.load_corpus_vocabulary(str(tmp_path / "vocabulary.txt"))
+
+    assert loaded.terms.tolist() == ["ethics", "method", "science", "values"]
+    assert loaded.vectorizer.transform(["values values ethics unknown"]).toarray().tolist() == [[1, 0, 0, 2]]
+    assert vocabulary.build_corpus_vocabulary(["a values", "b values science"], min_df=2).terms.tolist() == ["values"]
+
+
+def test_default_vocabulary_is_loaded_once(vocabulary_file):
+    vocabulary_file.write_text("values\nscience\n\n", encoding="utf-8")
+    default = vocabulary.default_corpus_vocabulary()
+    assert default.terms.tolist() == ["science", "values"]
+
+    vocabulary_file.write_text("ethics\n", encoding="utf-8")
+    assert vocabulary.default_corpus_vocabulary() is default, "The file should only be read once"
+    vocabulary.default_corpus_vocabulary.cache_clear()
+    assert vocabulary.default_corpus_vocabulary().terms.tolist() == ["ethics"]
+
+
+def test_missing_vocabulary_file(vocabulary_file):
+    assert vocabulary.default_corpus_vocabulary() is None
+
+
+def test_corpus_vocabulary_keeps_bow_scores(vocabulary_file):
+    # the default (missing corpus vocabulary) is the vocabulary of the text and the reference
+    window_prop = WindowProp(window_size=20, window_shift=10)
+    per_reference = text_to_document_wrapper(text_with_values, values_text, window_prop)
+
+    # a corpus vocabulary with every term of both texts (and more) gives the same cosine scores
+    terms = reference_vectorizer(get_reference_profile(values_text), text_with_values).get_feature_names_out().tolist()
+    corpus_vocabulary = vocabulary.corpus_vocabulary_from_terms(terms + ["zygote", "zymurgy"])
+    shared = text_to_document_wrapper(text_with_values, values_text, window_prop, vocabulary=corpus_vocabulary)
+
+    expected, scores = window_scores(per_reference.bow.window_repr), window_scores(shared.bow.window_repr)
+    assert len(scores) == len(expected) > 0
+    assert np.allclose(scores, expected, equal_nan=True)
+    assert shared.bow.doc_representation.shape[1] == len(terms) + 2
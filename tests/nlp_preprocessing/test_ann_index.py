@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from src.nlp_preprocessing.ann_index import IVFIndex, brute_force_search, load_or_build, normalize_rows
+
+
+def test_ivf_search_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    vectors[3] = 0  # a document without vectors
+    IVFIndex.build(vectors, n_lists=10).save(tmp_path)
+    index = IVFIndex.load(tmp_path)
+
+    query = vectors[7]
+    exact_ids, exact_scores = brute_force_search(normalize_rows(vectors), query, 5)
+    # probing every list is exact
+    ids, scores = index.search(query, 5, n_probe=10)
+    assert ids.tolist() == exact_ids.tolist()
+    assert np.allclose(scores, exact_scores)
+    assert ids[0] == 7
+
+    ids, _ = index.search(query, 5, n_probe=2)
+    assert len(ids) == 5
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(100, 8)).astype(np.float32)
+    IVFIndex.build(vectors, n_lists=4).save(tmp_path)
+    assert IVFIndex.load(tmp_path, vectors=vectors).matches(vectors)
+
+    rewritten = vectors.copy()
+    rewritten[5] += 1  # a document's vector changed
+    grown = np.vstack([vectors, rng.normal(size=(1, 8)).astype(np.float32)])
+    for matrix in (rewritten, grown):
+        with pytest.raises(ValueError, match="stale"):
+            IVFIndex.load(tmp_path, vectors=matrix)
+
+    index = load_or_build(tmp_path, grown, n_lists=4)
+    assert len(index) == 101 and index.search(grown[100], 1, n_probe=4)[0].tolist() == [100]
+    assert IVFIndex.load(tmp_path, vectors=grown).source == index.source
+    assert load_or_build(tmp_path / "missing", vectors, n_lists=4).matches(vectors)
@@ -3,20 +3,13 @@ from pathlib import Path
 from src.nlp_preprocessing import bow
 
 def test_file_paths():
-    # Validate bow_vectors.pkl
-    bow_vectors_path = Path(bow.bow_vectors_path)
-    assert bow_vectors_path.exists(), f"{bow_vectors_path} does not exist."
-    assert bow_vectors_path.stat().st_size > 0, f"{bow_vectors_path} is empty."
-
-    # Validate vectorizer.pkl
-    vectorizer_path = Path(bow.vectorizer_path)
-    assert vectorizer_path.exists(), f"{vectorizer_path} does not exist."
-    assert vectorizer_path.stat().st_size > 0, f"{vectorizer_path} is empty."
-
-    # Validate tokenized_docs.pkl
-    tokenized_docs_path = Path(bow.tokenized_docs_path)
-    assert tokenized_docs_path.exists(), f"{tokenized_docs_path} does not exist."
-    assert tokenized_docs_path.stat().st_size > 0, f"{tokenized_docs_path} is empty."
+    # Validate the corpus store
+    corpus_store_path = Path(bow.corpus_store_path)
+    assert corpus_store_path.is_dir(), f"{corpus_store_path} does not exist."
+    for filename in ["meta.json", "data.npy", "indices.npy", "indptr.npy", "vocabulary.npy", "token_ids.npy"]:
+        file_path = corpus_store_path / filename
+        assert file_path.exists(), f"{file_path} does not exist."
+        assert file_path.stat().st_size > 0, f"{file_path} is empty."
 
     # Validate the directory containing tokenized documents
     directory = Path(bow.directory)
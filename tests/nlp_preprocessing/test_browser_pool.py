@@ -0,0 +1,70 @@
+import threading
+
+from src.nlp_preprocessing.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """Stands in for a webdriver; drivers on the 'bad' proxy fail every page."""
+
+    created = []
+    barrier = None
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.page_source = ""
+        self.quit_called = False
+        FakeDriver.created.append(self)
+
+    def get(self, url):
+        if self.proxy.startswith("bad"):
+            raise RuntimeError("proxy refused the connection")
+        if FakeDriver.barrier is not None:
+            FakeDriver.barrier.wait()  # only passes when all browsers are loading a page at once
+        self.page_source = f"<html>{url} via {self.proxy}</html>"
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_pages_load_in_parallel():
+    FakeDriver.created, FakeDriver.barrier = [], threading.Barrier(3, timeout=5)
+    urls = [f"https://example.org/issue/{i}" for i in range(9)]
+    with BrowserPool(size=3, proxies=["good:1", "good:2", "good:3"], driver_factory=FakeDriver) as pool:
+        pages = [future.result(timeout=10) for future in pool.map(urls)]
+
+    assert all(url in page for url, page in zip(urls, pages))
+    assert sorted(driver.proxy for driver in FakeDriver.created) == ["good:1", "good:2", "good:3"]
+    assert all(driver.quit_called for driver in FakeDriver.created)
+
+
+def test_failing_browsers_are_recycled():
+    FakeDriver.created, FakeDriver.barrier = [], None
+    with BrowserPool(size=1, proxies=["bad:1", "good:2"], driver_factory=FakeDriver, max_failures=1) as pool:
+        page = pool.load("https://example.org/issue/1")
+
+    assert page == "<html>https://example.org/issue/1 via good:2</html>"
+    assert pool.recycled == 1
+    assert [driver.proxy for driver in FakeDriver.created] == ["bad:1", "good:2"]
+
+
+def test_close_waits_for_retries():
+    FakeDriver.created, FakeDriver.barrier = [], None
+    closing = threading.Event()
+
+    class FlakyDriver(FakeDriver):
+        failed = False
+
+        def get(self, url):
+            if not FlakyDriver.failed:
+                closing.wait(timeout=5)  # fail only once close() has been called
+                FlakyDriver.failed = True
+                raise RuntimeError("timed out")
+            super().get(url)
+
+    pool = BrowserPool(size=1, proxies=["good:1"], driver_factory=FlakyDriver).start()
+    future = pool.submit("https://example.org/issue/1")
+    threading.Timer(0.2, closing.set).start()
+    pool.close()
+
+    assert future.result(timeout=5) == "<html>https://example.org/issue/1 via good:1</html>"
+    assert FakeDriver.created[0].quit_called
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+import spacy
+
+from src.nlp_preprocessing import corpus_index
+from src.nlp_preprocessing.corpus_index import CorpusIndex
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    return spacy.blank("en")
+
+
+def write(directory, filename, text):
+    with open(directory / filename, "w", encoding="utf-8") as file:
+        file.write(text)
+
+
+def build(tmp_path, directory, nlp, name):
+    index = CorpusIndex(tmp_path / name)
+    summary = index.update(directory, nlp, n_process=1)
+    index.save()
+    return index, summary
+
+
+def file_counts(index):
+    """{filename: {term: count}} of the rows of an index."""
+    counts = {}
+    for filename, record in index.manifest.items():
+        row = index.bow_vectors[record["row"]]
+        counts[filename] = {index.terms[column]: count for column, count in zip(row.indices, row.data)}
+    return counts
+
+
+def used_terms(index):
+    return {index.terms[column] for column in index.bow_vectors.nonzero()[1]}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    directory = tmp_path / "txt"
+    directory.mkdir()
+    write(directory, "a.txt", "Objectivity and neutrality in measurement theory")
+    write(directory, "b.txt", "Values shape scientific measurement")
+    write(directory, "c.txt", "Latent class models and latent structure")
+    return directory
+
+
+def assert_matches_scratch(tmp_path, directory, nlp, index):
+    scratch, _ = build(tmp_path, directory, nlp, "scratch")
+    assert file_counts(index) == file_counts(scratch)
+    assert used_terms(index) == set(scratch.terms)
+    # the incremental vocabulary is append-only: it keeps every term of the scratch build
+    assert set(scratch.terms) <= set(index.terms)
+    reloaded = CorpusIndex(index.index_dir)
+    assert file_counts(reloaded) == file_counts(index) and reloaded.terms == index.terms
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path, corpus, nlp, monkeypatch):
+    index, summary = build(tmp_path, corpus, nlp, "index")
+    assert summary == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+
+    hashed = []
+    monkeypatch.setattr(corpus_index, "file_hash", lambda path: hashed.append(path) or "")
+    assert CorpusIndex(tmp_path / "index").update(corpus, nlp, n_process=1)["unchanged"] == 3
+    assert hashed == []
+    assert_matches_scratch(tmp_path, corpus, nlp, index)
+
+
+def test_added_modified_and_deleted_files(tmp_path, corpus, nlp, monkeypatch):
+    build(tmp_path, corpus, nlp, "index")
+    write(corpus, "d.txt", "Fairness between groups of examinees")
+    write(corpus, "a.txt", "Objectivity revisited with fairness")
+    os.remove(corpus / "c.txt")
+
+    hashed = []
+    original_hash = corpus_index.file_hash
+    monkeypatch.setattr(corpus_index, "file_hash", lambda path: hashed.append(path) or original_hash(path))
+    index = CorpusIndex(tmp_path / "index")
+    summary = index.update(corpus, nlp, n_process=1)
+    index.save()
+
+    assert summary == {"added": 1, "updated": 1, "removed": 1, "unchanged": 1}
+    # each new or modified file is hashed once
+    assert sorted(os.path.basename(path) for path in hashed) == ["a.txt", "d.txt"]
+    assert index.manifest["a.txt"]["sha256"] == original_hash(corpus / "a.txt")
+    assert "c.txt" not in index.manifest
+    assert_matches_scratch(tmp_path, corpus, nlp, index)
+
+
+def test_empty_corpus(tmp_path, nlp):
+    directory = tmp_path / "empty"
+    directory.mkdir()
+    index, summary = build(tmp_path, directory, nlp, "index")
+
+    assert summary == {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    bow_vectors, vectorizer, tokenized_documents = index.bow_data()
+    assert bow_vectors.shape == (0, 0) and vectorizer is None and tokenized_documents == []
+    assert CorpusIndex(tmp_path / "index").bow_vectors.shape == (0, 0)
@@ -0,0 +1,43 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from src.nlp_preprocessing.corpus_query import CorpusQuery, corpus_query, top_k_indices
+
+DOCUMENTS = [
+    "values science objectivity values",
+    "science science method data",
+    "theory values ethics",
+    "",
+    "data data data model model theory",
+]
+
+
+def test_top_k_indices():
+    scores = np.array([0.2, 0.9, 0.1, 0.9, 0.5])
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 4]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 4, 0, 2]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_queries_match_dense_computation():
+    vectorizer = CountVectorizer()
+    bow_vectors = vectorizer.fit_transform(DOCUMENTS)
+    query = CorpusQuery(bow_vectors, vectorizer)
+
+    expected = cosine_similarity(vectorizer.transform(["values ethics science"]), bow_vectors)[0]
+    assert np.allclose(query.similarity_scores("values ethics science"), expected)
+    assert query.top_documents("values ethics science", 2).tolist() == [0, 2]
+
+    assert query.top_terms(4, 2) == ["data", "model"]
+    assert query.top_terms(3, 5) == []
+
+
+def test_corpus_query_is_built_once():
+    vectorizer = CountVectorizer()
+    bow_vectors = vectorizer.fit_transform(DOCUMENTS)
+    query = corpus_query(bow_vectors, vectorizer)
+
+    assert corpus_query(bow_vectors, vectorizer) is query
+    assert corpus_query(bow_vectors[:2], vectorizer) is not query
+    assert corpus_query(bow_vectors, CountVectorizer().fit(DOCUMENTS)) is not query
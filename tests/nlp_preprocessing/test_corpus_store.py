@@ -0,0 +1,42 @@
+import json
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from src.nlp_preprocessing.corpus_store import CorpusStore, save_corpus_store
+
+DOCUMENTS = ["values science objectivity", "science science method", "theory values"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    vectorizer = CountVectorizer()
+    bow_vectors = vectorizer.fit_transform(DOCUMENTS)
+    save_corpus_store(
+        tmp_path / "store", bow_vectors, vectorizer.get_feature_names_out(), DOCUMENTS, ["a.txt", "b.txt", "c.txt"]
+    )
+    return CorpusStore(tmp_path / "store"), vectorizer, bow_vectors
+
+
+def test_round_trip(store):
+    corpus_store, vectorizer, bow_vectors = store
+    assert (corpus_store.matrix != bow_vectors).nnz == 0
+    assert list(corpus_store.tokenized_documents()) == DOCUMENTS
+    assert corpus_store.vocabulary.tolist() == vectorizer.get_feature_names_out().tolist()
+    assert (corpus_store.vectorizer().transform(DOCUMENTS) != bow_vectors).nnz == 0
+    assert corpus_store.documents.tolist() == ["a.txt", "b.txt", "c.txt"]
+
+
+def test_subset_rows(store):
+    corpus_store, _, bow_vectors = store
+    assert np.array_equal(corpus_store.rows([2, 0]).toarray(), bow_vectors[[2, 0]].toarray())
+    assert corpus_store.tokens(1) == ["science", "science", "method"]
+
+
+def test_unsupported_version(store, tmp_path):
+    with open(tmp_path / "store" / "meta.json") as file:
+        meta = json.load(file)
+    meta["version"] += 1
+    with open(tmp_path / "store" / "meta.json", "w") as file:
+        json.dump(meta, file)
+    with pytest.raises(ValueError):
+        CorpusStore(tmp_path / "store")
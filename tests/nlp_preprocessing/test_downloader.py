@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.nlp_preprocessing.downloader import AsyncDownloader, pdf_url_from_page
+
+PDFS = {f"article{i}": bytes([i]) * (100_000 + i) for i in range(6)}
+
+
+class ArticleServer(BaseHTTPRequestHandler):
+    """Stand-in for the article source: /page/<id> embeds /files/<id>.pdf; ids without a PDF have no embed."""
+
+    def do_GET(self):
+        kind, _, name = self.path.strip("/").partition("/")
+        if kind == "page":
+            article = name.rsplit("/", 1)[-1]
+            body = f'<html><body><embed id="pdf" src="/files/{article}.pdf#navpanes=0"></body></html>' \
+                if article in PDFS else "<html><body>No access</body></html>"
+            self.reply(body.encode(), "text/html")
+        elif kind == "files" and name[:-len(".pdf")] in PDFS:
+            self.reply(PDFS[name[:-len(".pdf")]], "application/pdf")
+        else:
+            self.send_error(404)
+
+    def reply(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ArticleServer)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_pdf_url_from_page():
+    html = '<embed id="pdf" src="//source.com/journal-article/e08/lev1936.pdf#navpanes=0&view=FitH">'
+    assert pdf_url_from_page(html) == "https://source.com/journal-article/e08/lev1936.pdf"
+    assert pdf_url_from_page("<embed src='a.pdf'>") is None
+
+
+def test_downloads_are_streamed_to_disk(server, tmp_path):
+    (tmp_path / "article0_article0.pdf").write_bytes(b"already here")
+    downloader = AsyncDownloader(tmp_path, source_url=f"{server}/page/", per_host_limit=2, chunk_size=4096)
+    dois = list(PDFS) + ["missing"]
+    results = {result.doi: result for result in downloader.download_all(dois)}
+
+    assert results["article0"].status == "exists"
+    assert results["missing"].status == "not_found"
+    for doi in list(PDFS)[1:]:
+        assert results[doi].status == "downloaded"
+        assert results[doi].filename == f"{doi}_{doi}.pdf"
+        assert (tmp_path / results[doi].filename).read_bytes() == PDFS[doi]
+        assert results[doi].sha256 == hashlib.sha256(PDFS[doi]).hexdigest()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_resolvers_are_not_limited_per_host(tmp_path):
+    # four pages of one host resolve at once (e.g. in four browsers), whatever the per-host PDF limit
+    barrier = threading.Barrier(4, timeout=5)
+
+    def resolver(page_url):
+        barrier.wait()
+        return None
+
+    downloader = AsyncDownloader(tmp_path, source_url="https://publisher.org/", resolver=resolver,
+                                 per_host_limit=1, resolve_workers=4)
+    results = downloader.download_all([f"article{i}" for i in range(4)])
+    assert [result.status for result in results] == ["not_found"] * 4
+
+
+class BrokenResponse:
+    """A PDF response whose connection drops after the first chunk."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield b"%PDF"
+        raise requests.ConnectionError("connection dropped")
+
+
+def test_failed_fetch_removes_the_partial_file(tmp_path):
+    session = requests.Session()
+    session.get = lambda *args, **kwargs: BrokenResponse()
+    downloader = AsyncDownloader(tmp_path, session=session)
+
+    with pytest.raises(requests.ConnectionError):
+        downloader.fetch_pdf("https://publisher.org/a.pdf", tmp_path / "a.pdf")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_runs_do_not_leak_threads(server, tmp_path):
+    downloader = AsyncDownloader(tmp_path, source_url=f"{server}/page/")
+    threads = threading.active_count()
+
+    async def runs():
+        # in one event loop, as the retry loop does
+        for _ in range(3):
+            await downloader.run(["missing"])
+        return threading.active_count()
+
+    assert asyncio.run(runs()) == threads, "Each run should shut its thread pool down"
@@ -0,0 +1,30 @@
+import sqlite3
+
+from src.nlp_preprocessing.downloader import DownloadResult
+from src.nlp_preprocessing.job_state import JobStateStore
+
+
+def test_results_are_committed_and_resumed(tmp_path):
+    path = tmp_path / "state.sqlite"
+    store = JobStateStore(path)
+    store.record(DownloadResult("doi/1", "failed", error="timed out"))
+    record = store.record(DownloadResult("doi/1", "downloaded", pdf_url="http://x/1.pdf",
+                                         filename="1_1.pdf", size=10, sha256="ab"))
+    store.record(DownloadResult("doi/2", "not_found"))
+
+    assert record.attempts == 2
+    assert record.done and record.error is None and record.sha256 == "ab"
+    assert record.created_at <= record.updated_at
+
+    # another connection sees each result as soon as it is recorded (before `close`)
+    with sqlite3.connect(path) as reader:
+        assert reader.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        assert reader.execute("SELECT COUNT(*) FROM jobs").fetchone() == (2,)
+    store.close()
+
+    with JobStateStore(path) as resumed:
+        assert resumed.is_done("doi/1")
+        assert not resumed.is_done("doi/2") and not resumed.is_done("doi/3")
+        assert resumed.has_file("1_1.pdf") and not resumed.has_file("2_2.pdf")
+        assert resumed.counts() == {"downloaded": 1, "not_found": 1}
+        assert [r.doi for r in resumed.records("not_found")] == ["doi/2"]
@@ -0,0 +1,68 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src.nlp_preprocessing.page_resolver import ISSUE_PAGE_SELECTORS, PageResolver, missing_selectors
+
+SAMPLE_HTML = (Path(__file__).parents[2] / "src/nlp_preprocessing/utils/sample.html").read_text()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = (SAMPLE_HTML if self.path == "/issue" else "<html><body>Loading...</body></html>").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBrowserPool:
+    started = 0
+
+    def start(self):
+        FakeBrowserPool.started += 1
+        return self
+
+    def load(self, url):
+        return f"<html>{url} rendered</html>"
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_missing_selectors():
+    assert missing_selectors(SAMPLE_HTML, ISSUE_PAGE_SELECTORS) == []
+    assert missing_selectors('<ul class="c-list"><li>x</li></ul>', ISSUE_PAGE_SELECTORS) == list(ISSUE_PAGE_SELECTORS)
+
+
+def test_browser_only_when_selectors_are_missing(base_url):
+    FakeBrowserPool.started = 0
+    with PageResolver(browser_pool_factory=FakeBrowserPool) as resolver:
+        pages = [future.result() for future in resolver.map([f"{base_url}/issue"] * 3)]
+        assert pages == [SAMPLE_HTML] * 3
+        assert FakeBrowserPool.started == 0
+
+        assert resolver.resolve(f"{base_url}/rendered") == f"<html>{base_url}/rendered rendered</html>"
+        assert resolver.resolve(f"{base_url}/rendered-too").endswith("rendered</html>")
+        assert FakeBrowserPool.started == 1
+        assert resolver.stats == {"http": 3, "browser": 2}
+
+
+def test_no_fallback_without_browsers(base_url):
+    with PageResolver() as resolver:
+        with pytest.raises(ValueError):
+            resolver.resolve(f"{base_url}/rendered")
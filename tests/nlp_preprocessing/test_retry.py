@@ -0,0 +1,126 @@
+import time
+import random
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.nlp_preprocessing.downloader import AsyncDownloader, DownloadResult
+from src.nlp_preprocessing.retry import PERMANENT, SUCCESS, TRANSIENT
+from src.nlp_preprocessing.retry import ProxyRotation, RetryScheduler, download_with_retries
+
+
+class FlakyServer(BaseHTTPRequestHandler):
+    """Article pages embed /files/<id>.pdf; 'flaky' answers 503 twice, 'gone' is a 404, 'dead' has no pdf."""
+
+    requests = Counter()
+
+    def do_GET(self):
+        kind, _, name = self.path.strip("/").partition("/")
+        FlakyServer.requests[self.path] += 1
+        if kind == "page":
+            body = b"<html>No access</html>" if name == "dead" else \
+                f'<embed id="pdf" src="/files/{name}.pdf">'.encode()
+            self.reply(200, body)
+        elif name == "flaky.pdf" and FlakyServer.requests[self.path] <= 2:
+            self.reply(503, b"busy")
+        elif name in ("ok.pdf", "flaky.pdf"):
+            self.reply(200, b"%PDF" * 100)
+        else:
+            self.reply(404, b"gone")
+
+    def reply(self, code, body):
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FlakyServer.requests.clear()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FlakyServer)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_backoff_and_proxy_cooldowns():
+    now = [0.0]
+    clock = lambda: now[0]
+    scheduler = RetryScheduler(base_delay=10, max_delay=60, rng=random.Random(0), clock=clock)
+    for attempt in range(1, 6):
+        backoff = min(60, 10 * 2 ** (attempt - 1))
+        assert backoff / 2 <= scheduler.delay(attempt) <= backoff
+
+    rotation = ProxyRotation(["a", "b", "c"], base_cooldown=30, clock=clock)
+    assert [next(rotation) for _ in range(4)] == ["a", "b", "c", "a"]
+    assert rotation.penalize("b") == 30 and rotation.penalize("b") == 60
+    assert [next(rotation) for _ in range(3)] == ["c", "a", "c"]
+    now[0] = 61
+    assert next(rotation) == "a" and next(rotation) == "b"
+    rotation.reward("b")
+    assert rotation.cooling() == []
+
+    scheduler.proxy_rotation = rotation
+    decision = scheduler.record(DownloadResult("doi", "failed", proxy="c", exception=requests.Timeout()))
+    assert decision.result_class == TRANSIENT and decision.retry_in is not None
+    assert rotation.cooling() == ["c"] and scheduler.pending == 1 and scheduler.due() == []
+    now[0] += decision.retry_in
+    assert scheduler.due() == ["doi"]
+
+
+def test_transient_failures_are_retried(server, tmp_path):
+    scheduler = RetryScheduler(max_attempts=5, base_delay=0.01)
+    downloader = AsyncDownloader(tmp_path, source_url=f"{server}/page/")
+    decisions = []
+    results = download_with_retries(downloader, ["ok", "flaky", "gone", "dead"], scheduler,
+                                    on_result=lambda result, decision: decisions.append((result.doi, decision)))
+    final = {result.doi: result for result in results}
+
+    assert final["ok"].status == final["flaky"].status == "downloaded"
+    assert final["gone"].status == "failed" and final["dead"].status == "not_found"
+    assert [d.retry_in is not None for doi, d in decisions if doi == "flaky"] == [True, True, False]
+    assert {doi: d.result_class for doi, d in decisions if d.retry_in is None} == \
+        {"ok": SUCCESS, "flaky": SUCCESS, "gone": PERMANENT, "dead": PERMANENT}
+    # permanent failures are tried once
+    assert FlakyServer.requests["/files/gone.pdf"] == 1 and FlakyServer.requests["/page/dead"] == 1
+    report = scheduler.report()
+    assert report[SUCCESS]["results"] == 2 and report[TRANSIENT]["results"] == 2 and report[PERMANENT]["results"] == 2
+
+
+def test_retries_do_not_wait_for_slow_downloads(tmp_path):
+    # 'flaky' times out once; its retry should not wait for the slow 'slow' to finish
+    times = {}
+
+    def resolver(page_url):
+        doi = page_url.rsplit("/", 1)[-1]
+        times.setdefault(doi, []).append(time.monotonic())
+        if doi == "slow":
+            time.sleep(1)
+        elif len(times[doi]) == 1:
+            raise requests.Timeout("timed out")
+        return None
+
+    downloader = AsyncDownloader(tmp_path, source_url="https://publisher.org/", resolver=resolver)
+    results = download_with_retries(downloader, ["slow", "flaky"], RetryScheduler(base_delay=0.01))
+
+    assert [result.doi for result in results] == ["flaky", "slow"]
+    assert len(times["flaky"]) == 2 and times["flaky"][1] < times["slow"][0] + 0.5
+
+
+def test_page_failures_cool_their_proxy_down(tmp_path):
+    # nothing listens on port 1: the page request fails on the proxy
+    rotation = ProxyRotation(["127.0.0.1:1"])
+    scheduler = RetryScheduler(max_attempts=1, proxy_rotation=rotation)
+    downloader = AsyncDownloader(tmp_path, source_url="http://publisher.org/page/", proxies=rotation)
+    [result] = download_with_retries(downloader, ["doi"], scheduler)
+
+    assert result.status == "failed" and result.proxy == "127.0.0.1:1"
+    assert rotation.cooling() == ["127.0.0.1:1"]
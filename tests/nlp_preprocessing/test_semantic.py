@@ -0,0 +1,28 @@
+import numpy as np
+import spacy
+from sklearn.feature_extraction.text import CountVectorizer
+from src.nlp_preprocessing.corpus_store import CorpusStore, save_corpus_store
+from src.nlp_preprocessing.semantic import load_document_vectors, reference_vector, semantic_similarity_scores
+
+DOCUMENTS = ["values science science", "method data", "unknown"]
+
+
+def test_document_vectors_are_cached_means(tmp_path):
+    nlp = spacy.blank("en")
+    rng = np.random.default_rng(0)
+    vectors = {term: rng.normal(size=4).astype(np.float32) for term in ["values", "science", "method", "data"]}
+    for term, vector in vectors.items():
+        nlp.vocab.set_vector(term, vector)
+
+    vectorizer = CountVectorizer()
+    save_corpus_store(tmp_path, vectorizer.fit_transform(DOCUMENTS), vectorizer.get_feature_names_out(), DOCUMENTS)
+    document_vectors = load_document_vectors(CorpusStore(tmp_path), nlp)
+
+    expected = np.mean([vectors["values"], vectors["science"], vectors["science"]], axis=0)
+    assert np.allclose(document_vectors[0], expected, atol=1e-6)
+    assert not document_vectors[2].any()
+    assert CorpusStore(tmp_path).cached_array("document_vectors", CorpusStore(tmp_path).meta["arrays"]["document_vectors"]) is not None
+
+    scores = semantic_similarity_scores(document_vectors, reference_vector("values science science", nlp))
+    assert np.isclose(scores[0], 1.0)
+    assert scores[2] == 0
@@ -0,0 +1,71 @@
+import spacy
+from spacy.language import Language
+
+from src.nlp_preprocessing.tokenization import (
+    document_tokens, iter_corpus_texts, iter_tokenized_documents, stream_tokenize, tokenize_corpus
+)
+
+TEXT = (
+    "The measurements of Psychometrika were debated: critics argued that the values of "
+    "scientists, e.g. objectivity and fairness, shape their theories in 1936 and later."
+)
+
+
+@Language.component("suffix_lemmatizer")
+def suffix_lemmatizer(doc):
+    for token in doc:
+        token.lemma_ = token.lower_.rstrip("s")
+    return doc
+
+
+def make_nlp():
+    nlp = spacy.blank("en")
+    nlp.add_pipe("suffix_lemmatizer")
+    return nlp
+
+
+def previous_tokenizer(nlp, text):
+    """The tokenization `bow.build_from_scratch` did before streaming: the full pipeline, then a filter."""
+    return [
+        token.text.lower()
+        for token in nlp(text)
+        if not token.is_stop and token.is_alpha and len(token) > 3
+    ]
+
+
+def test_stream_matches_previous_tokenizer():
+    nlp = make_nlp()
+    texts = [(TEXT, "a.txt"), ("", "empty.txt"), (TEXT.upper(), "upper.txt")]
+    streamed = list(stream_tokenize(nlp, texts, batch_size=2, n_process=1))
+
+    assert [filename for filename, _ in streamed] == ["a.txt", "empty.txt", "upper.txt"]
+    assert [tokens for _, tokens in streamed] == [previous_tokenizer(nlp, text) for text, _ in texts]
+    assert nlp.pipe_names == ["suffix_lemmatizer"], "The pipeline components should be restored"
+
+
+def test_stopwords_punctuation_and_lemmas():
+    tokens = document_tokens(make_nlp()(TEXT))
+
+    # stop words ("the", "were", "that", "their", ...), short words, numbers and punctuation are dropped
+    assert tokens == [
+        "measurements", "psychometrika", "debated", "critics", "argued", "values",
+        "scientists", "objectivity", "fairness", "shape", "theories", "later",
+    ]
+    # tokens keep their surface (lower-cased) form; lemmas are not used
+    assert "measurement" not in tokens and "values" in tokens
+
+
+def test_tokenize_corpus_streams_to_jsonl(tmp_path):
+    corpus = tmp_path / "txt"
+    corpus.mkdir()
+    (corpus / "b.txt").write_text(TEXT, encoding="utf-8")
+    (corpus / "a.txt").write_text("Fairness and values", encoding="utf-8")
+    (corpus / "c.txt").write_bytes(b"\xff\xfe invalid utf-8")
+    (corpus / "notes.md").write_text("ignored", encoding="utf-8")
+    output = tmp_path / "tokenized.jsonl"
+
+    assert [filename for _, filename in iter_corpus_texts(corpus)] == ["a.txt", "b.txt"]
+    assert tokenize_corpus(corpus, output, make_nlp(), n_process=1) == 2
+    assert list(iter_tokenized_documents(output)) == [
+        "fairness values", " ".join(previous_tokenizer(make_nlp(), TEXT))
+    ]